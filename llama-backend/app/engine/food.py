@@ -1,21 +1,133 @@
-import ollama
+import os
 import json
 import logging
 import random
+import time
 import aiohttp
 import asyncio
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from app.models.schemas import FoodParameterRequest, FoodParameterResponse, MilestoneType, FoodSuggestion, FoodSuggestionRequest, FoodSuggestionResponse
+from app.models.schemas import FoodParameterRequest, FoodParameterResponse, MilestoneType, FoodSuggestion, FoodSuggestionRequest, FoodSuggestionResponse, FoodSelectionsOutput
+from app.utils.llm_client import llm_client
+from app.utils.llm_scheduler import LLMUnavailableError
+from app.utils import structured_output
+from app.utils.deadline import Deadline, DeadlineExceeded, within_deadline, record_exceeded
+from app.utils.metrics import metrics
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, 
-                    format='%(asctime)s [%(levelname)s] - %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S')
-logger = logging.getLogger("enhanced_food_engine")
+logger = logging.getLogger(__name__)
+
+SPOONACULAR_REQUEST_SECONDS = metrics.histogram(
+    "spoonacular_request_seconds", "Spoonacular API call latency, connection setup included", ["endpoint"]
+)
+SPOONACULAR_CONNECT_SECONDS = metrics.histogram(
+    "spoonacular_connect_seconds", "Time to open a new connection to Spoonacular (DNS, TCP and TLS)",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+SPOONACULAR_CONNECTIONS_TOTAL = metrics.counter(
+    "spoonacular_connections_total", "Spoonacular calls by whether they opened or reused a connection", ["kind"]
+)
+SPOONACULAR_DNS_TOTAL = metrics.counter(
+    "spoonacular_dns_lookups_total", "Spoonacular host name resolutions by DNS cache result", ["result"]
+)
+
+
+def _spoonacular_trace_config() -> aiohttp.TraceConfig:
+    """Request, connection and DNS cache metrics for the Spoonacular session."""
+    trace_config = aiohttp.TraceConfig()
+    
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+    
+    async def on_request_end(session, context, params):
+        endpoint = (context.trace_request_ctx or {}).get("endpoint", "other")
+        SPOONACULAR_REQUEST_SECONDS.observe(time.perf_counter() - context.started, endpoint=endpoint)
+    
+    async def on_connection_create_start(session, context, params):
+        context.connect_started = time.perf_counter()
+    
+    async def on_connection_create_end(session, context, params):
+        SPOONACULAR_CONNECT_SECONDS.observe(time.perf_counter() - context.connect_started)
+        SPOONACULAR_CONNECTIONS_TOTAL.inc(kind="new")
+    
+    async def on_connection_reuseconn(session, context, params):
+        SPOONACULAR_CONNECTIONS_TOTAL.inc(kind="reused")
+    
+    async def on_dns_cache_hit(session, context, params):
+        SPOONACULAR_DNS_TOTAL.inc(result="hit")
+    
+    async def on_dns_cache_miss(session, context, params):
+        SPOONACULAR_DNS_TOTAL.inc(result="miss")
+    
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+    trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+    return trace_config
+
+FOOD_SYSTEM_PROMPT = "You are a nutrition expert that selects and explains personalized food suggestions. Always respond with valid JSON in the requested format with no additional text."
+
+# Static-first prompt layout: the instructions and output format are identical for every
+# request and come first, so Ollama can reuse their cached prefix. The selection rule has
+# one variant per calorie state, and the food pool and user context always come last.
+FOOD_PROMPT_PREFIX = """As a nutrition AI, select the best food suggestions for the user from the FOOD OPTIONS below, using the USER CONTEXT at the end.
+
+INSTRUCTIONS:
+1. Follow the SELECTION RULE below.
+2. Select EXACTLY 4 options from the available foods, with varied calories between each option.
+3. For each selection, provide a very short personalized explanation of why it's beneficial.
+4. Return your selections in valid JSON format as shown below:
+
+```json
+{
+  "selections": [
+    {
+      "food_id": "1",
+      "explanation": "This protein-rich option supports your fitness goals."
+    },
+    {
+      "food_id": "5",
+      "explanation": "A nutrient-dense choice that provides essential vitamins."
+    },
+    {
+      "food_id": "9",
+      "explanation": "low calorie option to keep you within your calorie budget."
+    },
+    {
+      "food_id": "12",
+      "explanation": "Dessert to treat yourself for your hard work!"
+    }
+  ]
+}
+```
+
+Respond ONLY with valid JSON in the exact format shown above. change the explanation to match the food you selected. Do not include any other text or explanations outside of the JSON response.
+"""
+
+FOOD_SELECTION_RULES = {
+    # Calorie goal reached
+    True: """
+SELECTION RULE: Select ONLY zero or ultra-low calorie options since the user has reached or nearly reached their daily calorie goal:
+   - Two zero/ultra-low calorie drinks (preferably tea-based)
+   - Two low-calorie simple ingredient options
+""",
+    False: """
+SELECTION RULE: Select a balanced mix of options appropriate for this meal context:
+   - Two recipes appropriate for this meal context
+   - Two simple ingredient options that complement the recipes
+""",
+}
 
 class SpoonacularService:
-    """Service for interacting with the Spoonacular API via RapidAPI"""
+    """
+    Service for interacting with the Spoonacular API via RapidAPI
+    
+    All calls share one long-lived aiohttp session (created at application
+    startup, closed at shutdown) whose connector keeps connections to RapidAPI
+    alive and caches DNS, so only the first call pays the TCP and TLS handshake.
+    """
     
     def __init__(self):
         # Updated to use RapidAPI credentials
@@ -25,6 +137,60 @@ class SpoonacularService:
             "x-rapidapi-host": "spoonacular-recipe-food-nutrition-v1.p.rapidapi.com",
             "x-rapidapi-key": self.api_key
         }
+        # Upper bound for a single Spoonacular search, including its nutrition lookups
+        self.timeout_seconds = float(os.getenv("SPOONACULAR_TIMEOUT", "5"))
+        self.timeout = aiohttp.ClientTimeout(
+            total=self.timeout_seconds,
+            connect=float(os.getenv("SPOONACULAR_CONNECT_TIMEOUT", "2")),
+            sock_read=self.timeout_seconds
+        )
+        # Connection pool: at most pool_size connections, kept alive between requests
+        self.pool_size = int(os.getenv("SPOONACULAR_POOL_SIZE", "20"))
+        self.keepalive_seconds = float(os.getenv("SPOONACULAR_KEEPALIVE", "60"))
+        self.dns_cache_seconds = int(os.getenv("SPOONACULAR_DNS_CACHE_TTL", "300"))
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def start(self):
+        """Open the shared session (called on application startup)."""
+        self._get_session()
+    
+    async def close(self):
+        """Close the shared session and its pooled connections (called on application shutdown)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Also created on first use, so the service works without the startup hook
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                ttl_dns_cache=self.dns_cache_seconds,
+                keepalive_timeout=self.keepalive_seconds,
+                enable_cleanup_closed=True
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers=self.headers,
+                trace_configs=[_spoonacular_trace_config()]
+            )
+        return self._session
+    
+    async def _get_json(self, path: str, params: Dict[str, Any], endpoint: str) -> Optional[Dict[str, Any]]:
+        """GET a Spoonacular endpoint on the shared session; None (after logging) on a non-200 response."""
+        async with self._get_session().get(
+            f"{self.base_url}{path}",
+            params=params,
+            trace_request_ctx={"endpoint": endpoint}
+        ) as response:
+            if response.status == 200:
+                return await response.json()
+            logger.error(f"Spoonacular API error: {response.status}")
+            error_text = await response.text()
+            logger.error(f"Error response: {error_text}")
+            return None
     
     async def search_recipes(self, min_calories=0, max_calories=2000, meal_type=None, 
                             diet=None, exclude_ingredients=None, number=10):
@@ -43,20 +209,8 @@ class SpoonacularService:
             if diet: params["diet"] = diet
             if exclude_ingredients: params["excludeIngredients"] = ",".join(exclude_ingredients)
                 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/recipes/complexSearch", 
-                    params=params, 
-                    headers=self.headers
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._process_recipes(data)
-                    else:
-                        logger.error(f"Spoonacular API error: {response.status}")
-                        error_text = await response.text()
-                        logger.error(f"Error response: {error_text}")
-                        return []
+            data = await self._get_json("/recipes/complexSearch", params, "recipes")
+            return self._process_recipes(data) if data is not None else []
         except Exception as e:
             logger.error(f"Error searching recipes: {str(e)}")
             return []
@@ -76,20 +230,8 @@ class SpoonacularService:
                 "sort": "calories",
             }
                 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/food/ingredients/search", 
-                    params=params, 
-                    headers=self.headers
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return await self._process_ingredients(data, session)
-                    else:
-                        logger.error(f"Spoonacular API error: {response.status}")
-                        error_text = await response.text()
-                        logger.error(f"Error response: {error_text}")
-                        return []
+            data = await self._get_json("/food/ingredients/search", params, "ingredients")
+            return await self._process_ingredients(data) if data is not None else []
         except Exception as e:
             logger.error(f"Error searching ingredients: {str(e)}")
             return []
@@ -108,20 +250,8 @@ class SpoonacularService:
                 "sort": "random",
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/recipes/complexSearch", 
-                    params=params, 
-                    headers=self.headers
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._process_recipes(data, food_type="drink")
-                    else:
-                        logger.error(f"Spoonacular API error: {response.status}")
-                        error_text = await response.text()
-                        logger.error(f"Error response: {error_text}")
-                        return []
+            data = await self._get_json("/recipes/complexSearch", params, "drinks")
+            return self._process_recipes(data, food_type="drink") if data is not None else []
         except Exception as e:
             logger.error(f"Error searching drinks: {str(e)}")
             return []
@@ -177,7 +307,7 @@ class SpoonacularService:
                 
         return processed_recipes
         
-    async def _process_ingredients(self, data, session):
+    async def _process_ingredients(self, data):
         """Process ingredient search results"""
         processed_ingredients = []
         
@@ -187,7 +317,7 @@ class SpoonacularService:
         for ingredient in data["results"]:
             try:
                 ingredient_id = ingredient["id"]
-                nutrition = await self._get_ingredient_nutrition(ingredient_id, 100, session)
+                nutrition = await self._get_ingredient_nutrition(ingredient_id, 100)
                 
                 processed_ingredient = {
                     "id": str(ingredient_id),
@@ -208,40 +338,33 @@ class SpoonacularService:
                 
         return processed_ingredients
         
-    async def _get_ingredient_nutrition(self, ingredient_id, amount, session):
+    async def _get_ingredient_nutrition(self, ingredient_id, amount):
         """Get nutrition information for an ingredient"""
         try:
             params = {
                 "amount": amount,
             }
             
-            async with session.get(
-                f"{self.base_url}/food/ingredients/{ingredient_id}/information", 
-                params=params, 
-                headers=self.headers
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    nutrition = {}
-                    
-                    if "nutrition" in data:
-                        for nutrient in data["nutrition"]["nutrients"]:
-                            name = nutrient["name"].lower()
-                            if name == "calories":
-                                nutrition["calories"] = int(nutrient["amount"])
-                            elif name == "fat":
-                                nutrition["fat"] = round(nutrient["amount"], 1)
-                            elif name == "carbohydrates":
-                                nutrition["carbs"] = round(nutrient["amount"], 1)
-                            elif name == "protein":
-                                nutrition["protein"] = round(nutrient["amount"], 1)
-                    
-                    return nutrition
-                else:
-                    logger.error(f"Error getting ingredient nutrition: {response.status}")
-                    error_text = await response.text()
-                    logger.error(f"Error response: {error_text}")
-                    return {}
+            data = await self._get_json(
+                f"/food/ingredients/{ingredient_id}/information", params, "ingredient_nutrition"
+            )
+            if data is None:
+                return {}
+            nutrition = {}
+            
+            if "nutrition" in data:
+                for nutrient in data["nutrition"]["nutrients"]:
+                    name = nutrient["name"].lower()
+                    if name == "calories":
+                        nutrition["calories"] = int(nutrient["amount"])
+                    elif name == "fat":
+                        nutrition["fat"] = round(nutrient["amount"], 1)
+                    elif name == "carbohydrates":
+                        nutrition["carbs"] = round(nutrient["amount"], 1)
+                    elif name == "protein":
+                        nutrition["protein"] = round(nutrient["amount"], 1)
+            
+            return nutrition
         except Exception as e:
             logger.error(f"Error getting ingredient nutrition: {str(e)}")
             return {}
@@ -286,7 +409,8 @@ class EnhancedFoodEngine:
         else:
             return MilestoneType.COMPLETED
 
-    async def generate_food_suggestions(self, request: FoodSuggestionRequest) -> FoodSuggestionResponse:
+    async def generate_food_suggestions(self, request: FoodSuggestionRequest,
+                                        deadline: Optional[Deadline] = None) -> FoodSuggestionResponse:
         """Generate personalized food suggestions using Spoonacular and LLaMA"""
         try:
             # Calculate current milestone and consumption percentage
@@ -311,7 +435,8 @@ class EnhancedFoodEngine:
                 meal_type=meal_type,
                 goal=request.goal,
                 disliked_food_ids=request.dislikedFoodIds or [],
-                is_calorie_goal_reached=is_calorie_goal_reached
+                is_calorie_goal_reached=is_calorie_goal_reached,
+                deadline=deadline
             )
             
             # Log the number of options
@@ -335,7 +460,8 @@ class EnhancedFoodEngine:
                 milestone=current_milestone,
                 goal=request.goal,
                 percentage_consumed=percentage_consumed,
-                is_calorie_goal_reached=is_calorie_goal_reached
+                is_calorie_goal_reached=is_calorie_goal_reached,
+                deadline=deadline
             )
             
             logger.info(f"Selected {len(selected_suggestions)} food suggestions with LLaMA")
@@ -385,7 +511,8 @@ class EnhancedFoodEngine:
             return "food OR ingredient OR vegetable OR fruit OR protein"
             
     async def _gather_food_options(self, target_calories: float, meal_type: str, goal: str, 
-                                  disliked_food_ids: List[str], is_calorie_goal_reached: bool) -> List[Dict[str, Any]]:
+                                  disliked_food_ids: List[str], is_calorie_goal_reached: bool,
+                                  deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Gather food options from Spoonacular based on parameters"""
         # Calculate calorie ranges
         min_calories = max(10, target_calories * 0.7) if not is_calorie_goal_reached else 0
@@ -439,7 +566,19 @@ class EnhancedFoodEngine:
             ])
             
         # Run all API calls in parallel
-        results = await asyncio.gather(*tasks)
+        if deadline is None:
+            results = await asyncio.gather(*tasks)
+        else:
+            # Keep whatever finished within the budget and drop the rest
+            search_tasks = [asyncio.ensure_future(task) for task in tasks]
+            done, pending = await asyncio.wait(
+                search_tasks, timeout=deadline.timeout(cap=self.spoonacular.timeout_seconds)
+            )
+            for task in pending:
+                task.cancel()
+            if pending:
+                record_exceeded("spoonacular")
+            results = [task.result() for task in search_tasks if task in done]
         
         # Combine results
         food_pool = []
@@ -451,7 +590,8 @@ class EnhancedFoodEngine:
     async def _select_and_explain_with_llama(self, food_pool: List[Dict[str, Any]], 
                                           milestone: MilestoneType, goal: str,
                                           percentage_consumed: float,
-                                          is_calorie_goal_reached: bool) -> List[FoodSuggestion]:
+                                          is_calorie_goal_reached: bool,
+                                          deadline: Optional[Deadline] = None) -> List[FoodSuggestion]:
         """Use LLaMA to select and explain the best food options"""
         try:
             # Prepare food pool data for LLaMA
@@ -478,95 +618,62 @@ class EnhancedFoodEngine:
                 MilestoneType.COMPLETED: "zero/ultra-low calorie option"
             }
             
-            # Determine selection criteria based on calorie goal status
-            if is_calorie_goal_reached:
-                selection_instruction = "Select ONLY zero or ultra-low calorie options since the user has reached or nearly reached their daily calorie goal."
-                selection_format = """
-   - Two zero/ultra-low calorie drinks (preferably tea-based)
-   - Two low-calorie simple ingredient options"""
-            else:
-                selection_instruction = "Select a balanced mix of options appropriate for this meal context."
-                selection_format = """
-   - Two recipes appropriate for this meal context
-   - Two simple ingredient options that complement the recipes"""
-                
             # Calculate remaining calories
             remaining_percentage = 1.0 - percentage_consumed
             remaining_percentage_text = f"{remaining_percentage * 100:.1f}%"
                 
-            # Create prompt for LLaMA
-            prompt = f"""As a nutrition AI, select the best food suggestions from the options below for the user.
+            # Create prompt for LLaMA: static prefix first, request-specific data last
+            prompt = FOOD_PROMPT_PREFIX + FOOD_SELECTION_RULES[bool(is_calorie_goal_reached)] + f"""
+FOOD OPTIONS:
+{json.dumps(food_pool_data, indent=2)}
 
 USER CONTEXT:
 - Current meal: {milestone_names[milestone]}
 - Fitness goal: {goal}
 - Calories consumed: {percentage_consumed:.0%} of daily goal
 - Calories remaining: {remaining_percentage_text}
-
-FOOD OPTIONS:
-{json.dumps(food_pool_data, indent=2)}
-
-INSTRUCTIONS:
-1. {selection_instruction}
-2. Select EXACTLY 4 options from the available foods:{selection_format}, with varied calories between each option.
-3. For each selection, provide a very short personalized explanation of why it's beneficial.
-4. Return your selections in valid JSON format as shown below:
-
-```json
-{{
-  "selections": [
-    {{
-      "food_id": "1",
-      "explanation": "This protein-rich option supports your fitness goals."
-    }},
-    {{
-      "food_id": "5",
-      "explanation": "A nutrient-dense choice that provides essential vitamins."
-    }},
-    {{
-      "food_id": "9",
-      "explanation": "low calorie option to keep you within your calorie budget."
-    }},
-    {{
-      "food_id": "12",
-      "explanation": "Dessert to treat yourself for your hard work!"
-    }}
-  ]
-}}
-```
-
-Respond ONLY with valid JSON in the exact format shown above. change the explanation to match the food you selected. Do not include any other text or explanations outside of the JSON response.
 """
 
             # Call LLama model
             logger.info("Sending request to LLama model")
-            response = ollama.chat(
-                model="llama3.2",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a nutrition expert that selects and explains personalized food suggestions. Always respond with valid JSON in the requested format with no additional text."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                options={"temperature": 0.7}
+            response = await within_deadline(
+                llm_client.chat_for_task(
+                    "food_selection",
+                    messages=[
+                        {"role": "system", "content": FOOD_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    label=milestone.name,
+                    **structured_output.format_kwargs(FoodSelectionsOutput)
+                ),
+                deadline, "food_llm"
             )
             
             content = response['message']['content'].strip()
+            parse_tags = {"label": milestone.name, "model": response.get("model") or ""}
             
-            # Extract JSON from response
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-                
-            # Parse LLaMA selections
-            try:
-                selections_data = json.loads(content)
-                selections = selections_data.get("selections", [])
-            except json.JSONDecodeError:
-                logger.error("Failed to parse LLaMA response as JSON")
-                return self._select_random_options(food_pool, is_calorie_goal_reached)
+            # Validate directly against the selection schema first
+            selections_data = structured_output.parse_structured(
+                content, FoodSelectionsOutput, "food_selection", parse_tags
+            )
+            if selections_data is not None:
+                selections = selections_data["selections"]
+            else:
+                # Extract JSON from response
+                if "```json" in content:
+                    content = content.split("```json")[1].split("```")[0].strip()
+                elif "```" in content:
+                    content = content.split("```")[1].split("```")[0].strip()
+                    
+                # Parse LLaMA selections
+                try:
+                    selections_data = json.loads(content)
+                    selections = selections_data.get("selections", [])
+                    structured_output.record_outcome("food_selection", "repaired", parse_tags)
+                except json.JSONDecodeError:
+                    logger.error("Failed to parse LLaMA response as JSON")
+                    structured_output.record_outcome("food_selection", "failed", parse_tags)
+                    return self._select_random_options(food_pool, is_calorie_goal_reached)
             
             # Create list of selected suggestions
             selected_suggestions = []
@@ -634,6 +741,9 @@ Respond ONLY with valid JSON in the exact format shown above. change the explana
             
             return selected_suggestions
             
+        except (LLMUnavailableError, DeadlineExceeded) as e:
+            logger.warning(f"LLaMA unavailable for food selection ({str(e)}), selecting random options")
+            return self._select_random_options(food_pool, is_calorie_goal_reached)
         except Exception as e:
             logger.error(f"Error using LLaMA for selection: {str(e)}", exc_info=True)
             return self._select_random_options(food_pool, is_calorie_goal_reached)
@@ -6,12 +6,9 @@ import requests
 import os
 import logging
 from typing import Tuple, Dict, Any, Optional
+from app.utils.deadline import Deadline, record_exceeded
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, 
-                   format='%(asctime)s [%(levelname)s] - %(message)s',
-                   datefmt='%Y-%m-%d %H:%M:%S')
-logger = logging.getLogger("food_recognition_engine")
+logger = logging.getLogger(__name__)
 
 class FoodRecognitionEngine:
     """Engine for recognizing food from images using ResNet50 model"""
@@ -56,6 +53,9 @@ class FoodRecognitionEngine:
             "takoyaki", "tiramisu", "tuna_tartare", "waffles"
         ]
         
+        # Upper bound for each USDA request
+        self.usda_timeout = float(os.getenv("USDA_TIMEOUT", "5"))
+        
         # Load the model
         self._load_model()
         
@@ -138,12 +138,20 @@ class FoodRecognitionEngine:
             logger.error(f"Error in food prediction: {str(e)}", exc_info=True)
             return f"Error in prediction: {str(e)}", 0.0
     
-    def get_nutritional_info(self, food_name: str) -> Dict[str, Any]:
+    def _usda_get(self, url: str, deadline: Optional[Deadline]) -> requests.Response:
+        """GET a USDA url within the request's remaining budget"""
+        timeout = deadline.timeout(cap=self.usda_timeout) if deadline is not None else self.usda_timeout
+        if timeout <= 0:
+            raise requests.Timeout("Latency budget exhausted before USDA request")
+        return requests.get(url, timeout=timeout)
+    
+    def get_nutritional_info(self, food_name: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         Get nutritional information for a food using USDA Food Data Central API
         
         Args:
             food_name: Name of the food to look up
+            deadline: Optional latency budget shared with the rest of the request
             
         Returns:
             Dictionary with nutritional information
@@ -158,7 +166,7 @@ class FoodRecognitionEngine:
             
             # First try: Direct food lookup by name
             fdc_id_url = f"https://api.nal.usda.gov/fdc/v1/food/{food_name}?api_key={api_key}"
-            fdc_id_response = requests.get(fdc_id_url)
+            fdc_id_response = self._usda_get(fdc_id_url, deadline)
             
             if fdc_id_response.status_code == 200:
                 fdc_id_data = fdc_id_response.json()
@@ -174,7 +182,7 @@ class FoodRecognitionEngine:
             
             # Second try: Search for the food
             search_url = f"https://api.nal.usda.gov/fdc/v1/foods/search?api_key={api_key}&query={food_name}"
-            search_response = requests.get(search_url)
+            search_response = self._usda_get(search_url, deadline)
             
             if search_response.status_code == 200:
                 search_data = search_response.json()
@@ -193,7 +201,7 @@ class FoodRecognitionEngine:
                     # Third try: Just use the first word of the food name
                     first_word = food_name.split()[0]
                     search_url = f"https://api.nal.usda.gov/fdc/v1/foods/search?api_key={api_key}&query={first_word}"
-                    search_response = requests.get(search_url)
+                    search_response = self._usda_get(search_url, deadline)
                     
                     if search_response.status_code == 200:
                         search_data = search_response.json()
@@ -218,17 +226,22 @@ class FoodRecognitionEngine:
                 logger.error(f"API request failed with status: {search_response.status_code}")
                 return {'error': 'API request failed'}
                 
+        except requests.Timeout as e:
+            record_exceeded("usda")
+            logger.warning(f"USDA lookup for {food_name} timed out: {str(e)}")
+            return {'error': 'Nutrition lookup timed out'}
         except Exception as e:
             logger.error(f"Error getting nutritional information: {str(e)}", exc_info=True)
             return {'error': str(e)}
             
-    def process_food_image(self, image_file, filename: str) -> Dict[str, Any]:
+    def process_food_image(self, image_file, filename: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         Process a food image file and return recognition results with nutritional info
         
         Args:
             image_file: The uploaded image file object
             filename: The filename to save the image as
+            deadline: Optional latency budget for the nutrition lookups
             
         Returns:
             Dictionary with recognition results and nutritional information
@@ -252,7 +265,7 @@ class FoodRecognitionEngine:
                 return {'error': food_name}
             
             # Get nutritional information
-            nutritional_info = self.get_nutritional_info(food_name)
+            nutritional_info = self.get_nutritional_info(food_name, deadline)
             
             # Return combined results
             return {
@@ -0,0 +1,226 @@
+import time
+import zlib
+import logging
+from typing import Optional, List, Dict, Any, Set
+
+from app.models.schemas import WorkoutRequest
+from app.utils.exercise_db import ExerciseDatabase
+from app.utils.exercise_index import ExerciseIndex
+from app.utils.calorie_estimator import calorie_estimator
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RULES_SECONDS = metrics.histogram(
+    "workout_rules_seconds", "Time to build workout options with the rule-based generator", ["category"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+)
+
+#option layout shared with the LLM prompt: challenging, moderate (5 exercises), home-friendly
+OPTION_INTENTS = ["challenging", "moderate", "home"]
+OPTION_SIZES = [4, 5, 4]
+#profiles rotate through the most relevant count x WINDOW_FACTOR exercises of an intent
+WINDOW_FACTOR = 3
+
+#sets and reps per fitness level and option intent
+SETS_REPS = {
+    "Beginner": {"challenging": ("3", "8-10"), "moderate": ("2", "12-15"), "home": ("2", "10-12")},
+    "Intermediate": {"challenging": ("4", "6-8"), "moderate": ("3", "10-12"), "home": ("3", "12-15")},
+    "Advanced": {"challenging": ("5", "4-6"), "moderate": ("4", "8-10"), "home": ("4", "15-20")},
+}
+#higher reps for lighter options when the goal is losing weight
+WEIGHT_LOSS_REPS = {"Beginner": "12-15", "Intermediate": "15-20", "Advanced": "20-25"}
+#holds are programmed in seconds instead of reps
+HOLD_SECONDS = {"Beginner": "20s", "Intermediate": "40s", "Advanced": "60s"}
+HOLD_KEYWORDS = ("plank", "wall sit")
+
+#cardio tiers: no equipment, basic equipment, sport or full-body
+CARDIO_TIERS = [
+    ["Outdoor Running", "Walking", "Hiking", "Stair Climbing"],
+    ["Jump Rope", "Exercise Bike", "Rowing Machine", "Treadmill Running", "Cycling"],
+    ["Swimming", "Basketball", "Tennis", "Football", "Squash", "Volleyball"],
+]
+CARDIO_LEVELS = {
+    "Beginner": {"minutes": 20, "intensity": "Low"},
+    "Intermediate": {"minutes": 30, "intensity": "Moderate"},
+    "Advanced": {"minutes": 45, "intensity": "High"},
+}
+CARDIO_FORMATS = {
+    "Beginner": ["Steady-state", "Intervals (20s/40s)", "Easy continuous play"],
+    "Intermediate": ["Steady-state", "Intervals (30s/30s)", "Continuous play"],
+    "Advanced": ["Tempo (10 min build)", "Intervals (40s/20s)", "Match-pace play"],
+}
+CARDIO_DESCRIPTIONS = [
+    "{title} at a pace you can hold for the whole session, warming up for the first 5 minutes.",
+    "{title} alternating hard efforts and easy recovery as given by the format, then cool down for 5 minutes.",
+    "{title} played or performed continuously, keeping your heart rate up and resting only when needed.",
+]
+
+
+class RuleBasedWorkoutGenerator:
+    """
+    Deterministic catalog-driven workout options without the LLM.
+
+    Everything that depends only on the catalog is precomputed at startup:
+    per category and option intent, the exercise index orders every candidate
+    so body parts alternate and near-duplicates are spread out. A request then
+    only walks those lists from a per-profile offset, so the same profile
+    always gets the same options, different profiles get different ones, and
+    generation takes well under a millisecond.
+    """
+
+    def __init__(self, exercise_index: ExerciseIndex, exercise_db: ExerciseDatabase,
+                 category_exercises: Dict[str, List[Dict[str, Any]]], cardio_exercises: List[Dict[str, str]]):
+        self.exercise_db = exercise_db
+        self.cardio = {ex["Title"]: ex for ex in cardio_exercises}
+        self._icons: Dict[str, str] = {}
+        #category -> intent -> ordered exercise titles
+        self._ordered: Dict[str, Dict[str, List[str]]] = {}
+
+        for category, exercises in category_exercises.items():
+            if category == "Cardio" or not exercises:
+                continue
+            self._ordered[category] = {
+                intent: [ex["Title"] for ex in exercise_index.shortlist(
+                    exercises, intent, size=len(exercises), key=category
+                )]
+                for intent in OPTION_INTENTS
+            }
+            for ex in exercises:
+                self._icons.setdefault(ex["Title"], exercise_db.get_exercise_icon(ex["Title"]))
+        logger.info(f"Rule-based workout generator ready for {len(self._ordered)} strength categories")
+
+    @staticmethod
+    def _profile_offset(data: Optional[WorkoutRequest]) -> int:
+        """Stable per-profile rotation so look-alike users don't all get identical options."""
+        if data is None:
+            return 0
+        profile = f"{data.age}|{data.gender}|{data.height}|{data.weight}|{data.goal}|{data.fitnessLevel}"
+        return zlib.crc32(profile.encode("utf-8"))
+
+    @staticmethod
+    def _level(data: Optional[WorkoutRequest]) -> str:
+        level = data.fitnessLevel if data is not None else "Intermediate"
+        return level if level in SETS_REPS else "Intermediate"
+
+    @staticmethod
+    def _movement(title: str) -> str:
+        """Movement pattern of an exercise, e.g. "Dumbbell Bench Press" -> "press"."""
+        return title.split()[-1].lower().rstrip("s")
+
+    def generate(self, data: Optional[WorkoutRequest], category: str) -> dict:
+        """Three options for a category, shaped like the LLM result."""
+        started = time.perf_counter()
+        if category == "Cardio":
+            options = self.cardio_options(data)
+        else:
+            options = []
+            used: Set[str] = set()
+            for option_index in range(len(OPTION_INTENTS)):
+                option = self.strength_option(category, option_index, data, used)
+                used.update(exercise["workout"] for exercise in option)
+                options.append(option)
+        RULES_SECONDS.observe(time.perf_counter() - started, category=category)
+        return {"options": options, "category": category}
+
+    def strength_option(self, category: str, option_index: int, data: Optional[WorkoutRequest] = None,
+                        exclude: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """
+        One strength option with balanced muscle groups.
+
+        Exercises already used by other options are avoided when the category
+        has enough of them, and no two exercises in an option share a movement.
+        """
+        intent = OPTION_INTENTS[option_index % len(OPTION_INTENTS)]
+        count = OPTION_SIZES[option_index % len(OPTION_SIZES)]
+        ordered = self._ordered.get(category) or self._ordered.get("Full Body") or {}
+        titles = ordered.get(intent, [])
+        if not titles:
+            return []
+
+        #rotate within the most relevant window, the rest only tops up small categories
+        window = titles[:count * WINDOW_FACTOR]
+        offset = (self._profile_offset(data) + option_index) % len(window)
+        rotated = window[offset:] + window[:offset] + titles[len(window):]
+        exclude = exclude or set()
+
+        picked: List[str] = []
+        movements: Set[str] = set()
+        #relax the constraints one at a time when the category is too small
+        for skip_used, distinct_movement in ((True, True), (False, True), (False, False)):
+            for title in rotated:
+                if len(picked) >= count:
+                    break
+                if title in picked or (skip_used and title in exclude):
+                    continue
+                if distinct_movement and self._movement(title) in movements:
+                    continue
+                picked.append(title)
+                movements.add(self._movement(title))
+
+        return [self._strength_exercise(title, intent, data) for title in picked]
+
+    def _strength_exercise(self, title: str, intent: str, data: Optional[WorkoutRequest]) -> Dict[str, Any]:
+        level = self._level(data)
+        sets, reps = SETS_REPS[level][intent]
+        if any(keyword in title.lower() for keyword in HOLD_KEYWORDS):
+            reps = HOLD_SECONDS[level]
+        elif data is not None and "Weight Loss" in data.goal and intent != "challenging":
+            reps = WEIGHT_LOSS_REPS[level]
+        return {
+            "workout": title,
+            "image": self._icons.get(title) or self.exercise_db.get_exercise_icon(title),
+            "sets": sets,
+            "reps": reps,
+            "instruction": ""
+        }
+
+    def cardio_options(self, data: Optional[WorkoutRequest] = None) -> List[List[Dict[str, Any]]]:
+        """One cardio option per tier, sized to the user's level; calories use the body weight."""
+        options = []
+        used: Set[str] = set()
+        for tier_index in range(len(CARDIO_TIERS)):
+            option = self._cardio_option(tier_index, data, used)
+            if option:
+                used.add(option[0]["workout"])
+                options.append(option)
+        return calorie_estimator.annotate(options, data.weight if data is not None else None)
+
+    def cardio_option(self, tier_index: int, data: Optional[WorkoutRequest] = None,
+                      exclude: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """The cardio option of one tier, avoiding the movements of excluded activities."""
+        option = self._cardio_option(tier_index, data, exclude)
+        calorie_estimator.annotate([option], data.weight if data is not None else None)
+        return option
+
+    def _cardio_option(self, tier_index: int, data: Optional[WorkoutRequest],
+                       exclude: Optional[Set[str]]) -> List[Dict[str, Any]]:
+        """A cardio option without its calories, which are estimated per batch."""
+        level = self._level(data)
+        settings = CARDIO_LEVELS[level]
+        tier_index %= len(CARDIO_TIERS)
+
+        #no two options with the same movement (outdoor and treadmill running)
+        movements = {self._movement(title) for title in (exclude or set())}
+        titles = [title for title in CARDIO_TIERS[tier_index]
+                  if title in self.cardio and self._movement(title) not in movements]
+        if not titles:
+            return []
+        title = titles[(self._profile_offset(data) + tier_index) % len(titles)]
+        return [{
+            "workout": title,
+            "image": f"/workout-images/cardio/{self.cardio[title]['Image']}",
+            "duration": f"{settings['minutes']} min",
+            "intensity": settings["intensity"],
+            "format": CARDIO_FORMATS[level][tier_index],
+            "calories": "",
+            "description": CARDIO_DESCRIPTIONS[tier_index].format(title=title),
+            "is_cardio": True
+        }]
+
+    def option(self, category: str, option_index: int, data: Optional[WorkoutRequest] = None,
+               exclude: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """A single option of a category, e.g. to replace one the user did not like."""
+        if category == "Cardio":
+            return self.cardio_option(option_index, data, exclude)
+        return self.strength_option(category, option_index, data, exclude)
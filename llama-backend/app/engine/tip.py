@@ -1,16 +1,174 @@
-import ollama
+import asyncio
 import logging
 import random
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator
 import json
 import traceback
+from app.utils import llm_telemetry
+from app.utils.llm_client import llm_client
+from app.utils.llm_scheduler import LLMUnavailableError
+from app.utils.metrics import metrics
+from app.utils.deadline import Deadline, DeadlineExceeded, within_deadline, record_exceeded
+
+logger = logging.getLogger(__name__)
+
+TIP_SYSTEM_PROMPT = "You are a professional fitness and nutrition coach who provides concise, highly personalized, and actionable tips. Your tips are extremely playful, witty, encouraging, and engaging while still being scientifically sound. You include specific details that make users feel the tip was made just for them. You use wordplay, fun metaphors, and occasional emoji for emphasis."
+
+# Static-first prompt layout: the shared instructions, then the focus area's instructions,
+# then the user profile. Everything before the profile is identical across users of the
+# same focus area, so Ollama can reuse its cached prefix.
+TIP_PROMPT_PREFIX = """Create a SHORT, HIGHLY PERSONALIZED, and PLAYFUL fitness/nutrition tip for the user described in the USER PROFILE at the end.
+
+IMPORTANT: The tip should be ONE sentence or very short paragraph, conversational in tone, and feel like it was made SPECIFICALLY for this unique user. 
+    Make them feel like you really know their situation. Do not include any emojis or special characters in the tip text.
+
+Only return the tip text, with no additional explanations or content .
+"""
+
+TIP_CATEGORY_INSTRUCTIONS = {
+    "nutrition": """
+Focus area: Nutrition
+
+Create a SINGLE nutrition tip that is:
+1. SUPER personalized to their exact situation and meals
+2. Very playful and witty - use wordplay or a fun metaphor
+3. Specifically tailored to their fitness goal
+4. Include a specific food suggestion or meal timing recommendation
+5. Under 150 characters and punchy
+""",
+    "workout": """
+Focus area: Workout
+
+Create a SINGLE workout tip that is:
+1. HIGHLY specific to their current workout frequency and fitness level
+2. Very playful, witty, and motivating - use creative language or metaphors
+3. Tailored for how many days per week they work out
+4. Mention a specific exercise or technique relevant to their fitness level
+5. Under 150 characters and punchy
+""",
+    "motivation": """
+Focus area: Motivation
+
+Create an uplifting and motivational tip that:
+1. Feels written SPECIFICALLY for them and their fitness goal
+2. Uses wordplay, a fun metaphor or analogy
+3. Is extremely positive, playful and encouraging
+4. Mentions something unique about their workout routine or diet
+5. Under 150 characters and punchy
+""",
+    "recovery": """
+Focus area: Recovery
+
+Create a recovery tip that:
+1. Is HIGHLY personalized for the number of workouts they do per week
+2. Is extremely playful and uses a fun metaphor or wordplay
+3. Offers a specific recovery technique appropriate for their fitness level
+4. Includes a common household item they might use for recovery
+5. Under 150 characters and punchy
+""",
+    "habit": """
+Focus area: Habit
+
+Create a habit-building tip that:
+1. Is SUPER specific to their fitness goal
+2. Is extremely playful with witty wordplay or a clever metaphor
+3. Suggests a very specific micro-habit they could implement
+4. Ties the habit explicitly to their fitness goal
+5. Under 120 characters and punchy
+""",
+    "hydration": """
+Focus area: Hydration
+
+Create a hydration tip that:
+1. Is personally tailored to the number of workouts they do per week
+2. Is extremely playful, with water-related wordplay or puns
+3. Gives a specific, actionable hydration suggestion
+4. Mentions how proper hydration specifically helps with their fitness goal
+5. Under 150 characters and punchy
+""",
+}
+
+TIP_FIRST_TOKEN_SECONDS = metrics.histogram(
+    "tip_stream_first_token_seconds",
+    "Time from a streaming tip request to the first tip text sent to the client",
+    ["category"]
+)
+
+
+class TipStreamProcessor:
+    """
+    Applies the TipEngine._process_tip cleanup to a token stream.
+
+    Leading quotes are dropped, text after the first paragraph break is cut,
+    and text past the second sentence is held back until it is clear whether
+    the tip stays under MAX_LENGTH (keep it) or not (stop after two sentences).
+    """
+
+    MAX_LENGTH = 200
+    MAX_SENTENCES = 2
+    STRIP_CHARS = "\"' \n\t"
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self._emitted = 0
+
+    def feed(self, token: str) -> str:
+        """Add the next token and return the text that is safe to send now."""
+        if self.done:
+            return ""
+        if not self.text:
+            token = token.lstrip(self.STRIP_CHARS)
+        self.text += token
+
+        # Only the first paragraph is kept
+        paragraph_end = self.text.find("\n\n")
+        if paragraph_end != -1:
+            self.text = self.text[:paragraph_end]
+            return self.finish()
+
+        boundary = self._sentence_boundary()
+        if boundary != -1 and len(self.text) > self.MAX_LENGTH:
+            self.text = self.text[:boundary]
+            return self.finish()
+
+        # Hold back possible closing quotes/whitespace and anything past the second sentence
+        limit = len(self.text.rstrip(self.STRIP_CHARS))
+        if boundary != -1:
+            limit = min(limit, boundary)
+        return self._emit(limit)
+
+    def finish(self) -> str:
+        """Flush the remaining text once the stream has ended or been cut."""
+        if not self.done:
+            self.done = True
+            if len(self.text) > self.MAX_LENGTH:
+                boundary = self._sentence_boundary()
+                if boundary != -1:
+                    self.text = self.text[:boundary]
+            self.text = self.text.rstrip(self.STRIP_CHARS)
+            if len(self.text) > self.MAX_LENGTH and not self.text.endswith("."):
+                self.text += "."
+        return self._emit(len(self.text))
+
+    def _sentence_boundary(self) -> int:
+        """Index just past the period ending the second sentence, or -1."""
+        position = -1
+        for _ in range(self.MAX_SENTENCES):
+            position = self.text.find(". ", position + 1)
+            if position == -1:
+                return -1
+        return position + 1
+
+    def _emit(self, limit: int) -> str:
+        if limit <= self._emitted:
+            return ""
+        chunk = self.text[self._emitted:limit]
+        self._emitted = limit
+        return chunk
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, 
-                   format='%(asctime)s [%(levelname)s] - %(message)s',
-                   datefmt='%Y-%m-%d %H:%M:%S')
-logger = logging.getLogger("tip_engine")
 
 class TipEngine:
     """Engine for generating personalized fitness and nutrition tips using LLaMA."""
@@ -26,7 +184,8 @@ class TipEngine:
             "hydration": "water_drop"
         }
         
-    async def generate_personalized_tip(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def generate_personalized_tip(self, user_data: Dict[str, Any],
+                                        deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Generate a personalized tip based on user data."""
         try:
             # Print debug info about the user data
@@ -63,7 +222,7 @@ class TipEngine:
             # Generate the tip using LLaMA
             tip = await self._generate_tip_with_llama(
                 category, goal, gender, fitness_level, workout_days, 
-                recent_workouts, food_logs, calorie_percentage
+                recent_workouts, food_logs, calorie_percentage, deadline
             )
             
             logger.info(f"DEBUG: Generated tip: {tip}")
@@ -85,6 +244,100 @@ class TipEngine:
             # Return a fallback tip if anything fails
             return self._get_fallback_tip()
     
+    async def stream_personalized_tip(self, user_data: Dict[str, Any],
+                                      deadline: Optional[Deadline] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a personalized tip: a "meta" event with category and icon first,
+        then "token" events with cleaned-up tip text as it is generated, and a
+        final "done" event carrying the complete tip.
+        
+        When the deadline runs out the generation is stopped and the tip ends
+        with what was streamed so far, or the fallback tip if nothing was.
+        """
+        started = time.perf_counter()
+        goal = user_data.get('goal', 'Improve Fitness')
+        workout_days = user_data.get('workoutDays', 3)
+        recent_workouts = user_data.get('recentWorkouts', [])
+        food_logs = user_data.get('foodLogs', [])
+        calorie_percentage = user_data.get('caloriePercentage', 0.0)
+        
+        category = random.choice(self._determine_focus_categories(
+            goal, workout_days, recent_workouts, food_logs, calorie_percentage
+        ))
+        yield {
+            "event": "meta",
+            "category": category,
+            "icon": self.tip_categories.get(category, "tips_and_updates"),
+            "generated_at": datetime.now().isoformat()
+        }
+        
+        processor = TipStreamProcessor()
+        first_token_sent = False
+        try:
+            prompt = self._create_tip_prompt(
+                category, goal, user_data.get('gender', 'Unspecified'),
+                user_data.get('fitnessLevel', 'Intermediate'), workout_days,
+                recent_workouts, food_logs, calorie_percentage
+            )
+            
+            logger.info(f"Streaming {category} tip from LLaMA")
+            stream = llm_client.chat_stream_for_task(
+                "tip",
+                messages=[
+                    {"role": "system", "content": TIP_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                label=category
+            )
+            model = ""
+            chunks = stream.__aiter__()
+            try:
+                while True:
+                    try:
+                        if deadline is None:
+                            chunk = await chunks.__anext__()
+                        else:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=deadline.timeout())
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        record_exceeded("tip_stream")
+                        break
+                    model = chunk.get("model") or model
+                    text = processor.feed(chunk['message']['content'])
+                    if text:
+                        if not first_token_sent:
+                            TIP_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started, category=category)
+                            first_token_sent = True
+                        yield {"event": "token", "text": text}
+                    if processor.done:
+                        break
+            finally:
+                # Stops the generation once the tip has been cut or the budget is spent
+                await stream.aclose()
+            llm_telemetry.record_parse(
+                "structured" if processor.text else "failed", "tip", label=category, model=model
+            )
+                
+        except LLMUnavailableError as e:
+            logger.warning(f"LLaMA unavailable for streamed {category} tip ({str(e)}), using fallback tip")
+        except Exception as e:
+            logger.error(f"Error streaming tip with LLaMA: {str(e)}")
+            logger.error(traceback.format_exc())
+        
+        text = processor.finish()
+        if text:
+            yield {"event": "token", "text": text}
+        
+        tip = processor.text
+        if not tip:
+            # Nothing was sent yet, so the fallback can still replace the whole tip
+            tip = self._get_fallback_tip()["tip"]
+            yield {"event": "token", "text": tip}
+        
+        logger.info(f"Streamed {category} tip for user with goal: {goal}")
+        yield {"event": "done", "tip": tip, "category": category}
+    
     def _determine_focus_categories(
         self, goal: str, workout_days: int, 
         recent_workouts: List[Dict[str, Any]], food_logs: List[Dict[str, Any]],
@@ -126,7 +379,8 @@ class TipEngine:
     async def _generate_tip_with_llama(
         self, category: str, goal: str, gender: str, fitness_level: str,
         workout_days: int, recent_workouts: List[Dict[str, Any]], 
-        food_logs: List[Dict[str, Any]], calorie_percentage: float
+        food_logs: List[Dict[str, Any]], calorie_percentage: float,
+        deadline: Optional[Deadline] = None
     ) -> str:
         """Generate a tip using LLaMA based on user context."""
         try:
@@ -141,16 +395,16 @@ class TipEngine:
             
             # Call LLaMA model
             logger.info(f"Requesting {category} tip from LLaMA")
-            response = ollama.chat(
-                model="llama3.2",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a professional fitness and nutrition coach who provides concise, highly personalized, and actionable tips. Your tips are extremely playful, witty, encouraging, and engaging while still being scientifically sound. You include specific details that make users feel the tip was made just for them. You use wordplay, fun metaphors, and occasional emoji for emphasis."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                options={"temperature": 0.8}  # Slightly higher temperature for more creative tips
+            response = await within_deadline(
+                llm_client.chat_for_task(
+                    "tip",  # Small, more creative model profile for short tips
+                    messages=[
+                        {"role": "system", "content": TIP_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    label=category
+                ),
+                deadline, "tip_llm"
             )
             
             # Extract the content
@@ -159,9 +413,17 @@ class TipEngine:
             
             # Ensure the tip isn't too long (aim for a single sentence or short paragraph)
             tip = self._process_tip(content)
+            if not tip:
+                outcome = "failed"
+            else:
+                outcome = "structured" if tip == content else "repaired"
+            llm_telemetry.record_parse(outcome, "tip", label=category, model=response.get("model") or "")
             
             return tip
             
+        except (LLMUnavailableError, DeadlineExceeded) as e:
+            logger.warning(f"LLaMA unavailable for {category} tip ({str(e)}), using fallback tip")
+            return self._get_fallback_tip()["tip"]
         except Exception as e:
             logger.error(f"Error generating tip with LLaMA: {str(e)}")
             logger.error(traceback.format_exc())
@@ -191,11 +453,13 @@ class TipEngine:
             if 'carbs' in food and food['carbs'] > 40:
                 high_carb = True
         
-        # Base prompt with category and user profile
-        prompt = f"""Create a SHORT, HIGHLY PERSONALIZED, and PLAYFUL fitness/nutrition tip for a {gender} with a fitness goal of '{goal}' who works out {workout_days} days per week and is at a {fitness_level} fitness level.
-
-Focus area: {category.capitalize()}
-
+        # Static prefix first, then the user profile
+        prompt = TIP_PROMPT_PREFIX + TIP_CATEGORY_INSTRUCTIONS.get(category, "") + f"""
+USER PROFILE:
+- Gender: {gender}
+- Fitness goal: {goal}
+- Workouts per week: {workout_days}
+- Fitness level: {fitness_level}
 """
         # Add more specific details to increase personalization
         if workout_types:
@@ -220,76 +484,10 @@ Focus area: {category.capitalize()}
         
         # Add context based on category
         if category == "nutrition":
-            prompt += f"""
-The user has logged {len(food_logs)} meals today and has consumed approximately {calorie_percentage:.0%} of their daily calorie goal.
-
-Create a SINGLE nutrition tip that is:
-1. SUPER personalized to their exact situation and meals
-2. Very playful and witty - use wordplay or a fun metaphor
-3. Specifically tailored to their goal of {goal}
-4. Include a specific food suggestion or meal timing recommendation
-5. Under 150 characters and punchy
-"""
-            
+            prompt += f"They have logged {len(food_logs)} meals today and have consumed approximately {calorie_percentage:.0%} of their daily calorie goal. "
         elif category == "workout":
             workout_context = "No recent workouts" if not recent_workouts else f"{len(recent_workouts)} recent workouts"
-            prompt += f"""
-The user has {workout_context}.
-
-Create a SINGLE workout tip that is:
-1. HIGHLY specific to their current workout frequency and fitness level
-2. Very playful, witty, and motivating - use creative language or metaphors
-3. Tailored for someone who works out {workout_days} days/week
-4. Mention a specific exercise or technique relevant to their {fitness_level} level
-5. Under 150 characters and punchy
-"""
-            
-        elif category == "motivation":
-            prompt += f"""
-Create an uplifting and motivational tip that:
-1. Feels written SPECIFICALLY for them and their {goal} goal
-2. Uses wordplay, a fun metaphor or analogy
-3. Is extremely positive, playful and encouraging
-4. Mentions something unique about their workout routine or diet
-5. Under 150 characters and punchy
-"""
-            
-        elif category == "recovery":
-            prompt += f"""
-Create a recovery tip that:
-1. Is HIGHLY personalized for someone doing {workout_days} workouts per week
-2. Is extremely playful and uses a fun metaphor or wordplay
-3. Offers a specific recovery technique appropriate for their {fitness_level} level
-4. Includes a common household item they might use for recovery
-5. Under 150 characters and punchy
-"""
-            
-        elif category == "habit":
-            prompt += f"""
-Create a habit-building tip that:
-1. Is SUPER specific to their {goal} goal
-2. Is extremely playful with witty wordplay or a clever metaphor
-3. Suggests a very specific micro-habit they could implement
-4. Ties the habit explicitly to their {goal} goal
-5. Under 120 characters and punchy
-"""
-            
-        elif category == "hydration":
-            prompt += f"""
-Create a hydration tip that:
-1. Is personally tailored to their {workout_days} workouts per week
-2. Is extremely playful, with water-related wordplay or puns
-3. Gives a specific, actionable hydration suggestion
-4. Mentions how proper hydration specifically helps with their {goal} goal
-5. Under 150 characters and punchy
-"""
-        
-        # Final instructions
-        prompt += """
-IMPORTANT: The tip should be ONE sentence or very short paragraph, conversational in tone, and feel like it was made SPECIFICALLY for this unique user. 
-    Make them feel like you really know their situation. Do not include any emojis or special characters in the tip text.
-
-Only return the tip text, with no additional explanations or content ."""
+            prompt += f"They have {workout_context}. "
         
         return prompt
     
@@ -1,29 +1,277 @@
-import ollama
+import os
 import json
-import pandas as pd
+import asyncio
 import random
 import re
+import time
 import logging
-from typing import Optional, List, Dict, Any
-from app.models.schemas import WorkoutRequest, WorkoutResponse, Exercise
+from typing import Optional, List, Dict, Any, AsyncIterator, Mapping, Sequence, Set
+from app.models.schemas import WorkoutRequest, WorkoutResponse, Exercise, StrengthOptionsOutput, CardioOptionsOutput
 from app.utils.exercise_db import ExerciseDatabase
+from app.utils.exercise_catalog import ExerciseCatalog, CATEGORY_BODY_PARTS, DEFAULT_CSV_PATH, DEFAULT_IMAGE_DIRS
+from app.utils.catalog_reloader import CatalogReloader, ImageManifest
+from app.utils.exercise_index import ExerciseIndex, SHORTLIST_SIZE
+from app.engine.rule_based_workout import RuleBasedWorkoutGenerator, OPTION_INTENTS, OPTION_SIZES
 from app.utils.cardio_image_mapper import CardioImageMapper
+from app.utils.calorie_estimator import calorie_estimator
+from app.utils.llm_client import llm_client
+from app.utils.llm_scheduler import LLMUnavailableError
+from app.utils.workout_cache import WorkoutOptionsCache, WeeklyPlanCache
+from app.utils.single_flight import SingleFlight
+from app.utils import structured_output
+from app.utils.incremental_json import IncrementalArrayParser
+from app.utils.metrics import metrics
+from app.utils.deadline import Deadline, DeadlineExceeded, within_deadline, record_exceeded
 
 
-#conf logging
-logging.basicConfig(level=logging.INFO, 
-                   format='%(asctime)s [%(levelname)s] - %(message)s',
-                   datefmt='%Y-%m-%d %H:%M:%S')
-logger = logging.getLogger("workout_engine")
+logger = logging.getLogger(__name__)
+
+FIRST_OPTION_SECONDS = metrics.histogram(
+    "workout_stream_first_option_seconds",
+    "Time from a streaming request to its first workout option",
+    ["category"]
+)
+
+#"llm" always asks the LLM, "rules" always uses the rule-based generator,
+#"auto" uses the rules only while the LLM scheduler is saturated
+WORKOUT_MODE = os.getenv("WORKOUT_MODE", "auto").lower()
+
+WORKOUT_SOURCE_TOTAL = metrics.counter(
+    "workout_options_source_total", "Where workout options were served from", ["source"]
+)
+OPTION_REGENERATIONS_TOTAL = metrics.counter(
+    "workout_option_regenerations_total", "Single workout options regenerated on request", ["source"]
+)
+WEEKLY_PLAN_SECONDS = metrics.histogram(
+    "workout_weekly_plan_seconds", "Time to build a whole weekly plan", ["days"]
+)
 
 #cardio image mapper foor common cardio exercises
 CARDIO_EXERCISES = CardioImageMapper.get_available_cardio_exercises()
 
+#system prompts shared by the blocking and streaming generation paths
+CARDIO_SYSTEM_PROMPT = "You are a professional fitness coach that returns only valid JSON. You must put ALL values in double quotes, including numbers. Format exactly as requested. Return ONLY the JSON with no explanation or markdown. Be creative and suggest ANY cardio workout that would benefit the user. VERY IMPORTANT: For each exercise, you must select the most appropriate image filename from the provided list."
+STRENGTH_SYSTEM_PROMPT = "You are a fitness API that returns only valid JSON. You must put ALL values in double quotes, including numbers. Format exactly as requested. Return ONLY the JSON with no explanation or markdown."
+
+#prompt templates are static-first: instructions, exercise lists and the output format come
+#before anything user specific, so ollama can reuse the cached prefix across users
+CARDIO_PROMPT_TEMPLATE = """You are a professional fitness coach. Create EXACTLY 3 different creative cardio workout options for the user described in the USER PROFILE at the end.
+
+    INSTRUCTIONS:
+    1. You can create ANY cardio exercise - not limited to this list: {cardio_examples}
+    2. Each option should have one cardio exercise with detailed parameters.
+    3. Tailor the intensity, duration, and format to match the exercise and the user's fitness level and goals.
+    4. make sure they are realistic
+    5. For the "image" parameter, choose the most appropriate image for your exercise choice from the list below
+    
+    IMPORTANT: For each exercise, assign the MOST APPROPRIATE image from this list:
+    - "treadmill.webp"
+    - "running.webp"
+    - "walking.webp" 
+    - "bicycle.webp"
+    - "exercise-bike.webp"
+    - "jumping-rope.webp"
+    - "swimming.webp"
+    - "hiking.webp"
+    - "rowing.jpg"
+    - "climbing-stairs.jpg"
+    - "basketball.jpg"
+    - "football.jpg"
+    - "tennis.jpg"
+    - "volleyball.jpg"
+    - "squash.jpg"
+    - "yoga.jpg"
+    - "cardio.webp"
+
+    For each cardio workout, provide:
+    - Exercise name (be specific and creative)
+    - Image (choose exactly one image from the list above that best matches the exercise)
+    - Duration (like "30 min")
+    - Intensity (like "Moderate" or "High-intensity" two words max.)
+    - Format (like "30 sec work/30 sec rest" or "Steady-state")
+    - A brief description of how to perform the workout
+
+    Return ONLY in this exact JSON format (EVERYTHING in QUOTES, including numbers). Don't add any more information or markdown, change the values based on the exercise you chose:
+    {{
+    "options": [
+        [
+        {{
+            "workout": "Cardio Exercise 1", 
+            "image": "running.webp", 
+            "duration": "30 min", 
+            "intensity": "Moderate", 
+            "format": "Steady-state", 
+            "description": "Brief description with specific instructions"
+        }}
+        ],
+        [
+        {{
+            "workout": "Cardio Exercise 2", 
+            "image": "cardio.webp", 
+            "duration": "25 min", 
+            "intensity": "High", 
+            "format": "Intervals (30s/30s)", 
+            "description": "Brief description with specific instructions"
+        }}
+        ],
+        [
+        {{
+            "workout": "Cardio Exercise 3", 
+            "image": "swimming.webp",
+            "duration": "45 min", 
+            "intensity": "Low", 
+            "format": "Steady-state", 
+            "description": "Brief description with specific instructions"
+        }}
+        ]
+    ]
+    }}
+IMPORTANT: EVERY value MUST be in QUOTES. No bare numbers. FOLLOW INSTRUCTIONS CAREFULLY OR YOUR RESPONSE IS INVALID.
+"""
+
+STRENGTH_PROMPT_TEMPLATE = """Create EXACTLY 3 different {category} workout options for the user described in the USER PROFILE at the end.
+
+INSTRUCTIONS:
+
+1. OPTION 1: Create a challenging workout with EXACTLY 4 different exercises from this list ONLY: {challenging_list}
+   - This should be the most intense option
+   - Use EXACTLY the same name as the exercises from the list
+
+2. OPTION 2: Create a moderate workout with EXACTLY 5 different exercises from this list: {moderate_list}
+   - This should be less intense
+
+3. OPTION 3: Create a HOME-FRIENDLY workout with EXACTLY 4 different exercises from this list: {home_list}
+   - Select ONLY bodyweight exercises or dumbbell exercises
+   - No gym machines or barbells or specialized equipment should be included unless there is no other option
+
+NOTE: ALL OPTIONS MUST BE DIFFERENT in at least 2 exercises and ALL exercises must come from the option's list!!
+
+For each exercise, add appropriate sets and reps:
+- You can use any format: single numbers (e.g. "10"), ranges (e.g. "8-12"), or time-based (e.g. "30s") depending on the exercise
+- Adjust sets and reps based on exercise difficulty and the user's fitness level
+- Target different muscles within {category} for a balanced workout. DO NOT use two exercises for the same muscle group in one option.
+
+Return ONLY in this exact JSON format same placement of braces and commas (EVERYTHING in QUOTES, including numbers). Don't add any more information or markdown:
+{{
+  "options": [
+    [
+      {{ "workout": "Exercise 1", "sets": "3", "reps": "10-12" }},
+      {{ "workout": "Exercise 2", "sets": "4", "reps": "8" }},
+      {{ "workout": "Exercise 3", "sets": "3", "reps": "10" }},
+      {{ "workout": "Exercise 4", "sets": "3", "reps": "12" }}
+    ],
+    [
+      {{ "workout": "Exercise 1", "sets": "3", "reps": "12" }},
+      {{ "workout": "Exercise 2", "sets": "3", "reps": "10" }},
+      {{ "workout": "Exercise 3", "sets": "3", "reps": "15" }},
+      {{ "workout": "Exercise 4", "sets": "2", "reps": "30s" }},
+      {{ "workout": "Exercise 5", "sets": "3", "reps": "10" }}
+    ],
+    [
+      {{ "workout": "Exercise 1", "sets": "3", "reps": "10-12" }}, // Home-friendly
+      {{ "workout": "Exercise 2", "sets": "4", "reps": "8" }},// Home-friendly
+      {{ "workout": "Exercise 3", "sets": "3", "reps": "12" }},// Home-friendly
+      {{ "workout": "Exercise 4", "sets": "3", "reps": "15" }}// Home-friendly
+    ]
+  ]
+}}
+IMPORTANT: Make sure to put ALL values in quotes and format exactly as shown above.  NO EXPLANATION AND MATCH FORMAT EXACTLY! OTHERWISE RESPONSE IS INVALID!
+"""
+
+#single-option prompts used to replace one option the user did not like
+OPTION_BRIEFS = [
+    "a challenging workout, the most intense option",
+    "a moderate, less intense workout",
+    "a HOME-FRIENDLY workout with ONLY bodyweight or dumbbell exercises",
+]
+
+STRENGTH_OPTION_PROMPT_TEMPLATE = """Create ONE {category} workout option for the user described in the USER PROFILE at the end: {brief}.
+
+INSTRUCTIONS:
+1. Use EXACTLY {count} different exercises from this list ONLY, with EXACTLY the same names: {exercise_list}
+2. Add sets and reps for the user's fitness level ("10", "8-12" or "30s").
+3. Target different muscles within {category}. DO NOT use two exercises for the same muscle group.
+
+Return ONLY this JSON with {count} exercises (EVERYTHING in QUOTES, including numbers), no explanation or markdown:
+{{ "options": [ [ {{ "workout": "Exercise 1", "sets": "3", "reps": "10-12" }}, {{ "workout": "Exercise 2", "sets": "4", "reps": "8" }} ] ] }}
+"""
+
+CARDIO_OPTION_PROMPT_TEMPLATE = """Create ONE creative cardio workout option for the user described in the USER PROFILE at the end.
+
+INSTRUCTIONS:
+1. Suggest ANY realistic cardio exercise EXCEPT these ones: {excluded}
+2. Tailor duration, intensity and format to the user's fitness level and goal.
+3. For "image" choose the best match from: {images}
+
+Return ONLY this JSON (EVERYTHING in QUOTES, including numbers), no explanation or markdown:
+{{ "options": [ [ {{ "workout": "Cardio Exercise", "image": "running.webp", "duration": "30 min", "intensity": "Moderate", "format": "Steady-state", "description": "Brief description with specific instructions" }} ] ] }}
+"""
+
+#the only per-user part of a workout prompt, always appended last
+USER_PROFILE_TEMPLATE = """
+USER PROFILE:
+- Age: {age}
+- Gender: {gender}
+- Height: {height}cm
+- Weight: {weight}kg
+- Fitness level: {fitness_level}
+- Goal: {goal}"""
+
+#cardio prefix never changes, so build it once
+CARDIO_PROMPT_PREFIX = CARDIO_PROMPT_TEMPLATE.format(
+    cardio_examples=", ".join(ex["Title"] for ex in CARDIO_EXERCISES)
+)
+
+
+def user_profile_block(data: WorkoutRequest) -> str:
+    """User-specific tail of a workout prompt."""
+    return USER_PROFILE_TEMPLATE.format(
+        age=data.age, gender=data.gender, height=data.height, weight=data.weight,
+        fitness_level=data.fitnessLevel, goal=data.goal
+    )
+
+
+class WorkoutSnapshot:
+    """One version of the catalog files and everything the engine derives from them; never modified."""
+
+    def __init__(self, version: int, catalog: ExerciseCatalog, images: ImageManifest, exercise_db: ExerciseDatabase,
+                 exercise_categories: Dict[str, List[Dict[str, str]]], exercise_index: ExerciseIndex,
+                 rule_generator: RuleBasedWorkoutGenerator):
+        self.version = version
+        self.catalog = catalog
+        self.images = images
+        self.exercise_db = exercise_db
+        self.exercise_categories = exercise_categories
+        self.exercise_index = exercise_index
+        self.rule_generator = rule_generator
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "exercises": len(self.catalog),
+            "images": self.images.counts(),
+            #catalog rows whose image or icon file is not there (yet)
+            "missing_images": sum(1 for record in self.catalog.records if not self.images.has("images", record["Image"])),
+            "missing_icons": sum(1 for record in self.catalog.records if not self.images.has("icons", record["Icon"])),
+        }
+
+
 class WorkoutEngine:
-    def __init__(self):
-        self.exercise_db = ExerciseDatabase()
+    def __init__(self, csv_path: str = DEFAULT_CSV_PATH):
+        #catalog, image manifest and derived indexes as one snapshot, rebuilt when the files change;
+        #requests pin the snapshot they started with (see CatalogReloader)
+        self.csv_path = csv_path
+        self.snapshots: CatalogReloader[WorkoutSnapshot] = CatalogReloader(
+            "workout_catalog", self._build_snapshot, [csv_path, *DEFAULT_IMAGE_DIRS.values()]
+        )
         #image mapper for cardio exercises
         self.cardio_mapper = CardioImageMapper()
+        #cache of generated options per profile bucket
+        self.options_cache = WorkoutOptionsCache()
+        #weekly plans per exact profile, served to the daily requests
+        self.plan_cache = WeeklyPlanCache()
+        #concurrent requests for the same bucket share one generation
+        self._inflight = SingleFlight("workout_options", copy_result=True)
         
         #map workout plans based on users goals and workout frequency
         self.workout_plans = {
@@ -54,38 +302,49 @@ class WorkoutEngine:
         }
         
         #map workout categories to body parts
-        self.category_mapping = {
-            "Push": ["Chest", "Shoulders", "Triceps"],
-            "Pull": ["Back", "Biceps"],
-            "Legs": ["Legs"],
-            "Upper Body": ["Chest", "Back", "Shoulders", "Biceps", "Triceps"],
-            "Lower Body": ["Legs"],
-            "Full Body": ["Chest", "Back", "Shoulders", "Biceps", "Triceps", "Legs", "Abdominals"],
-            "Core": ["Abdominals"],
-            "Cardio": ["Cardio"]
-        }
-        
-        #load and prep exercise database
-        try:
-            self.df = pd.read_csv('data/exercises.csv')
-            self.exercise_categories = self._prepare_exercise_categories()
-            logger.info("Exercise database loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading exercise database: {e}")
-            self.df = pd.DataFrame()
-            self.exercise_categories = {}
+        self.category_mapping = CATEGORY_BODY_PARTS
 
-    def _prepare_exercise_categories(self) -> Dict[str, List[Dict[str, str]]]:
+    def _build_snapshot(self, version: int) -> WorkoutSnapshot:
+        """Parse the catalog files and build every derived index for one snapshot version."""
+        #read-only catalog, parsed once for the database and the engine
+        catalog = ExerciseCatalog.from_csv(self.csv_path)
+        exercise_db = ExerciseDatabase(catalog=catalog)
+        #prep exercises by category
+        exercise_categories = self._prepare_exercise_categories(catalog)
+        #retrieval index used to shortlist exercises for strength prompts
+        exercise_index = ExerciseIndex(list(catalog.records))
+        #zero-llm fast path, also used for every fallback
+        rule_generator = RuleBasedWorkoutGenerator(exercise_index, exercise_db, exercise_categories, CARDIO_EXERCISES)
+        logger.info(f"Built workout catalog snapshot {version}: {len(catalog)} exercises")
+        return WorkoutSnapshot(version, catalog, ImageManifest(DEFAULT_IMAGE_DIRS), exercise_db,
+                               exercise_categories, exercise_index, rule_generator)
+
+    #the parts of the snapshot this context is pinned to
+    @property
+    def catalog(self) -> ExerciseCatalog:
+        return self.snapshots.current.catalog
+
+    @property
+    def exercise_db(self) -> ExerciseDatabase:
+        return self.snapshots.current.exercise_db
+
+    @property
+    def exercise_categories(self) -> Dict[str, List[Dict[str, str]]]:
+        return self.snapshots.current.exercise_categories
+
+    @property
+    def exercise_index(self) -> ExerciseIndex:
+        return self.snapshots.current.exercise_index
+
+    @property
+    def rule_generator(self) -> RuleBasedWorkoutGenerator:
+        return self.snapshots.current.rule_generator
+
+    def _prepare_exercise_categories(self, catalog: ExerciseCatalog) -> Dict[str, List[Dict[str, str]]]:
         """Prepare exercise database for organizing exercises by category."""
         try:
-            organized_exercises = {}
-            
-            #prep strength exercises by category
-            for category, body_parts in self.category_mapping.items():
-                if category != "Cardio":  
-                    exercises = self.df[self.df['BodyPart'].isin(body_parts)].to_dict('records')
-                    organized_exercises[category] = exercises
-            
+            #strength categories come precomputed from the catalog
+            organized_exercises = dict(catalog.by_category)
             organized_exercises["Cardio"] = CARDIO_EXERCISES
             
             logger.info(f"Prepared {len(organized_exercises)} exercise categories")
@@ -94,12 +353,16 @@ class WorkoutEngine:
             logger.error(f"Error preparing exercise categories: {e}")
             return {}
 
+    def _week_sequence(self, workout_days: int, goal: str) -> List[str]:
+        """Categories of a training week, in order, for a goal and workout frequency."""
+        #get appropriate workout plan based on goal and frequency
+        workout_plan = self.workout_plans.get(goal, self.workout_plans["Improve Fitness"])
+        return workout_plan.get(workout_days, workout_plan[3])  # Default to 3 days if not found
+
     def _get_next_category(self, workout_days: int, goal: str, last_category: Optional[str] = None) -> str:
         """Determine the next workout category based on the goal, workout frequency, and last workout."""
         try:
-            #get appropriate workout plan based on goal and frequency
-            workout_plan = self.workout_plans.get(goal, self.workout_plans["Improve Fitness"])
-            sequence = workout_plan.get(workout_days, workout_plan[3])  # Default to 3 days if not found
+            sequence = self._week_sequence(workout_days, goal)
             
             if not last_category:
                 return sequence[0]
@@ -117,8 +380,31 @@ class WorkoutEngine:
             #use safe default if anything goes wrong
             return "Full Body"
 
-    def generate_workout_options(self, data: WorkoutRequest, num_options: int = 3) -> dict:
-        """Generate multiple workout options with variations based on user goals and workout frequency."""
+    def _use_rules(self, data: WorkoutRequest, explicit_only: bool = False) -> bool:
+        """Whether a request should be served by the rule-based generator."""
+        mode = (data.mode or WORKOUT_MODE).lower()
+        if mode == "rules":
+            return True
+        return mode == "auto" and not explicit_only and llm_client.scheduler.saturated
+
+    def _rule_based_options(self, data: WorkoutRequest, category: str) -> dict:
+        WORKOUT_SOURCE_TOTAL.inc(source="rules")
+        logger.info(f"Serving rule-based {category} options (mode={data.mode or WORKOUT_MODE})")
+        return self.rule_generator.generate(data, category)
+
+    async def generate_workout_options(self, data: WorkoutRequest, num_options: int = 3,
+                                       deadline: Optional[Deadline] = None) -> dict:
+        """
+        Generate multiple workout options with variations based on user goals and workout frequency.
+        
+        If the deadline runs out first, the default options are returned and the
+        generation keeps running in the background to fill the cache.
+        """
+        with self.snapshots.pin():
+            return await self._generate_workout_options(data, num_options, deadline)
+
+    async def _generate_workout_options(self, data: WorkoutRequest, num_options: int = 3,
+                                        deadline: Optional[Deadline] = None) -> dict:
         try:
             #next workout category based on goal and workout frequency
             next_category = self._get_next_category(
@@ -129,11 +415,18 @@ class WorkoutEngine:
             
             logger.info(f"Selected workout category: {next_category} for user with goal: {data.goal}")
             
-            #check if we need to generate cardio workout
-            if next_category == "Cardio":
-                return self._generate_cardio_options(data, next_category)
-            else:
-                return self._generate_strength_options(data, next_category)
+            #the day of a weekly plan generated earlier for this profile
+            planned = None if self._use_rules(data, explicit_only=True) else self.plan_cache.get_day(
+                data, next_category, self.snapshots.current.version
+            )
+            if planned is not None:
+                logger.info(f"Serving {next_category} options from the weekly plan")
+                WORKOUT_SOURCE_TOTAL.inc(source="plan")
+                return planned
+            
+            result = await self._options_for_category(data, next_category, deadline)
+            result.pop("_fallback", None)
+            return result
                 
         except Exception as e:
             logger.error(f"Error in generate_workout_options: {str(e)}", exc_info=True)
@@ -142,6 +435,399 @@ class WorkoutEngine:
                 "category": next_category if 'next_category' in locals() else "Full Body"
             }
 
+    async def _options_for_category(self, data: WorkoutRequest, category: str,
+                                    deadline: Optional[Deadline] = None) -> dict:
+        """
+        Options for one category: rules, cache, or a (coalesced) LLM generation within the deadline.
+        
+        Stand-ins (rules under load, defaults after the deadline) are marked with
+        _fallback so callers know not to keep them.
+        """
+        if self._use_rules(data, explicit_only=True):
+            return self._rule_based_options(data, category)
+        
+        #serve look-alike profiles from the cache
+        cache_key = self.options_cache.make_key(data, category, self.snapshots.current.version)
+        cached = self.options_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Serving cached {category} options for bucket {cache_key}")
+            WORKOUT_SOURCE_TOTAL.inc(source="cache")
+            return cached
+        
+        #under load the llm is skipped instead of queueing behind other requests
+        if self._use_rules(data):
+            result = self._rule_based_options(data, category)
+            result["_fallback"] = True
+            return result
+        
+        WORKOUT_SOURCE_TOTAL.inc(source="llm")
+        generation = self._inflight.do(
+            cache_key,
+            lambda: self._generate_and_cache(data, category, cache_key)
+        )
+        try:
+            return await within_deadline(generation, deadline, "workout_llm")
+        except DeadlineExceeded:
+            logger.warning(f"Latency budget exhausted for {category} options, "
+                           f"returning defaults while the generation finishes in the background")
+            result = self._create_fallback_options(category, data)
+            result["_fallback"] = True
+            return result
+
+    async def generate_weekly_plan(self, data: WorkoutRequest, deadline: Optional[Deadline] = None) -> dict:
+        """
+        Options for every training day of the user's week in one call.
+        
+        Each distinct category is generated once and all of them run concurrently,
+        so a week costs as long as its slowest category instead of one round trip
+        per day. The plan is cached for the profile, so the daily
+        /generate_workout_options/ request for any of these days is served from it.
+        """
+        with self.snapshots.pin():
+            return await self._generate_weekly_plan(data, deadline)
+
+    async def _generate_weekly_plan(self, data: WorkoutRequest, deadline: Optional[Deadline] = None) -> dict:
+        started = time.perf_counter()
+        sequence = self._week_sequence(data.workoutDays, data.goal)
+        categories = list(dict.fromkeys(sequence))
+        logger.info(f"Generating weekly plan {sequence} ({len(categories)} distinct categories) for goal: {data.goal}")
+        
+        results = await asyncio.gather(
+            *(self._options_for_category(data, category, deadline) for category in categories),
+            return_exceptions=True
+        )
+        options_by_category = {}
+        complete = True
+        for category, result in zip(categories, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error generating {category} options for the weekly plan: {result}")
+                result = self._create_fallback_options(category, data)
+                result["_fallback"] = True
+            complete = not result.pop("_fallback", False) and complete
+            options_by_category[category] = result["options"]
+        
+        WEEKLY_PLAN_SECONDS.observe(time.perf_counter() - started, days=str(len(sequence)))
+        plan = {
+            "goal": data.goal,
+            "workoutDays": len(sequence),
+            "days": [
+                {"day": day, "category": category, "options": options_by_category[category]}
+                for day, category in enumerate(sequence, start=1)
+            ]
+        }
+        #plans with stand-in days are not kept, the next request tries the llm again
+        if complete and not self._use_rules(data, explicit_only=True):
+            self.plan_cache.put(data, plan, self.snapshots.current.version)
+        return plan
+
+    async def regenerate_option(self, data: WorkoutRequest, category: str, options: List[List[Dict[str, Any]]],
+                                option_index: int, deadline: Optional[Deadline] = None) -> dict:
+        """
+        Replace one option of a previous result and keep the other two.
+        
+        Only the replaced option is generated, with a single-option prompt and a
+        smaller completion budget. Exercises of every previous option are left
+        out, so the new option neither repeats the other two nor the one the
+        user rejected.
+        """
+        with self.snapshots.pin():
+            return await self._regenerate_option(data, category, options, option_index, deadline)
+
+    async def _regenerate_option(self, data: WorkoutRequest, category: str, options: List[List[Dict[str, Any]]],
+                                 option_index: int, deadline: Optional[Deadline] = None) -> dict:
+        if category != "Cardio" and category not in CATEGORY_BODY_PARTS:
+            raise ValueError(f"Unknown category: {category}")
+        if len(options) != len(OPTION_INTENTS) or not all(options):
+            raise ValueError(f"options must be the {len(OPTION_INTENTS)} non-empty options of a previous result")
+        if not 0 <= option_index < len(OPTION_INTENTS):
+            raise ValueError(f"optionIndex must be between 0 and {len(OPTION_INTENTS) - 1}")
+        options = [list(option) for option in options]
+        #replaced option first, so it is the part dropped if the list gets too short
+        excluded = [exercise["workout"] for exercise in options[option_index] if exercise.get("workout")]
+        excluded += [exercise["workout"] for index, option in enumerate(options) if index != option_index
+                     for exercise in option if exercise.get("workout")]
+        
+        option = None
+        if not self._use_rules(data):
+            try:
+                option = await within_deadline(
+                    self._generate_single_option(data, category, option_index, excluded), deadline, "workout_option_llm"
+                )
+            except DeadlineExceeded:
+                logger.warning(f"Latency budget exhausted regenerating {category} option {option_index + 1}")
+        if option:
+            OPTION_REGENERATIONS_TOTAL.inc(source="llm")
+        else:
+            OPTION_REGENERATIONS_TOTAL.inc(source="rules")
+            #fewer exclusions until the rules find something; the sent option stays if they never do
+            option = (self.rule_generator.option(category, option_index, data, set(excluded))
+                      or self.rule_generator.option(category, option_index, data, set(excluded[len(options[option_index]):]))
+                      or self.rule_generator.option(category, option_index, data))
+        
+        if option:
+            options[option_index] = option
+        return {"options": options, "category": category, "optionIndex": option_index}
+
+    def _build_single_option_prompt(self, data: WorkoutRequest, category: str, option_index: int,
+                                    excluded: List[str]) -> str:
+        """Prompt for one option only: its own instructions and exercise list, then the user profile."""
+        if category == "Cardio":
+            return CARDIO_OPTION_PROMPT_TEMPLATE.format(
+                excluded=", ".join(excluded) or "none",
+                images=", ".join(f'"{image}"' for image in dict.fromkeys(self.cardio_mapper.CARDIO_IMAGES.values()))
+            ) + user_profile_block(data)
+        
+        all_exercises = self._get_strength_exercises(category)
+        intent = OPTION_INTENTS[option_index]
+        #the category's full ranked order for this intent is memoized, so this is a filter and a slice
+        ranked = self.exercise_index.shortlist(all_exercises, intent, size=len(all_exercises), key=category)
+        allowed = {ex["Title"] for ex in self.catalog.select(category, exclude=excluded)}
+        candidates = [ex["Title"] for ex in ranked if ex["Title"] in allowed]
+        return STRENGTH_OPTION_PROMPT_TEMPLATE.format(
+            category=category,
+            brief=OPTION_BRIEFS[option_index],
+            count=OPTION_SIZES[option_index],
+            exercise_list=", ".join((candidates or [ex["Title"] for ex in ranked])[:SHORTLIST_SIZE])
+        ) + user_profile_block(data)
+
+    async def _generate_single_option(self, data: WorkoutRequest, category: str, option_index: int,
+                                      excluded: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """One option from the LLM, or None so the caller falls back to the rules."""
+        is_cardio = category == "Cardio"
+        schema = CardioOptionsOutput if is_cardio else StrengthOptionsOutput
+        try:
+            response = await llm_client.chat_for_task(
+                "workout_option",
+                messages=[
+                    {"role": "system", "content": CARDIO_SYSTEM_PROMPT if is_cardio else STRENGTH_SYSTEM_PROMPT},
+                    {"role": "user", "content": self._build_single_option_prompt(data, category, option_index, excluded)}
+                ],
+                label=category,
+                **structured_output.format_kwargs(schema)
+            )
+            content = response['message']['content'].strip()
+            workout_data = self._parse_workout_response(
+                content, schema, "workout_option", {"label": category, "model": response.get("model") or ""}
+            )
+            raw_option = next((option for option in workout_data.get("options", []) if option), None)
+            if raw_option is None:
+                logger.error(f"No option received from LLM when regenerating {category} option {option_index + 1}")
+                return None
+            if is_cardio:
+                option = self._process_cardio_option(raw_option, option_index, {name.lower() for name in excluded})
+                return calorie_estimator.annotate([option], data.weight)[0] if option else None
+            return self._process_strength_option(
+                raw_option, option_index, self._get_strength_exercises(category), category, used=set(excluded)
+            )
+        except LLMUnavailableError as e:
+            logger.warning(f"LLM unavailable regenerating {category} option ({str(e)}), using rules")
+            return None
+        except Exception as e:
+            logger.error(f"Error regenerating {category} option: {str(e)}", exc_info=True)
+            return None
+
+    def _create_fallback_options(self, category: str, data: Optional[WorkoutRequest] = None) -> dict:
+        """Deterministic default options for a category, without the fallback marker."""
+        if category == "Cardio":
+            result = self._create_default_cardio_options(category, data)
+        else:
+            result = self._create_default_strength_options(category, data)
+        result.pop("_fallback", None)
+        return result
+
+    async def _generate_and_cache(self, data: WorkoutRequest, category: str, cache_key: tuple) -> dict:
+        """Run the LLM generation for a category and store the result in the cache."""
+        #check if we need to generate cardio workout
+        if category == "Cardio":
+            result = await self._generate_cardio_options(data, category)
+        else:
+            result = await self._generate_strength_options(data, category)
+        
+        #only cache real generations, never the failure defaults; the marker stays for the callers
+        if not result.get("_fallback"):
+            self.options_cache.put(cache_key, result)
+        return result
+
+    async def stream_workout_options(self, data: WorkoutRequest,
+                                     deadline: Optional[Deadline] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield workout options one at a time while the LLM is still generating.
+
+        Emits a "category" event, then an "option" event (icons already resolved)
+        the moment each option array closes in the token stream, and a final
+        "done" event. Options the LLM did not deliver, or had not delivered
+        when the deadline ran out, are filled from the defaults.
+        """
+        with self.snapshots.pin():
+            async for event in self._stream_workout_options(data, deadline):
+                yield event
+
+    async def _stream_workout_options(self, data: WorkoutRequest,
+                                      deadline: Optional[Deadline] = None) -> AsyncIterator[Dict[str, Any]]:
+        started = time.perf_counter()
+        category = self._get_next_category(data.workoutDays, data.goal, data.lastWorkoutCategory)
+        yield {"event": "category", "category": category}
+        
+        if self._use_rules(data, explicit_only=True):
+            async for event in self._stream_rule_based_options(data, category, started):
+                yield event
+            return
+        
+        #planned days and cache hits stream straight away
+        cache_key = self.options_cache.make_key(data, category, self.snapshots.current.version)
+        cached = (self.plan_cache.get_day(data, category, self.snapshots.current.version)
+                  or self.options_cache.get(cache_key))
+        if cached is not None:
+            logger.info(f"Streaming cached {category} options for bucket {cache_key}")
+            for index, option in enumerate(cached["options"]):
+                yield {"event": "option", "index": index, "exercises": option}
+            FIRST_OPTION_SECONDS.observe(time.perf_counter() - started, category=category)
+            WORKOUT_SOURCE_TOTAL.inc(source="cache")
+            yield {"event": "done", "category": category, "cached": True}
+            return
+        
+        if self._use_rules(data):
+            async for event in self._stream_rule_based_options(data, category, started):
+                yield event
+            return
+        
+        WORKOUT_SOURCE_TOTAL.inc(source="llm")
+        #the generation is its own task: it keeps going (and fills the cache) after the
+        #deadline or a client disconnect, like the background work of within_deadline
+        delivered: asyncio.Queue = asyncio.Queue()
+        asyncio.ensure_future(self._generate_streamed_options(data, category, cache_key, delivered))
+        
+        options: List[List[Dict[str, Any]]] = []
+        while len(options) < 3:
+            try:
+                if deadline is None:
+                    option = await delivered.get()
+                else:
+                    option = await asyncio.wait_for(delivered.get(), timeout=deadline.timeout())
+            except asyncio.TimeoutError:
+                record_exceeded("workout_stream")
+                logger.warning(f"Latency budget exhausted streaming {category} options, filling the rest "
+                               f"with defaults while the generation finishes in the background")
+                break
+            if option is None:
+                break
+            if not options:
+                FIRST_OPTION_SECONDS.observe(time.perf_counter() - started, category=category)
+            options.append(option)
+            yield {"event": "option", "index": len(options) - 1, "exercises": option}
+        
+        #fill whatever the LLM did not deliver in time
+        generated_count = len(options)
+        if not options:
+            if category == "Cardio":
+                added_options = self._create_default_cardio_options(category, data)["options"]
+            else:
+                added_options = self._create_default_strength_options(category, data)["options"]
+            options.extend(added_options)
+        elif category == "Cardio":
+            used_cardio_names = {option[0]["workout"].lower() for option in options}
+            added_options = calorie_estimator.annotate(self._fill_cardio_options(options, used_cardio_names), data.weight)
+        else:
+            added_options = []
+            while len(options) < 3:
+                new_option = self._create_strength_option(category, len(options), data, options)
+                options.append(new_option)
+                added_options.append(new_option)
+        
+        for index, option in enumerate(added_options, start=generated_count):
+            yield {"event": "option", "index": index, "exercises": option}
+        
+        logger.info(f"Streamed {len(options)} {category} options ({generated_count} from LLM)")
+        yield {"event": "done", "category": category, "cached": False}
+
+    async def _generate_streamed_options(self, data: WorkoutRequest, category: str, cache_key: tuple,
+                                         delivered: asyncio.Queue):
+        """
+        Stream a category's options from the LLM, putting each one on delivered
+        the moment its array closes in the token stream, then None.
+        
+        Only a generation that delivered every option is cached, never a
+        partial one; the caller fills in for whatever is missing.
+        """
+        is_cardio = category == "Cardio"
+        engine = "workout_cardio" if is_cardio else "workout_strength"
+        options: List[List[Dict[str, Any]]] = []
+        all_exercises: List[Dict[str, Any]] = []
+        used_cardio_names: set = set()
+        
+        try:
+            if is_cardio:
+                prompt = self._build_cardio_prompt(data)
+                system_prompt, schema = CARDIO_SYSTEM_PROMPT, CardioOptionsOutput
+            else:
+                all_exercises = self._get_strength_exercises(category)
+                prompt = self._build_strength_prompt(data, category, all_exercises)
+                system_prompt, schema = STRENGTH_SYSTEM_PROMPT, StrengthOptionsOutput
+            
+            #each option array sits inside {"options": [...]}
+            parser = IncrementalArrayParser(depth=2, repair=self._fix_json)
+            logger.info(f"Streaming {category} workout options from LLM...")
+            
+            stream = llm_client.chat_stream_for_task(
+                engine,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                label=category,
+                **structured_output.format_kwargs(schema)
+            )
+            model = ""
+            try:
+                async for chunk in stream:
+                    model = chunk.get("model") or model
+                    for raw_option in parser.feed(chunk["message"]["content"]):
+                        if not isinstance(raw_option, list):
+                            continue
+                        if is_cardio:
+                            option = self._process_cardio_option(raw_option, len(options), used_cardio_names)
+                            if option:
+                                calorie_estimator.annotate([option], data.weight)
+                        elif raw_option:
+                            option = self._process_strength_option(raw_option, len(options), all_exercises, category)
+                        else:
+                            option = None
+                        if option:
+                            options.append(option)
+                            delivered.put_nowait(option)
+                    
+                    #the rest of the stream is only closing brackets
+                    if len(options) >= 3:
+                        break
+            finally:
+                #releases the scheduler slot if we stopped reading early
+                await stream.aclose()
+            
+            if not options:
+                outcome = "failed"
+            else:
+                outcome = "repaired" if parser.repaired else "structured"
+            structured_output.record_outcome(engine, outcome, {"label": category, "model": model})
+            
+        except LLMUnavailableError as e:
+            logger.warning(f"LLM unavailable for streamed {category} options ({str(e)}), using default options")
+        except Exception as e:
+            logger.error(f"Error in stream_workout_options: {str(e)}", exc_info=True)
+        finally:
+            delivered.put_nowait(None)
+        
+        if len(options) >= 3:
+            self.options_cache.put(cache_key, {"options": options[:3], "category": category})
+
+    async def _stream_rule_based_options(self, data: WorkoutRequest, category: str,
+                                         started: float) -> AsyncIterator[Dict[str, Any]]:
+        """Stream rule-based options; they are all ready at once."""
+        result = self._rule_based_options(data, category)
+        for index, option in enumerate(result["options"]):
+            yield {"event": "option", "index": index, "exercises": option}
+        FIRST_OPTION_SECONDS.observe(time.perf_counter() - started, category=category)
+        yield {"event": "done", "category": category, "cached": False}
+
     def _fix_json(self, content: str) -> str:
         """fix the common JSON errors from the llama responses."""
         logger.info("fixing JSON formatting issues in LLM response")
@@ -242,104 +928,147 @@ class WorkoutEngine:
                     logger.error(f"Third parsing attempt failed: {e3}")
                     return {"options": []}
 
-    def _generate_cardio_options(self, data: WorkoutRequest, category: str) -> dict:
-        """Generate cardio workout options with appropriate parameters, allowing for maximum creativity."""
-        try:
-            # Get all available cardio exercise examples
-            cardio_examples = ", ".join([ex["Title"] for ex in CARDIO_EXERCISES])
-            
-            # Create prompt that explicitly instructs about image selection
-            prompt = f"""You are a professional fitness coach. Create EXACTLY 3 different creative cardio workout options for a {data.age}yo {data.gender}, {data.height}cm, {data.weight}kg, {data.fitnessLevel} level, goal: {data.goal}.
+    def _parse_workout_response(self, content: str, schema, engine: str,
+                                tags: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Validate the LLM response into its schema, falling back to the JSON repair passes."""
+        workout_data = structured_output.parse_structured(content, schema, engine, tags)
+        if workout_data is not None:
+            return workout_data
+        
+        workout_data = self._parse_safe(content)
+        structured_output.record_outcome(engine, "repaired" if workout_data.get("options") else "failed", tags)
+        return workout_data
 
-    INSTRUCTIONS:
-    1. You can create ANY cardio exercise - not limited to this list: {cardio_examples}
-    2. Each option should have one cardio exercise with detailed parameters.
-    3. Tailor the intensity, duration, and format to match the exercise and the user's fitness level and goals.
-    4. Tailor the calories burned estimate based on the exercise type and user's body weight.
-    5. make sure they are realistic
-    6. For the "image" parameter, choose the most appropriate image for your exercise choice from the list below
-    
-    IMPORTANT: For each exercise, assign the MOST APPROPRIATE image from this list:
-    - "treadmill.webp"
-    - "running.webp"
-    - "walking.webp" 
-    - "bicycle.webp"
-    - "exercise-bike.webp"
-    - "jumping-rope.webp"
-    - "swimming.webp"
-    - "hiking.webp"
-    - "rowing.jpg"
-    - "climbing-stairs.jpg"
-    - "basketball.jpg"
-    - "football.jpg"
-    - "tennis.jpg"
-    - "volleyball.jpg"
-    - "squash.jpg"
-    - "yoga.jpg"
-    - "cardio.webp"
+    def _build_cardio_prompt(self, data: WorkoutRequest) -> str:
+        """Build the cardio prompt: the shared static prefix followed by the user profile."""
+        return CARDIO_PROMPT_PREFIX + user_profile_block(data)
 
-    For each cardio workout, provide:
-    - Exercise name (be specific and creative)
-    - Image (choose exactly one image from the list above that best matches the exercise)
-    - Duration (like "30 min")
-    - Intensity (like "Moderate" or "High-intensity" two words max.)
-    - Format (like "30 sec work/30 sec rest" or "Steady-state")
-    - Calories burned estimate (like "250-300")
-    - A brief description of how to perform the workout
+    def _process_cardio_option(self, option: List[Dict[str, Any]], option_index: int,
+                               used_cardio_names: set) -> Optional[List[Dict[str, Any]]]:
+        """Format one LLM cardio option and resolve its image, or return None to skip it; calories are estimated by the caller."""
+        if not option:  # Skip empty options
+            logger.warning(f"Empty option found at index {option_index}")
+            return None
+            
+        # Each cardio option has one exercise
+        cardio_exercise = option[0]
+        if "workout" not in cardio_exercise:
+            logger.warning(f"No 'workout' field in option {option_index}")
+            return None
+            
+        workout_name = cardio_exercise["workout"]
+        workout_lower = workout_name.lower()
+        
+        # Skip duplicates
+        if any(workout_lower in used or used in workout_lower for used in used_cardio_names):
+            logger.info(f"Skipping duplicate cardio workout: {workout_name}")
+            return None
+        
+        # Record this exercise type
+        used_cardio_names.add(workout_lower)
+        
+        # Check if LLM provided an image - if not or invalid, use our mapping system
+        image_filename = cardio_exercise.get("image", "")
+        
+        # Validate if it's one of our actual images
+        valid_images = list(self.cardio_mapper.CARDIO_IMAGES.values())
+        if image_filename not in valid_images:
+            # If LLM provided an invalid image, use our mapping system
+            image_path = self.cardio_mapper.get_image_path(workout_name)
+            logger.info(f"LLM provided invalid image '{image_filename}', using mapped image: {image_path}")
+        else:
+            # LLM provided a valid image filename
+            image_path = f"/workout-images/cardio/{image_filename}"
+            logger.info(f"Using LLM-selected image for '{workout_name}': {image_path}")
+        
+        # Create properly formatted exercise with the correct image path
+        formatted_exercise = {
+            "workout": workout_name,
+            "image": image_path,  # This is the properly formatted path
+            "duration": cardio_exercise.get("duration", "30 min"),
+            "intensity": cardio_exercise.get("intensity", "Moderate"),
+            "format": cardio_exercise.get("format", "Steady-state"),
+            "calories": "",
+            "description": cardio_exercise.get("description", f"Perform {workout_name} at a comfortable pace."),
+            "is_cardio": True
+        }
+        
+        logger.info(f"Processed cardio workout: {workout_name} with image: {image_path}")
+        return [formatted_exercise]
 
-    Return ONLY in this exact JSON format (EVERYTHING in QUOTES, including numbers). Don't add any more information or markdown, change the values based on the exercise you chose:
-    {{
-    "options": [
-        [
-        {{
-            "workout": "Cardio Exercise 1", 
-            "image": "running.webp", 
-            "duration": "30 min", 
-            "intensity": "Moderate", 
-            "format": "Steady-state", 
-            "calories": "250-300", 
-            "description": "Brief description with specific instructions"
-        }}
-        ],
-        [
-        {{
-            "workout": "Cardio Exercise 2", 
-            "image": "cardio.webp", 
-            "duration": "25 min", 
-            "intensity": "High", 
-            "format": "Intervals (30s/30s)", 
-            "calories": "300-350", 
-            "description": "Brief description with specific instructions"
-        }}
-        ],
-        [
-        {{
-            "workout": "Cardio Exercise 3", 
-            "image": "swimming.webp",
-            "duration": "45 min", 
-            "intensity": "Low", 
-            "format": "Steady-state", 
-            "calories": "350-400", 
-            "description": "Brief description with specific instructions"
-        }}
+    def _fill_cardio_options(self, processed_options: List[List[Dict[str, Any]]],
+                             used_cardio_names: set) -> List[List[Dict[str, Any]]]:
+        """Top up processed_options to 3 with defaults that don't overlap, returning the added ones."""
+        if len(processed_options) >= 3:
+            return []
+        
+        logger.warning(f"Only {len(processed_options)} valid cardio options generated, filling with defaults")
+        
+        # Generate defaults that won't overlap with what we already have
+        default_cardio_types = [
+            {
+                "workout": "Outdoor Running", 
+                "image": "/workout-images/cardio/running.webp",
+                "duration": "30 min", 
+                "intensity": "Moderate", 
+                "format": "Steady-state", 
+                "calories": "",
+                "description": "Run at a comfortable pace outdoors, focusing on maintaining consistent effort.",
+                "is_cardio": True
+            },
+            {
+                "workout": "Jump Rope Intervals", 
+                "image": "/workout-images/cardio/jumping-rope.webp",
+                "duration": "20 min", 
+                "intensity": "High", 
+                "format": "40 sec work/20 sec rest", 
+                "calories": "",
+                "description": "Jump rope with high intensity for 40 seconds, followed by 20 seconds of rest. Repeat for 20 minutes.",
+                "is_cardio": True
+            },
+            {
+                "workout": "Indoor Cycling", 
+                "image": "/workout-images/cardio/exercise-bike.webp",
+                "duration": "45 min", 
+                "intensity": "Moderate", 
+                "format": "Pyramid intervals", 
+                "calories": "",
+                "description": "Start with 5 minute warm-up, then alternate between 1, 2, 3, 4, 3, 2, 1 minute intervals of high intensity with equal rest periods.",
+                "is_cardio": True
+            }
         ]
-    ]
-    }}
-IMPORTANT: EVERY value MUST be in QUOTES. No bare numbers. FOLLOW INSTRUCTIONS CAREFULLY OR YOUR RESPONSE IS INVALID."""
+        
+        #add def options that don't overlap with existing ones
+        added_options = []
+        for default_workout in default_cardio_types:
+            default_name = default_workout["workout"].lower()
+            if not any(default_name in used or used in default_name for used in used_cardio_names):
+                processed_options.append([default_workout])
+                added_options.append([default_workout])
+                used_cardio_names.add(default_name)
+                
+                if len(processed_options) >= 3:
+                    break
+        
+        logger.info(f"Added default cardio workouts: {', '.join(option[0]['workout'] for option in added_options)}")
+        return added_options
+
+    async def _generate_cardio_options(self, data: WorkoutRequest, category: str) -> dict:
+        """Generate cardio workout options with appropriate parameters, allowing for maximum creativity."""
+        try:
+            prompt = self._build_cardio_prompt(data)
             
             logger.info("Requesting creative cardio workout from LLM...")
             
             # Use ollama with very specific system instruction about JSON format and image selection
-            response = ollama.chat(
-                model="llama3.2",
+            response = await llm_client.chat_for_task(
+                "workout_cardio",  #higher temp for creativity
                 messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a professional fitness coach that returns only valid JSON. You must put ALL values in double quotes, including numbers. Format exactly as requested. Return ONLY the JSON with no explanation or markdown. Be creative and suggest ANY cardio workout that would benefit the user. VERY IMPORTANT: For each exercise, you must select the most appropriate image filename from the provided list."
-                    },
+                    {"role": "system", "content": CARDIO_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
-                options={"temperature": 0.7}  #higher temp for creativity
+                label=category,
+                **structured_output.format_kwargs(CardioOptionsOutput)
             )
             
             #extract content
@@ -348,121 +1077,31 @@ IMPORTANT: EVERY value MUST be in QUOTES. No bare numbers. FOLLOW INSTRUCTIONS C
             #log first 200 characters of response for debugging
             logger.info(f"LLM response (truncated): {content[:200]}...")
             
-            #parse with our safe parsing method
-            workout_data = self._parse_safe(content)
+            #validate against the schema, repair only if that fails
+            workout_data = self._parse_workout_response(
+                content, CardioOptionsOutput, "workout_cardio",
+                {"label": category, "model": response.get("model") or ""}
+            )
             options = workout_data.get("options", [])
             
             if not options:
                 logger.error("No valid workout options received from LLM, generating backup options")
-                return self._create_default_cardio_options(category)
+                return self._create_default_cardio_options(category, data)
             
             # Process the options to ensure proper formatting and image paths
             processed_options = []
             used_cardio_names = set()
             
             for option_index, option in enumerate(options):
-                if not option:  # Skip empty options
-                    logger.warning(f"Empty option found at index {option_index}")
-                    continue
-                    
-                # Each cardio option has one exercise
-                cardio_exercise = option[0]
-                if "workout" not in cardio_exercise:
-                    logger.warning(f"No 'workout' field in option {option_index}")
-                    continue
-                    
-                workout_name = cardio_exercise["workout"]
-                workout_lower = workout_name.lower()
-                
-                # Skip duplicates
-                if any(workout_lower in used or used in workout_lower for used in used_cardio_names):
-                    logger.info(f"Skipping duplicate cardio workout: {workout_name}")
-                    continue
-                
-                # Record this exercise type
-                used_cardio_names.add(workout_lower)
-                
-                # Check if LLM provided an image - if not or invalid, use our mapping system
-                image_filename = cardio_exercise.get("image", "")
-                
-                # Validate if it's one of our actual images
-                valid_images = list(self.cardio_mapper.CARDIO_IMAGES.values())
-                if image_filename not in valid_images:
-                    # If LLM provided an invalid image, use our mapping system
-                    image_path = self.cardio_mapper.get_image_path(workout_name)
-                    logger.info(f"LLM provided invalid image '{image_filename}', using mapped image: {image_path}")
-                else:
-                    # LLM provided a valid image filename
-                    image_path = f"/workout-images/cardio/{image_filename}"
-                    logger.info(f"Using LLM-selected image for '{workout_name}': {image_path}")
-                
-                # Create properly formatted exercise with the correct image path
-                formatted_exercise = {
-                    "workout": workout_name,
-                    "image": image_path,  # This is the properly formatted path
-                    "duration": cardio_exercise.get("duration", "30 min"),
-                    "intensity": cardio_exercise.get("intensity", "Moderate"),
-                    "format": cardio_exercise.get("format", "Steady-state"),
-                    "calories": cardio_exercise.get("calories", "250-300"),
-                    "description": cardio_exercise.get("description", f"Perform {workout_name} at a comfortable pace."),
-                    "is_cardio": True
-                }
-                
-                processed_options.append([formatted_exercise])
-                logger.info(f"Processed cardio workout: {workout_name} with image: {image_path}")
+                processed_option = self._process_cardio_option(option, option_index, used_cardio_names)
+                if processed_option:
+                    processed_options.append(processed_option)
             
             # If we don't have enough options, fill in with defaults
-            if len(processed_options) < 3:
-                logger.warning(f"Only {len(processed_options)} valid cardio options generated, filling with defaults")
-                
-                # Generate defaults that won't overlap with what we already have
-                defaults_to_add = 3 - len(processed_options)
-                default_cardio_types = [
-                    {
-                        "workout": "Outdoor Running", 
-                        "image": "/workout-images/cardio/running.webp",
-                        "duration": "30 min", 
-                        "intensity": "Moderate", 
-                        "format": "Steady-state", 
-                        "calories": "300-350",
-                        "description": "Run at a comfortable pace outdoors, focusing on maintaining consistent effort.",
-                        "is_cardio": True
-                    },
-                    {
-                        "workout": "Jump Rope Intervals", 
-                        "image": "/workout-images/cardio/jumping-rope.webp",
-                        "duration": "20 min", 
-                        "intensity": "High", 
-                        "format": "40 sec work/20 sec rest", 
-                        "calories": "250-300",
-                        "description": "Jump rope with high intensity for 40 seconds, followed by 20 seconds of rest. Repeat for 20 minutes.",
-                        "is_cardio": True
-                    },
-                    {
-                        "workout": "Indoor Cycling", 
-                        "image": "/workout-images/cardio/exercise-bike.webp",
-                        "duration": "45 min", 
-                        "intensity": "Moderate", 
-                        "format": "Pyramid intervals", 
-                        "calories": "400-450",
-                        "description": "Start with 5 minute warm-up, then alternate between 1, 2, 3, 4, 3, 2, 1 minute intervals of high intensity with equal rest periods.",
-                        "is_cardio": True
-                    }
-                ]
-                
-                #add def options that don't overlap with existing ones
-                used_defaults = []
-                for default_workout in default_cardio_types:
-                    default_name = default_workout["workout"].lower()
-                    if not any(default_name in used or used in default_name for used in used_cardio_names):
-                        processed_options.append([default_workout])
-                        used_cardio_names.add(default_name)
-                        used_defaults.append(default_workout["workout"])
-                        
-                        if len(processed_options) >= 3:
-                            break
-                
-                logger.info(f"Added default cardio workouts: {', '.join(used_defaults)}")
+            self._fill_cardio_options(processed_options, used_cardio_names)
+            
+            #calories are computed from the MET table, not generated
+            calorie_estimator.annotate(processed_options, data.weight)
             
             logger.info(f"Successfully generated {len(processed_options)} cardio workout options")
             return {
@@ -470,160 +1109,158 @@ IMPORTANT: EVERY value MUST be in QUOTES. No bare numbers. FOLLOW INSTRUCTIONS C
                 "category": category
             }
             
+        except LLMUnavailableError as e:
+            logger.warning(f"LLM unavailable for cardio options ({str(e)}), using default options")
+            return self._create_default_cardio_options(category, data)
         except Exception as e:
             logger.error(f"Error in generate_cardio_options: {str(e)}", exc_info=True)
-            return self._create_default_cardio_options(category)
+            return self._create_default_cardio_options(category, data)
             
-    def _create_default_cardio_options(self, category: str) -> dict:
+    def _create_default_cardio_options(self, category: str, data: Optional[WorkoutRequest] = None) -> dict:
         """Create default cardio options when LLM fails."""
         logger.warning("Creating default cardio options due to LLM failure")
-        options = []
-        used_indices = set()
-        
-        #create 3 different cardio options
-        for i in range(3):
-            #find an unused cardio exercise
-            available_indices = [i for i in range(len(CARDIO_EXERCISES)) if i not in used_indices]
-            if not available_indices:  # If all are used, reset
-                used_indices = set()
-                available_indices = list(range(len(CARDIO_EXERCISES)))
+        result = self.rule_generator.generate(data, category)
+        result["_fallback"] = True
+        return result
+    
+    def _get_strength_exercises(self, category: str) -> Sequence[Mapping[str, Any]]:
+        """Exercises from the database that can be used for a strength category."""
+        #precomputed per category in the catalog, so this is a dict lookup
+        if category in self.catalog.by_category:
+            return self.catalog.category(category)
+        # Fallback to the original category if not found in the catalog
+        category_exercises = self.exercise_categories.get(category, [])
+        return [ex for ex in category_exercises if "Title" in ex]
+
+    def _build_strength_prompt(self, data: WorkoutRequest, category: str, all_exercises: List[Dict[str, Any]]) -> str:
+        """Build the strength prompt: the category's static prefix followed by the user profile."""
+        return self._strength_prompt_prefix(category, all_exercises) + user_profile_block(data)
+
+    def _strength_prompt_prefix(self, category: str, all_exercises: List[Dict[str, Any]]) -> str:
+        """Instructions and per-option exercise shortlists for a category, identical for every user."""
+        #a short diverse shortlist per option instead of the whole category keeps prompts small
+        shortlists = {
+            intent: ", ".join(ex['Title'] for ex in self.exercise_index.shortlist(all_exercises, intent, key=category))
+            for intent in ("challenging", "moderate", "home")
+        }
+        return STRENGTH_PROMPT_TEMPLATE.format(
+            category=category,
+            challenging_list=shortlists["challenging"],
+            moderate_list=shortlists["moderate"],
+            home_list=shortlists["home"]
+        )
+
+    def _available_pool(self, category: Optional[str], all_exercises: Sequence[Mapping[str, Any]],
+                        home: bool, used: Set[str]) -> List[Mapping[str, Any]]:
+        """Unused exercises to fill an option with, home-friendly ones only for the home option."""
+        if category in self.catalog.category_bits:
+            #bitset lookup on the catalog's precomputed tags
+            pool = self.catalog.select(category, home=True if home else None, exclude=used)
+            return list(pool or self.catalog.select(category, exclude=used))
+        pool = [ex for ex in all_exercises if ex["Title"].lower() not in used]
+        home_pool = [ex for ex in pool if ex.get("HomeFriendly") == "yes"] if home else []
+        return home_pool or pool
+
+    def _process_strength_option(self, option: List[Dict[str, Any]], option_index: int,
+                                 all_exercises: Sequence[Mapping[str, Any]],
+                                 category: Optional[str] = None,
+                                 used: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Dedupe one LLM option, resolve its icons and balance it to the expected exercise count.
+        
+        Exercises in used (e.g. from the options that are kept) are dropped and never used as fill-ins.
+        """
+        processed_exercises = []
+        exercise_names = {name.lower() for name in (used or set())}  #track exercise names to avoid duplicates
+        expected_count = 5 if option_index == 1 else 4  #second option should have 5 exercises
+        
+        logger.info(f"provessing option {option_index+1} with {len(option)} exercises (expected {expected_count})")
+        
+        for exercise in option:
+            if "workout" not in exercise:
+                logger.warning(f"missing 'workout' field in exercise: {exercise}")
+                continue
                 
-            index = random.choice(available_indices)
-            used_indices.add(index)
-            cardio = CARDIO_EXERCISES[index]
-            
-            if i == 0:
-                #option 1: No equipment (e.g., running, walking)
-                cardio_options = [ex for ex in CARDIO_EXERCISES if ex["Title"] in 
-                                ["Outdoor Running", "Walking", "Hiking"]]
-                if cardio_options:
-                    cardio = random.choice(cardio_options)
-            elif i == 1:
-                #option 2: Basic equipment (e.g., jump rope, exercise bike)
-                cardio_options = [ex for ex in CARDIO_EXERCISES if ex["Title"] in 
-                                ["Jump Rope", "Exercise Bike", "Rowing Machine"]]
-                if cardio_options:
-                    cardio = random.choice(cardio_options)
-            else:
-                #option 3: More challenging (swimming, sports)
-                cardio_options = [ex for ex in CARDIO_EXERCISES if ex["Title"] in 
-                                ["Swimming", "Basketball", "Tennis", "Football"]]
-                if cardio_options:
-                    cardio = random.choice(cardio_options)
-            
-            # Use proper path format for images
-            image_path = f"/workout-images/cardio/{cardio['Image']}"
-            
-            #create a def option with correct image path
-            option = [{
-                "workout": cardio["Title"],
-                "image": image_path,  # Correctly formatted path
-                "duration": "30 min",
-                "intensity": "Moderate",
-                "format": "Steady-state",
-                "calories": "250-300",
-                "description": f"Perform {cardio['Title']} at a comfortable pace.",
-                "is_cardio": True
-            }]
+            #use the catalog name only when it is the same exercise written differently, so
+            #near-duplicates ("DB Bench Press", "Dumbbell Bench Press") are caught; fuzzy matches
+            #("Back Squat" ~ "Hack Squat") are different exercises and only lend their icon
+            exercise_name = exercise["workout"]
+            exercise_name = self.catalog.title(exercise_name) or exercise_name
+            #skip dups within this option
+            if exercise_name.lower() in exercise_names:
+                logger.info(f"skipping the dup exercise: {exercise_name}")
+                continue
             
-            options.append(option)
-            logger.info(f"Created default cardio option {i+1}: {cardio['Title']} with image: {image_path}")
+            exercise_names.add(exercise_name.lower())
             
-        return {
-            "options": options,
-            "category": category
-        }
-    
-    def _generate_strength_options(self, data: WorkoutRequest, category: str) -> dict:
-        """Generate strength training workout options."""
-        try:
-            # Get available exercises for this category
-            available_exercises = []
-            
-            # Map the category to the relevant body parts
-            if category in self.category_mapping:
-                for body_part in self.category_mapping[category]:
-                    if body_part == "Cardio":
-                        continue  # Skip cardio for strength training
-                    exercises = self.df[self.df['BodyPart'] == body_part].to_dict('records')
-                    available_exercises.extend(exercises)
-            else:
-                # Fallback to the original category if not found in mapping
-                category_exercises = self.exercise_categories.get(category, [])
-                available_exercises = [ex for ex in category_exercises if "Title" in ex]
+            #make sure that sets and reps are strings
+            sets = str(exercise.get("sets", "3"))
+            reps = str(exercise.get("reps", "10-12"))
             
-            # Create list of all exercises
-            all_exercises = []
+            #add exercise
+            processed_exercise = {
+                "workout": exercise_name,
+                "image": self.exercise_db.get_exercise_icon(exercise_name),
+                "sets": sets,
+                "reps": reps,
+                "instruction": exercise.get("instruction", "")
+            }
+            processed_exercises.append(processed_exercise)
+        
+        #make sure we have the right number of exercises in the option
+        if len(processed_exercises) != expected_count:
+            logger.warning(f"Option {option_index+1} has {len(processed_exercises)} exercises but should have {expected_count}")
             
-            for ex in available_exercises:
-                if "Title" in ex:
-                    all_exercises.append(ex)
-                    
-            # Create exercise list from both categories (limit to avoid token limits)
-            exercise_list = ", ".join([ex['Title'] for ex in all_exercises[:40]])
+            #for option 3 (index 2), only home-friendly exercises we don't have yet
+            available_pool = self._available_pool(category, all_exercises, option_index == 2, exercise_names)
             
-            # Create a prompt that explicitly emphasizes string formatting for all values
-            prompt = f"""Create EXACTLY 3 different {category} workout options for a {data.age}yo {data.gender}, {data.height}cm, {data.weight}kg, {data.fitnessLevel} level, goal: {data.goal}.
-
-INSTRUCTIONS:
-
-1. OPTION 1: Create a challenging workout with EXACTLY 4 different exercises from this list ONLY: {exercise_list}
-   - This should be the most intense option
-   - Use EXACTLY the same name as the exercises from the list
-
-2. OPTION 2: Create a moderate workout with EXACTLY 5 different exercises from this list: {exercise_list}
-   - This should be less intense
-
-3. OPTION 3: Create a HOME-FRIENDLY workout with EXACTLY 4 different exercises from this list: {exercise_list}
-   - Select ONLY bodyweight exercises or dumbbell exercises
-   - No gym machines or barbells or specialized equipment should be included unless there is no other option
+            #calc how many more/less we need
+            if len(processed_exercises) < expected_count:  # Need to add exercises
+                missing_count = expected_count - len(processed_exercises)
+                logger.info(f"addomg {missing_count} exercises to option {option_index+1}")
+                
+                if available_pool:
+                    #add rand exercises from the available pool
+                    for ex in random.sample(available_pool, min(missing_count, len(available_pool))):
+                        processed_exercises.append({
+                            "workout": ex["Title"],
+                            "image": self.exercise_db.get_exercise_icon(ex["Title"]),
+                            "sets": "3",
+                            "reps": "10-12",
+                            "instruction": ""
+                        })
+            else:  # Need to remove exercises
+                excess = len(processed_exercises) - expected_count
+                logger.info(f"removing {excess} exercises from option {option_index+1} (EXCESS)")
+                processed_exercises = processed_exercises[:expected_count]
+        
+        return processed_exercises
 
-NOTE: ALL OPTIONS MUST BE DIFFERENT in at least 2 exercises and ALL exercises must come from the list!!
+    def _create_strength_option(self, category: str, option_index: int, data: Optional[WorkoutRequest] = None,
+                                existing_options: Optional[List[List[Dict[str, Any]]]] = None) -> List[Dict[str, Any]]:
+        """Build a rule-based option when the LLM returned too few, avoiding exercises already used."""
+        used = {exercise["workout"] for option in (existing_options or []) for exercise in option}
+        return self.rule_generator.strength_option(category, option_index, data, used)
 
-For each exercise, add appropriate sets and reps:
-- You can use any format: single numbers (e.g. "10"), ranges (e.g. "8-12"), or time-based (e.g. "30s") depending on the exercise
-- Adjust sets and reps based on exercise difficulty and {data.fitnessLevel} level
-- Target different muscles within {category} for a balanced workout. DO NOT use two exercises for the same muscle group in one option.
-
-Return ONLY in this exact JSON format same placement of braces and commas (EVERYTHING in QUOTES, including numbers). Don't add any more information or markdown:
-{{
-  "options": [
-    [
-      {{ "workout": "Exercise 1", "sets": "3", "reps": "10-12" }},
-      {{ "workout": "Exercise 2", "sets": "4", "reps": "8" }},
-      {{ "workout": "Exercise 3", "sets": "3", "reps": "10" }},
-      {{ "workout": "Exercise 4", "sets": "3", "reps": "12" }}
-    ],
-    [
-      {{ "workout": "Exercise 1", "sets": "3", "reps": "12" }},
-      {{ "workout": "Exercise 2", "sets": "3", "reps": "10" }},
-      {{ "workout": "Exercise 3", "sets": "3", "reps": "15" }},
-      {{ "workout": "Exercise 4", "sets": "2", "reps": "30s" }},
-      {{ "workout": "Exercise 5", "sets": "3", "reps": "10" }}
-    ],
-    [
-      {{ "workout": "Exercise 1", "sets": "3", "reps": "10-12" }}, // Home-friendly
-      {{ "workout": "Exercise 2", "sets": "4", "reps": "8" }},// Home-friendly
-      {{ "workout": "Exercise 3", "sets": "3", "reps": "12" }},// Home-friendly
-      {{ "workout": "Exercise 4", "sets": "3", "reps": "15" }}// Home-friendly
-    ]
-  ]
-}}
-IMPORTANT: Make sure to put ALL values in quotes and format exactly as shown above.  NO EXPLANATION AND MATCH FORMAT EXACTLY! OTHERWISE RESPONSE IS INVALID!"""
+    async def _generate_strength_options(self, data: WorkoutRequest, category: str) -> dict:
+        """Generate strength training workout options."""
+        all_exercises = []
+        try:
+            # Get available exercises for this category
+            all_exercises = self._get_strength_exercises(category)
+            prompt = self._build_strength_prompt(data, category, all_exercises)
             
             logger.info("Requesting strength workout from LLM...")
             
             # Use ollama with very specific system instruction about JSON format
-            response = ollama.chat(
-                model="llama3.2",
+            response = await llm_client.chat_for_task(
+                "workout_strength",
                 messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a fitness API that returns only valid JSON. You must put ALL values in double quotes, including numbers. Format exactly as requested. Return ONLY the JSON with no explanation or markdown."
-                    },
+                    {"role": "system", "content": STRENGTH_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
-                options={"temperature": 0.5}  
+                label=category,
+                **structured_output.format_kwargs(StrengthOptionsOutput)
             )
             
             #extract content
@@ -632,13 +1269,16 @@ IMPORTANT: Make sure to put ALL values in quotes and format exactly as shown abo
             #log first 200 characters of response for debugging
             logger.info(f"th llama response (truncated): {content[:200]}...")
             
-            #parse with our safe parsing method
-            workout_data = self._parse_safe(content)
+            #validate against the schema, repair only if that fails
+            workout_data = self._parse_workout_response(
+                content, StrengthOptionsOutput, "workout_strength",
+                {"label": category, "model": response.get("model") or ""}
+            )
             options = workout_data.get("options", [])
             
             if not options:
                 logger.error("No valid workout options received from LLM, generating backup options")
-                return self._create_default_strength_options(category, all_exercises)
+                return self._create_default_strength_options(category, data)
             
             #verify exercise counts in options
             if len(options) != 3:
@@ -652,125 +1292,16 @@ IMPORTANT: Make sure to put ALL values in quotes and format exactly as shown abo
                     logger.warning(f"empty option found at index {option_index}")
                     continue
                 
-                processed_exercises = []
-                exercise_names = set()  #track exercise names to avoid duplicates
-                expected_count = 5 if option_index == 1 else 4  #second option should have 5 exercises
-                
-                logger.info(f"provessing option {option_index+1} with {len(option)} exercises (expected {expected_count})")
-                
-                for exercise in option:
-                    if "workout" not in exercise:
-                        logger.warning(f"missing 'workout' field in exercise: {exercise}")
-                        continue
-                        
-                    #skip dups within this option
-                    exercise_name = exercise["workout"]
-                    if exercise_name.lower() in exercise_names:
-                        logger.info(f"skipping the dup exercise: {exercise_name}")
-                        continue
-                    
-                    exercise_names.add(exercise_name.lower())
-                    
-                    #make sure that sets and reps are strings
-                    sets = str(exercise.get("sets", "3"))
-                    reps = str(exercise.get("reps", "10-12"))
-                    
-                    #add exercise
-                    processed_exercise = {
-                        "workout": exercise_name,
-                        "image": self.exercise_db.get_exercise_icon(exercise_name),
-                        "sets": sets,
-                        "reps": reps,
-                        "instruction": exercise.get("instruction", "")
-                    }
-                    processed_exercises.append(processed_exercise)
-                
-                processed_options.append(processed_exercises)
-            
-            #make sure we have the right number of exercises in each option
-            for i, option in enumerate(processed_options):
-                expected_count = 5 if i == 1 else 4  # Option 2 should have 5 exercises
-                
-                if len(option) != expected_count:
-                    logger.warning(f"Option {i+1} has {len(option)} exercises but should have {expected_count}")
-                    
-                    #select appropriate exercise pool
-                    #for option 3 (index 2), filter for home-friendly exercises
-                    if i == 2: 
-                        available_pool = [ex for ex in all_exercises 
-                                         if any(term in ex["Title"].lower() 
-                                               for term in ['push up', 'pull up', 'bodyweight', 
-                                                           'dumbbell', 'squat', 'lunge', 'plank'])]
-                        if not available_pool:  # Fallback if no home exercises found
-                            available_pool = all_exercises
-                    else:
-                        available_pool = all_exercises
-                    
-                    # Get current exercise names
-                    current_names = [ex["workout"].lower() for ex in option]
-                    
-                    # Filter out exercises we already have
-                    available_pool = [ex for ex in available_pool 
-                                     if ex["Title"].lower() not in current_names]
-                    
-                    #calc how many more/less we need
-                    if len(option) < expected_count:  # Need to add exercises
-                        missing_count = expected_count - len(option)
-                        logger.info(f"addomg {missing_count} exercises to option {i+1}")
-                        
-                        if available_pool and missing_count > 0:
-                            #add rand exercises from the available pool
-                            random_exercises = random.sample(available_pool, 
-                                                           min(missing_count, len(available_pool)))
-                            
-                            for ex in random_exercises:
-                                option.append({
-                                    "workout": ex["Title"],
-                                    "image": self.exercise_db.get_exercise_icon(ex["Title"]),
-                                    "sets": "3",
-                                    "reps": "10-12",
-                                    "instruction": ""
-                                })
-                    elif len(option) > expected_count:  # Need to remove exercises
-                        #remove excess exercises
-                        excess = len(option) - expected_count
-                        logger.info(f"removing {excess} exercises from option {i+1} (EXCESS)")
-                        option[:] = option[:expected_count]
+                processed_options.append(
+                    self._process_strength_option(option, len(processed_options), all_exercises, category)
+                )
             
             #ensure we have got 3 options
             while len(processed_options) < 3:
-                option_index = len(processed_options)
-                logger.warning(f"creating a new option {option_index+1} to ensure 3 options")
-                
-                #forr the home option
-                if option_index == 2: 
-                    #filter for home exercises
-                    exercise_pool = [ex for ex in all_exercises 
-                                    if any(term in ex["Title"].lower() 
-                                          for term in ['push up', 'pull up', 'bodyweight', 
-                                                      'dumbbell', 'squat', 'lunge', 'plank'])]
-                    if not exercise_pool:  # Fallback if no home exercises found
-                        exercise_pool = all_exercises
-                else:
-                    exercise_pool = all_exercises
-                
-                new_option = []
-                expected_count = 5 if option_index == 1 else 4
-                
-                if exercise_pool and len(exercise_pool) >= expected_count:
-                    #get rand exercises for this option
-                    random_exercises = random.sample(exercise_pool, min(expected_count, len(exercise_pool)))
-                    
-                    for ex in random_exercises:
-                        new_option.append({
-                            "workout": ex["Title"],
-                            "image": self.exercise_db.get_exercise_icon(ex["Title"]),
-                            "sets": "3",
-                            "reps": "10-12",
-                            "instruction": ""
-                        })
-                
-                processed_options.append(new_option)
+                logger.warning(f"creating a new option {len(processed_options)+1} to ensure 3 options")
+                processed_options.append(
+                    self._create_strength_option(category, len(processed_options), data, processed_options)
+                )
             
             logger.info(f"Successfully generated {len(processed_options)} strength workout options")
             return {
@@ -778,89 +1309,16 @@ IMPORTANT: Make sure to put ALL values in quotes and format exactly as shown abo
                 "category": category
             }
             
+        except LLMUnavailableError as e:
+            logger.warning(f"LLM unavailable for {category} options ({str(e)}), using default options")
+            return self._create_default_strength_options(category, data)
         except Exception as e:
             logger.error(f"Error in generate_strength_options: {str(e)}", exc_info=True)
-            return self._create_default_strength_options(category, all_exercises)
+            return self._create_default_strength_options(category, data)
 
-    def _create_default_strength_options(self, category: str, available_exercises=None) -> dict:
+    def _create_default_strength_options(self, category: str, data: Optional[WorkoutRequest] = None) -> dict:
         """Create default strength options when LLM fails."""
         logger.warning(f"Creating default strength options for {category} due to LLM failure")
-        options = []
-        
-        if not available_exercises:
-            logger.warning("No available exercises provided for defaults, using empty list")
-            available_exercises = []
-        
-        #create 3 different strength options
-        for i in range(3):
-            option = []
-            expected_count = 5 if i == 1 else 4  #option 2 should have 5 exercises
-            
-            #for home option
-            if i == 2:  #home-friendly option would be the third option
-                #filter for exercises that can be done at home
-                exercise_pool = [ex for ex in available_exercises 
-                                if any(term in ex["Title"].lower() 
-                                      for term in ['push up', 'pull up', 'bodyweight', 
-                                                  'dumbbell', 'squat', 'lunge', 'plank'])]
-                if not exercise_pool:  #fallback if no home exercises found
-                    exercise_pool = available_exercises
-            else:
-                exercise_pool = available_exercises
-            
-            if exercise_pool and len(exercise_pool) >= expected_count:
-                #get rand exercises for this option
-                random_exercises = random.sample(exercise_pool, min(expected_count, len(exercise_pool)))
-                
-                for ex in random_exercises:
-                    option.append({
-                        "workout": ex["Title"],
-                        "image": self.exercise_db.get_exercise_icon(ex["Title"]),
-                        "sets": "3",
-                        "reps": "10-12",
-                        "instruction": ""
-                    })
-            else:
-                # Use generic exercises based on category
-                generic_exercises = []
-                if category == "Upper Body":
-                    generic_exercises = ["Push Ups", "Pull Ups", "Dumbbell Shoulder Press", "Dumbbell Curls"]
-                    if i == 1:  #add 1 more for option 2
-                        generic_exercises.append("Tricep Dips")
-                elif category == "Lower Body":
-                    generic_exercises = ["Bodyweight Squats", "Lunges", "Calf Raises", "Glute Bridges"]
-                    if i == 1:  #add 1 more for option 2
-                        generic_exercises.append("Single Leg Deadlift")
-                elif category == "Push":
-                    generic_exercises = ["Push Ups", "Bench Press", "Dumbbell Shoulder Press", "Tricep Dips"]
-                    if i == 1:  #add 1 more for option 2
-                        generic_exercises.append("Incline Push Ups")
-                elif category == "Pull":
-                    generic_exercises = ["Pull Ups", "Dumbbell Rows", "Lat Pulldowns", "Dumbbell Curls"]
-                    if i == 1:  # Add 1 more for option 2
-                        generic_exercises.append("Face Pulls")
-                elif category == "Legs":
-                    generic_exercises = ["Bodyweight Squats", "Lunges", "Leg Press", "Leg Curls"]
-                    if i == 1:  #add 1 more for option 2
-                        generic_exercises.append("Calf Raises")
-                else:  # Full Body
-                    generic_exercises = ["Push Ups", "Pull Ups", "Bodyweight Squats", "Planks"]
-                    if i == 1:  #add one more for option 2
-                        generic_exercises.append("Burpees")
-                
-                for ex_name in generic_exercises:
-                    option.append({
-                        "workout": ex_name,
-                        "image": self.exercise_db.get_exercise_icon(ex_name),
-                        "sets": "3",
-                        "reps": "10-12",
-                        "instruction": ""
-                    })
-            
-            options.append(option)
-            logger.info(f"Created default {category} option {i+1} with {len(option)} exercises")
-            
-        return {
-            "options": options,
-            "category": category
-        }
\ No newline at end of file
+        result = self.rule_generator.generate(data, category)
+        result["_fallback"] = True
+        return result
@@ -1,16 +1,36 @@
-from fastapi import FastAPI, HTTPException, Request, File, UploadFile
+from fastapi import FastAPI, HTTPException, Request, File, UploadFile, Header
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse, JSONResponse
 import os
+import io
+from typing import Optional
+import json
+import asyncio
 from datetime import datetime
-from app.models.schemas import WorkoutRequest, FoodSuggestionRequest, FoodSuggestionResponse, TipRequest
-from app.engine.workout import WorkoutEngine
-from app.engine.food import EnhancedFoodEngine
-from app.engine.tip import TipEngine
-from app.engine.food_recognition import FoodRecognitionEngine
 import logging
 
+# Logging is configured once here; library modules only create their own loggers
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s [%(levelname)s] %(name)s - %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S')
+
+from app.models.schemas import WorkoutRequest, RegenerateOptionRequest, WeeklyPlanResponse, CalorieEstimateRequest, CalorieEstimateResponse, FoodSuggestionRequest, FoodSuggestionResponse, TipRequest
+from app.engine.workout import WorkoutEngine, CARDIO_SYSTEM_PROMPT, STRENGTH_SYSTEM_PROMPT
+from app.engine.food import EnhancedFoodEngine, FOOD_SYSTEM_PROMPT
+from app.engine.tip import TipEngine, TIP_SYSTEM_PROMPT
+from app.engine.food_recognition import FoodRecognitionEngine
+from app.utils.llm_client import llm_client
+from app.utils.llm_scheduler import llm_scheduler
+from app.utils.metrics import metrics
+from app.utils import llm_telemetry
+from app.utils.structured_output import parse_stats
+from app.utils.warmup import ModelWarmup
+from app.utils.deadline import Deadline
+from app.utils.calorie_estimator import calorie_estimator
+from app.utils.job_store import job_store, idempotency_key
+
 app = FastAPI()
 logger = logging.getLogger(__name__)
 
@@ -32,6 +52,11 @@ food_images_dir = os.path.join(base_dir, "data", "food-images")
 models_dir = os.path.join(base_dir, "data", "models")
 uploads_dir = os.path.join(base_dir, "data", "uploads")
 
+# Largest batch accepted by /estimate_cardio_calories/
+MAX_CALORIE_SESSIONS = int(os.getenv("MAX_CALORIE_SESSIONS", "10000"))
+# Longest a GET /jobs/{job_id}?wait= long-poll is held open
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "30"))
+
 # Initialize engines
 workout_engine = WorkoutEngine()
 enhanced_food_engine = EnhancedFoodEngine()
@@ -42,14 +67,92 @@ food_recognition_engine = FoodRecognitionEngine(os.path.join(models_dir, "resnet
 for directory in [workout_images_dir, icons_dir, cardio_images_dir, food_images_dir, models_dir, uploads_dir]:
     os.makedirs(directory, exist_ok=True)
 
+# Models and system prompts warmed up before the instance reports ready
+model_warmup = ModelWarmup([
+    ("workout_strength", STRENGTH_SYSTEM_PROMPT),
+    ("workout_cardio", CARDIO_SYSTEM_PROMPT),
+    ("tip", TIP_SYSTEM_PROMPT),
+    ("food_selection", FOOD_SYSTEM_PROMPT),
+])
+
+@app.on_event("startup")
+async def start_model_warmup():
+    """Start Ollama health checks, warm the engine models, watch the catalog files and open the Spoonacular session."""
+    llm_client.pool.start()
+    model_warmup.start()
+    workout_engine.snapshots.start()
+    enhanced_food_engine.spoonacular.start()
+
+@app.on_event("shutdown")
+async def shutdown_llm_client():
+    """Cancel running jobs and close the shared Ollama and Spoonacular connection pools on shutdown."""
+    await job_store.close()
+    await model_warmup.stop()
+    await workout_engine.snapshots.stop()
+    await enhanced_food_engine.spoonacular.close()
+    await llm_client.close()
+
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 503 until the models are loaded and warmed up."""
+    status = model_warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose LLM scheduler and engine metrics in the Prometheus text format."""
+    return metrics.render()
+
+@app.get("/metrics/llm_queue")
+async def get_llm_queue_stats():
+    """Current LLM scheduler state: active slots, queue depth and rejections."""
+    return llm_scheduler.stats()
+
+@app.get("/metrics/ollama_pool")
+async def get_ollama_pool_stats():
+    """Health and outstanding requests of every Ollama endpoint in the pool."""
+    return llm_client.pool.stats()
+
+@app.get("/metrics/llm_calls")
+async def get_llm_call_stats():
+    """Per engine, category/milestone and model token counts, throughput, queue wait and parse outcomes."""
+    return llm_telemetry.call_stats()
+
+@app.get("/metrics/model_router")
+async def get_model_router_stats():
+    """Per-task model choice with recent latency and token counts."""
+    return llm_client.router.stats()
+
+@app.get("/metrics/workout_cache")
+async def get_workout_cache_stats():
+    """Hit/miss counters of the profile-bucketed workout options cache."""
+    return {**workout_engine.options_cache.stats(), "weekly_plans": workout_engine.plan_cache.stats()}
+
+@app.get("/metrics/catalog")
+async def get_catalog_stats():
+    """Exercise catalog snapshot being served and the state of its hot reloading."""
+    return {**workout_engine.snapshots.stats(), "snapshot": workout_engine.snapshots.current.stats()}
+
+@app.get("/metrics/jobs")
+async def get_job_stats():
+    """Background jobs kept by the job store, per status."""
+    return job_store.stats()
+
+@app.get("/metrics/llm_parse")
+async def get_llm_parse_stats():
+    """Structured-output parse, repair and failure rates per engine."""
+    return parse_stats()
+
 @app.post("/generate_workout_options/")
-def generate_workout_options(data: WorkoutRequest):
+async def generate_workout_options(data: WorkoutRequest):
     try:
         print(f"Received request for multiple workout options: {data}")
         
         try:
             # Generate workout variations based on user goals and preferences
-            result = workout_engine.generate_workout_options(data, num_options=3)
+            result = await workout_engine.generate_workout_options(
+                data, num_options=3, deadline=Deadline.for_endpoint("workout_options")
+            )
             print(f"Generated workout options: {result}")
             return result
         except Exception as e:
@@ -60,6 +163,55 @@ def generate_workout_options(data: WorkoutRequest):
         print(f"Error in endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/regenerate_workout_option/")
+async def regenerate_workout_option(data: RegenerateOptionRequest):
+    """Replace the option at optionIndex and return all options; the other two are kept as sent."""
+    try:
+        logger.info(f"Received request to regenerate option {data.optionIndex} of {data.category}")
+        return await workout_engine.regenerate_option(
+            data, data.category, data.options, data.optionIndex, deadline=Deadline.for_endpoint("workout_option")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in workout option regeneration: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Workout option regeneration failed: {str(e)}")
+
+@app.post("/generate_weekly_plan/", response_model=WeeklyPlanResponse)
+async def generate_weekly_plan(data: WorkoutRequest):
+    """Options for every training day of the week; also warms the cache for the daily requests."""
+    try:
+        logger.info(f"Received request for weekly plan: {data}")
+        return await workout_engine.generate_weekly_plan(data, deadline=Deadline.for_endpoint("weekly_plan"))
+    except Exception as e:
+        logger.error(f"Error in weekly plan generation: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Weekly plan generation failed: {str(e)}")
+
+@app.post("/estimate_cardio_calories/", response_model=CalorieEstimateResponse)
+async def estimate_cardio_calories(data: CalorieEstimateRequest):
+    """Calorie ranges for many cardio sessions in one batch; a session's own weight overrides the request's."""
+    if len(data.sessions) > MAX_CALORIE_SESSIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CALORIE_SESSIONS} sessions per request")
+    estimates = calorie_estimator.estimate([session.dict() for session in data.sessions], data.weight)
+    return {
+        "sessions": estimates,
+        "totalLow": sum(estimate["caloriesLow"] for estimate in estimates),
+        "totalHigh": sum(estimate["caloriesHigh"] for estimate in estimates),
+    }
+
+@app.post("/generate_workout_options/stream")
+async def generate_workout_options_stream(data: WorkoutRequest):
+    """Stream workout options as NDJSON, one line per option as soon as it is generated."""
+    logger.info(f"Received streaming request for workout options: {data}")
+    
+    async def event_lines():
+        async for event in workout_engine.stream_workout_options(
+            data, deadline=Deadline.for_endpoint("workout_options")
+        ):
+            yield json.dumps(event) + "\n"
+    
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
+
 @app.post("/generate_food_suggestions/")
 async def generate_food_suggestions(data: FoodSuggestionRequest) -> FoodSuggestionResponse:
     """
@@ -73,7 +225,9 @@ async def generate_food_suggestions(data: FoodSuggestionRequest) -> FoodSuggesti
         logger.info(f"Received food suggestion request for user {data.userId}")
         
         # Generate suggestions using the enhanced engine
-        response = await enhanced_food_engine.generate_food_suggestions(data)
+        response = await enhanced_food_engine.generate_food_suggestions(
+            data, deadline=Deadline.for_endpoint("food_suggestions")
+        )
         
         logger.info(f"Generated {len(response.suggestions)} food suggestions for milestone: {response.milestone}")
         return response
@@ -97,7 +251,7 @@ async def generate_personalized_tip(data: TipRequest):
         user_data = data.dict()
         
         # Generate tip using the tip engine
-        response = await tip_engine.generate_personalized_tip(user_data)
+        response = await tip_engine.generate_personalized_tip(user_data, deadline=Deadline.for_endpoint("tip"))
         
         logger.info(f"Generated {response['category']} tip for user")
         return response
@@ -106,6 +260,28 @@ async def generate_personalized_tip(data: TipRequest):
         logger.error(f"Error generating tip: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Tip generation failed: {str(e)}")
 
+@app.post("/generate_personalized_tip/stream")
+async def generate_personalized_tip_stream(data: TipRequest):
+    """
+    Stream a personalized tip over Server-Sent Events
+    
+    The category and icon are sent first so the tip card can render
+    immediately, followed by the tip text as it is generated.
+    """
+    logger.info(f"Received streaming tip request for user {data.userId}")
+    user_data = data.dict()
+    
+    async def sse_events():
+        async for event in tip_engine.stream_personalized_tip(user_data, deadline=Deadline.for_endpoint("tip")):
+            event_type = event.pop("event")
+            yield f"event: {event_type}\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        sse_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/recognize_food/")
 async def recognize_food(image: UploadFile = File(...)):
     """
@@ -121,10 +297,13 @@ async def recognize_food(image: UploadFile = File(...)):
         if not image.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Process the image with the food recognition engine
-        result = food_recognition_engine.process_food_image(
-            image_file=image.file, 
-            filename=image.filename
+        # Process the image with the food recognition engine, in a worker thread so
+        # model inference and the USDA lookup do not block the event loop
+        result = await asyncio.to_thread(
+            food_recognition_engine.process_food_image,
+            image_file=image.file,
+            filename=image.filename,
+            deadline=Deadline.for_endpoint("recognize_food")
         )
         
         # Check for errors in the result
@@ -142,6 +321,65 @@ async def recognize_food(image: UploadFile = File(...)):
         logger.error(f"Error in food recognition: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Food recognition failed: {str(e)}")
 
+# Job mode: the same work as the endpoints above, run in the background. Submissions
+# return 202 with a job id at once; a retry with the same Idempotency-Key header
+# and body attaches to the existing job, submissions without the header never do.
+def _job_accepted(kind: str, key: Optional[str], factory) -> JSONResponse:
+    job, created = job_store.submit(kind, key, factory)
+    # a retry may attach to a finished job whose result is a pydantic model
+    return JSONResponse(status_code=202, content=jsonable_encoder({**job.to_dict(), "created": created}),
+                        headers={"Location": f"/jobs/{job.id}"})
+
+@app.post("/generate_workout_options/jobs", status_code=202)
+async def submit_workout_options_job(data: WorkoutRequest, idempotency_key_header: str = Header(None, alias="Idempotency-Key")):
+    logger.info(f"Received workout options job: {data}")
+    return _job_accepted(
+        "workout_options",
+        idempotency_key("workout_options", data.dict(), idempotency_key_header),
+        lambda: workout_engine.generate_workout_options(
+            data, num_options=3, deadline=Deadline.for_endpoint("workout_options")
+        )
+    )
+
+@app.post("/generate_food_suggestions/jobs", status_code=202)
+async def submit_food_suggestions_job(data: FoodSuggestionRequest, idempotency_key_header: str = Header(None, alias="Idempotency-Key")):
+    logger.info(f"Received food suggestion job for user {data.userId}")
+    return _job_accepted(
+        "food_suggestions",
+        idempotency_key("food_suggestions", data.dict(), idempotency_key_header),
+        lambda: enhanced_food_engine.generate_food_suggestions(data, deadline=Deadline.for_endpoint("food_suggestions"))
+    )
+
+@app.post("/recognize_food/jobs", status_code=202)
+async def submit_recognize_food_job(image: UploadFile = File(...), idempotency_key_header: str = Header(None, alias="Idempotency-Key")):
+    """The upload is read before returning; inference runs in a worker thread so it does not block the loop."""
+    logger.info(f"Received food recognition job for image: {image.filename}")
+    if not image.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    content = await image.read()
+    filename = image.filename
+    
+    async def recognize():
+        result = await asyncio.to_thread(
+            food_recognition_engine.process_food_image,
+            image_file=io.BytesIO(content),
+            filename=filename,
+            deadline=Deadline.for_endpoint("recognize_food")
+        )
+        if "error" in result:
+            raise HTTPException(status_code=500, detail=result["error"])
+        return result
+    
+    return _job_accepted("recognize_food", idempotency_key("recognize_food", content, idempotency_key_header), recognize)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """Job status, with the result once it succeeded; wait > 0 long-polls until it finishes."""
+    job = await job_store.wait(job_id, min(max(wait, 0), JOB_MAX_WAIT_SECONDS))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job.to_dict()
+
 @app.get("/workout-images/cardio/{image_name}")
 async def get_cardio_image(image_name: str):
     try:
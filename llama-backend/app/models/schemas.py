@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -13,6 +13,8 @@ class WorkoutRequest(BaseModel):
     workoutDays: int
     fitnessLevel: str
     lastWorkoutCategory: Optional[str] = None
+    # "llm", "rules" (rule-based, no LLM) or "auto" (rules only under load); defaults to WORKOUT_MODE
+    mode: Optional[str] = None
 
 class Exercise(BaseModel):
     workout: str
@@ -37,6 +39,51 @@ class WorkoutOptionsResponse(BaseModel):
     options: List[List[Dict[str, Any]]]  # List of workout option lists
     category: str
 
+# Replace one option of a previous /generate_workout_options/ result
+class RegenerateOptionRequest(WorkoutRequest):
+    category: str
+    options: List[List[Dict[str, Any]]]
+    optionIndex: int
+
+# Weekly plan: every training day of the week with its options
+class WeeklyPlanDay(BaseModel):
+    day: int
+    category: str
+    options: List[List[Dict[str, Any]]]
+
+class WeeklyPlanResponse(BaseModel):
+    goal: str
+    workoutDays: int
+    days: List[WeeklyPlanDay]
+
+# Calorie estimates for cardio sessions, e.g. a week of history; body weights in kg
+MAX_BODY_WEIGHT_KG = 400
+
+class CardioSession(BaseModel):
+    workout: str
+    duration: Optional[str] = None
+    intensity: Optional[str] = None
+    weight: Optional[float] = Field(None, gt=0, le=MAX_BODY_WEIGHT_KG)
+
+class CalorieEstimateRequest(BaseModel):
+    weight: float = Field(gt=0, le=MAX_BODY_WEIGHT_KG)
+    sessions: List[CardioSession]
+
+class CalorieEstimate(BaseModel):
+    workout: str
+    activity: str
+    intensity: str
+    met: float
+    minutes: float
+    caloriesLow: int
+    caloriesHigh: int
+    calories: str
+
+class CalorieEstimateResponse(BaseModel):
+    sessions: List[CalorieEstimate]
+    totalLow: int
+    totalHigh: int
+
 # Food-related schemas (existing)
 class MilestoneType(str, Enum):
     START = "START"              # 0% milestone
@@ -103,4 +150,31 @@ class TipRequest(BaseModel):
     workoutDays: Optional[int] = 3
     recentWorkouts: Optional[List[Dict[str, Any]]] = []
     foodLogs: Optional[List[Dict[str, Any]]] = []
-    caloriePercentage: Optional[float] = 0.0
\ No newline at end of file
+    caloriePercentage: Optional[float] = 0.0
+
+# Structured LLM output schemas (passed to Ollama as the JSON output format)
+class StrengthExerciseOutput(BaseModel):
+    workout: str
+    sets: str
+    reps: str
+
+class StrengthOptionsOutput(BaseModel):
+    options: List[List[StrengthExerciseOutput]]
+
+class CardioExerciseOutput(BaseModel):
+    workout: str
+    image: str
+    duration: str
+    intensity: str
+    format: str
+    description: str
+
+class CardioOptionsOutput(BaseModel):
+    options: List[List[CardioExerciseOutput]]
+
+class FoodSelectionOutput(BaseModel):
+    food_id: str
+    explanation: str
+
+class FoodSelectionsOutput(BaseModel):
+    selections: List[FoodSelectionOutput]
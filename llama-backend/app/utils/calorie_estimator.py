@@ -0,0 +1,191 @@
+import re
+import time
+import logging
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.cardio_image_mapper import CardioImageMapper
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ESTIMATE_SECONDS = metrics.histogram(
+    "calorie_estimate_seconds", "Time to estimate calories for a batch of cardio sessions",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.025)
+)
+
+INTENSITIES = ("Low", "Moderate", "High")
+
+# MET values (Compendium of Physical Activities) per CardioImageMapper activity, as (low, moderate, high)
+ACTIVITY_METS: Mapping[str, Tuple[float, float, float]] = MappingProxyType({
+    'running': (8.3, 9.8, 11.8),
+    'treadmill': (8.0, 9.0, 11.0),
+    'walking': (3.0, 4.3, 5.0),
+    'hiking': (5.3, 6.0, 7.8),
+    'climbing-stairs': (4.0, 8.0, 9.0),
+    'bicycle': (4.0, 8.0, 10.0),
+    'exercise-bike': (4.8, 6.8, 8.8),
+    'jumping-rope': (8.8, 11.8, 12.3),
+    'rowing': (4.8, 7.0, 8.5),
+    'swimming': (6.0, 8.3, 9.8),
+    'tennis': (5.0, 7.3, 8.0),
+    'basketball': (4.5, 6.5, 8.0),
+    'football': (5.0, 7.0, 10.0),
+    'squash': (6.0, 7.3, 12.0),
+    'volleyball': (3.0, 4.0, 8.0),
+    'yoga': (2.3, 2.5, 4.0),
+    'cardio': (5.0, 7.3, 8.0),
+})
+
+# Words the LLM uses for intensity, checked high first ("Moderate-High" is high)
+HIGH_WORDS = ("high", "vigorous", "hard", "intense", "hiit", "max", "sprint", "fast", "advanced")
+LOW_WORDS = ("low", "light", "easy", "gentle", "leisure", "recovery", "slow", "beginner")
+
+DEFAULT_MINUTES = 30.0
+DEFAULT_WEIGHT_KG = 70.0
+# The range shown to users: estimate +-10%, rounded down to tens
+RANGE_SPREAD = 0.1
+# Resolved names, durations and intensities kept in memory; the LLM repeats a small set
+MEMO_SIZE = 4096
+
+
+# "30 min", "20-25 minutes", "1.5 hours", "90 sec"
+DURATION_PATTERN = re.compile(
+    r"(\d+(?:\.\d+)?)(?:\s*(?:-|to)\s*(\d+(?:\.\d+)?))?\s*(hours?|hrs?|h|minutes?|mins?|m|seconds?|secs?|s)\b"
+)
+UNIT_MINUTES = {"h": 60.0, "m": 1.0, "s": 1 / 60}
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def parse_minutes(duration: Any) -> float:
+    """Minutes in a duration like "30 min", "20-25 minutes", "1 hour" or 45; 30 when unreadable."""
+    if isinstance(duration, (int, float)):
+        return float(duration) if duration > 0 else DEFAULT_MINUTES
+    text = str(duration or "").lower()
+    #hours and minutes win over seconds, which are usually the work/rest split of an interval format
+    matches = sorted(DURATION_PATTERN.findall(text), key=lambda match: match[2][0] == "s")
+    if matches:
+        low, high, unit = matches[0]
+        #a range like "20-30 min" counts as its middle
+        minutes = (float(low) + float(high or low)) / 2 * UNIT_MINUTES[unit[0]]
+    else:
+        numbers = re.findall(r"\d+(?:\.\d+)?", text)
+        minutes = float(numbers[0]) if numbers else DEFAULT_MINUTES
+    return minutes if minutes > 0 else DEFAULT_MINUTES
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def intensity_level(intensity: Optional[str]) -> int:
+    """Index into INTENSITIES for a free-text intensity; moderate when unclear."""
+    text = (intensity or "").lower()
+    if any(word in text for word in HIGH_WORDS):
+        return 2
+    if any(word in text for word in LOW_WORDS):
+        return 0
+    return 1
+
+
+class CalorieEstimator:
+    """
+    Calorie ranges for cardio sessions from MET x body weight x hours.
+
+    Each activity the CardioImageMapper knows has a low, moderate and high
+    MET value, kept as one NumPy table. A batch of sessions is turned into
+    row, intensity, weight and minute arrays, and every range is computed
+    with a handful of array operations, so a week of history costs about the
+    same as a single option. Names are matched with the image mapper, so any
+    name that gets a cardio image also gets a matching MET.
+    """
+
+    def __init__(self, mets: Mapping[str, Tuple[float, float, float]] = ACTIVITY_METS):
+        self.activities: List[str] = list(mets)
+        self._rows: Dict[str, int] = {activity: row for row, activity in enumerate(self.activities)}
+        self._table = np.array([mets[activity] for activity in self.activities], dtype=np.float64)
+        # image filename -> activity, to read the mapper's result back
+        self._image_activities: Dict[str, str] = {
+            image: key for key, image in CardioImageMapper.CARDIO_IMAGES.items() if key in self._rows
+        }
+        self._generic_row = self._rows.get("cardio", 0)
+        # Per estimator, so the memo goes away with it
+        self._row = lru_cache(maxsize=MEMO_SIZE)(self._resolve_row)
+
+    def activity(self, workout: str, image: Optional[str] = None) -> str:
+        """MET table activity for a workout name, falling back to its image when the name is generic."""
+        return self.activities[self._row(workout or "", image or "")]
+
+    def _resolve_row(self, workout: str, image: str) -> int:
+        row = self._row_for_image(CardioImageMapper.get_image_path(workout))
+        if row == self._generic_row and image:
+            row = self._row_for_image(image)
+        return row
+
+    def _row_for_image(self, image_path: str) -> int:
+        activity = self._image_activities.get(image_path.rsplit("/", 1)[-1])
+        return self._rows[activity] if activity is not None else self._generic_row
+
+    def met(self, workout: str, intensity: Optional[str] = None, image: Optional[str] = None) -> float:
+        return float(self._table[self._row(workout or "", image or ""), intensity_level(intensity)])
+
+    def estimate(self, sessions: Sequence[Mapping[str, Any]],
+                 weight: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Estimate a batch of sessions at once.
+
+        Each session has a "workout" name and optionally "duration",
+        "intensity", "image" and "weight" (kg, defaults to the weight argument).
+        Returns per session the activity, MET, minutes and the calorie range.
+        """
+        started = time.perf_counter()
+        if not sessions:
+            return []
+        default_weight = weight if weight else DEFAULT_WEIGHT_KG
+        rows = np.fromiter((self._row(str(session.get("workout") or ""), str(session.get("image") or ""))
+                            for session in sessions), dtype=np.intp, count=len(sessions))
+        levels = np.fromiter((intensity_level(session.get("intensity")) for session in sessions),
+                             dtype=np.intp, count=len(sessions))
+        minutes = np.fromiter((parse_minutes(session.get("duration")) for session in sessions),
+                              dtype=np.float64, count=len(sessions))
+        weights = np.fromiter((session.get("weight") or default_weight for session in sessions),
+                              dtype=np.float64, count=len(sessions))
+
+        mets = self._table[rows, levels]
+        low, high = self.calorie_ranges(mets, weights, minutes)
+
+        results = [
+            {
+                "workout": session.get("workout"),
+                "activity": self.activities[row],
+                "intensity": INTENSITIES[level],
+                "met": met,
+                "minutes": minute,
+                "caloriesLow": calories_low,
+                "caloriesHigh": calories_high,
+                "calories": f"{calories_low}-{calories_high}",
+            }
+            for session, row, level, met, minute, calories_low, calories_high in zip(
+                sessions, rows.tolist(), levels.tolist(), mets.tolist(), minutes.tolist(), low.tolist(), high.tolist()
+            )
+        ]
+        ESTIMATE_SECONDS.observe(time.perf_counter() - started)
+        return results
+
+    @staticmethod
+    def calorie_ranges(mets: np.ndarray, weights: np.ndarray, minutes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Low and high kcal (MET x kg x hours, +-RANGE_SPREAD, rounded down to tens) for aligned arrays."""
+        kcal = mets * weights * (minutes / 60.0)
+        low = np.floor(kcal * (1 - RANGE_SPREAD) / 10) * 10
+        high = np.maximum(np.floor(kcal * (1 + RANGE_SPREAD) / 10) * 10, low + 10)
+        return low.astype(np.int64), high.astype(np.int64)
+
+    def annotate(self, options: List[List[Dict[str, Any]]], weight: Optional[float]) -> List[List[Dict[str, Any]]]:
+        """Set "calories" on every cardio exercise of a list of options, in one batch."""
+        exercises = [exercise for option in options for exercise in option if exercise.get("is_cardio")]
+        for exercise, estimate in zip(exercises, self.estimate(exercises, weight)):
+            exercise["calories"] = estimate["calories"]
+        return options
+
+
+calorie_estimator = CalorieEstimator()
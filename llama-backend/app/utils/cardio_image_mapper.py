@@ -1,9 +1,31 @@
+from functools import lru_cache
 from typing import Dict, List, Optional
 
+from app.utils.keyword_automaton import KeywordAutomaton
+
+# Cardio exercises of the exercise database; a name has to contain one of them to get a cardio image
+# there. Each contains a DATABASE_IMAGE_RULES keyword, so such a name always gets a rule's image.
+DATABASE_CARDIO_NAMES = ("Treadmill Running", "Outdoor Running", "Walking", "Cycling", "Exercise Bike",
+                         "Jump Rope", "Swimming", "Hiking")
+# Exercise database cardio images by keyword, first match in this order wins
+DATABASE_IMAGE_RULES = [
+    ("treadmill", "treadmill.webp"),
+    ("running", "running.webp"),
+    ("walking", "walking.webp"),
+    ("exercise bike", "exercise-bike.webp"),
+    ("cycling", "bicycle.webp"),
+    ("bike", "bicycle.webp"),
+    ("jump rope", "jumping-rope.webp"),
+    ("swimming", "swimming.webp"),
+    ("hiking", "hiking.webp"),
+]
+
 class CardioImageMapper:
     """
     A utility class that maps cardio exercise names to appropriate image files.
     This class uses keyword matching to determine the most appropriate image for any cardio workout.
+    Image keys and keywords, and the exercise database's cardio rules, are compiled into one
+    automaton, so a name is scanned once by either lookup.
     """
     
     # Available cardio images
@@ -65,7 +87,57 @@ class CardioImageMapper:
     # Default image to use if no match
     DEFAULT_IMAGE = 'cardio.webp'
     
+    # Resolved names kept in memory; LLM output repeats the same few activities
+    MEMO_SIZE = 4096
+    
+    _matcher: Optional[KeywordAutomaton] = None
+    _mapper_paths: List[str] = []
+    _database_ranking: list = []
+    _database_paths: List[str] = []
+    
     @classmethod
+    def _compiled(cls) -> KeywordAutomaton:
+        """
+        One automaton over the mapper's patterns (image keys, then keywords in order)
+        followed by the database rules and cardio names. The mapper's patterns come
+        first, so the lowest index found is the mapper's match whenever it has one;
+        the database rules get a ranking of their own, gated on the cardio names.
+        """
+        if cls._matcher is None:
+            patterns, paths = [], []
+            for image_key in cls.CARDIO_IMAGES:
+                patterns.append(image_key)
+                paths.append(f"/workout-images/cardio/{cls.CARDIO_IMAGES[image_key]}")
+            for keywords, image_key in cls.KEYWORD_MAPPINGS:
+                for keyword in keywords:
+                    patterns.append(keyword)
+                    paths.append(f"/workout-images/cardio/{cls.CARDIO_IMAGES[image_key]}")
+            rules_start = len(patterns)
+            patterns += [keyword for keyword, _ in DATABASE_IMAGE_RULES]
+            names_start = len(patterns)
+            patterns += [name.lower() for name in DATABASE_CARDIO_NAMES]
+            
+            matcher = KeywordAutomaton(patterns, ignore_case=True)
+            cls._mapper_paths = paths
+            cls._database_ranking = matcher.precedence(range(rules_start, names_start),
+                                                       required=range(names_start, len(patterns)))
+            cls._database_paths = [f"/workout-images/cardio/{image}" for _, image in DATABASE_IMAGE_RULES]
+            cls._matcher = matcher
+        return cls._matcher
+    
+    @classmethod
+    def database_image(cls, exercise_name: str) -> Optional[str]:
+        """
+        Exercise database cardio image: the first DATABASE_IMAGE_RULES keyword in
+        the name, if it contains one of DATABASE_CARDIO_NAMES; otherwise None.
+        """
+        if cls._matcher is None:
+            cls._compiled()
+        rank = KeywordAutomaton.first_ranked(exercise_name, cls._database_ranking)
+        return cls._database_paths[rank] if rank is not None else None
+    
+    @classmethod
+    @lru_cache(maxsize=MEMO_SIZE)
     def get_image_path(cls, exercise_name: str) -> str:
         """
         Maps a cardio exercise name to the most appropriate image file path.
@@ -79,17 +151,12 @@ class CardioImageMapper:
         if not exercise_name:
             return f"/workout-images/cardio/{cls.DEFAULT_IMAGE}"
             
-        exercise_lower = exercise_name.lower()
-        
-        # First check for direct matches with image keys
-        for image_key in cls.CARDIO_IMAGES.keys():
-            if image_key in exercise_lower:
-                return f"/workout-images/cardio/{cls.CARDIO_IMAGES[image_key]}"
-        
-        # Then check for keyword matches
-        for keywords, image_key in cls.KEYWORD_MAPPINGS:
-            if any(keyword in exercise_lower for keyword in keywords):
-                return f"/workout-images/cardio/{cls.CARDIO_IMAGES[image_key]}"
+        # Direct matches with image keys win over keyword matches, as listed
+        if cls._matcher is None:
+            cls._compiled()
+        rank = cls._matcher.first(exercise_name)
+        if rank is not None and rank < len(cls._mapper_paths):
+            return cls._mapper_paths[rank]
         
         # Default image if no match found
         return f"/workout-images/cardio/{cls.DEFAULT_IMAGE}"
@@ -0,0 +1,167 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Callable, FrozenSet, Generic, Iterator, Mapping, Sequence, Tuple, TypeVar
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the catalog files; 0 turns hot reloading off
+RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "30"))
+
+RELOADS_TOTAL = metrics.counter(
+    "catalog_reloads_total", "Catalog snapshot rebuilds after the files changed", ["outcome"]
+)
+RELOAD_SECONDS = metrics.histogram(
+    "catalog_reload_seconds", "Time to build a new catalog snapshot",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+CATALOG_VERSION = metrics.gauge(
+    "catalog_version", "Version of the catalog snapshot being served"
+)
+
+T = TypeVar("T")
+
+
+class ImageManifest:
+    """File names present in each image directory when a snapshot was built."""
+
+    def __init__(self, directories: Mapping[str, str]):
+        self.files: Dict[str, FrozenSet[str]] = {}
+        for name, path in directories.items():
+            try:
+                self.files[name] = frozenset(entry.name for entry in os.scandir(path) if entry.is_file())
+            except FileNotFoundError:
+                self.files[name] = frozenset()
+
+    def has(self, directory: str, filename: str) -> bool:
+        return filename in self.files.get(directory, ())
+
+    def counts(self) -> Dict[str, int]:
+        return {name: len(files) for name, files in self.files.items()}
+
+
+def file_fingerprint(paths: Sequence[str]) -> Tuple:
+    """(mtime, size) of every path; a directory's mtime changes when files are added, removed or renamed."""
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+class CatalogReloader(Generic[T]):
+    """
+    Serves an immutable snapshot of everything built from the catalog files
+    and rebuilds it in the background when they change.
+
+    A background task stats the watched paths every interval seconds. When
+    the fingerprint changes, build(version) runs in a worker thread and the
+    new snapshot replaces the old one with a single assignment, so readers
+    never take a lock and never see a half-built snapshot. A failed build is
+    logged and the previous snapshot stays in service.
+
+    pin() is a context manager fixing the snapshot for the current asyncio
+    context: the code inside it, and any task it starts, keeps using that
+    snapshot even if a newer one is swapped in meanwhile.
+    """
+
+    def __init__(self, name: str, build: Callable[[int], T], watched_paths: Sequence[str],
+                 interval: Optional[float] = None):
+        self.name = name
+        self.build = build
+        self.watched_paths = list(watched_paths)
+        self.interval = interval if interval is not None else RELOAD_INTERVAL
+        self.version = 1
+        self._fingerprint = file_fingerprint(self.watched_paths)
+        self._current: T = build(self.version)
+        self._pinned: ContextVar[Optional[T]] = ContextVar(f"{name}_snapshot", default=None)
+        self._task: Optional[asyncio.Task] = None
+        self.reloaded_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        CATALOG_VERSION.set(self.version)
+
+    @property
+    def current(self) -> T:
+        """The snapshot pinned to this context, else the newest one."""
+        pinned = self._pinned.get()
+        return pinned if pinned is not None else self._current
+
+    @contextmanager
+    def pin(self) -> Iterator[T]:
+        """Keep using the current snapshot inside the with block; yields it."""
+        snapshot = self.current
+        token = self._pinned.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            try:
+                self._pinned.reset(token)
+            except ValueError:
+                # an abandoned stream is closed by the event loop in another context,
+                # where nothing was pinned
+                pass
+
+    def start(self):
+        """Watch the files in the background (called on application startup)."""
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.ensure_future(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reload_if_changed()
+            except Exception as e:
+                logger.error(f"Error checking {self.name} files: {str(e)}", exc_info=True)
+
+    async def reload_if_changed(self) -> bool:
+        """Rebuild and swap in a new snapshot if the watched files changed; True if swapped."""
+        fingerprint = await asyncio.to_thread(file_fingerprint, self.watched_paths)
+        if fingerprint == self._fingerprint:
+            return False
+        # remembered before building, so a broken file is not rebuilt on every check
+        self._fingerprint = fingerprint
+        started = time.perf_counter()
+        try:
+            snapshot = await asyncio.to_thread(self.build, self.version + 1)
+        except Exception as e:
+            self.last_error = str(e)
+            RELOADS_TOTAL.inc(outcome="failed")
+            logger.error(f"Rebuilding {self.name} failed, keeping version {self.version}: {str(e)}")
+            return False
+        RELOAD_SECONDS.observe(time.perf_counter() - started)
+        self.version += 1
+        self._current = snapshot
+        self.reloaded_at = time.time()
+        self.last_error = None
+        RELOADS_TOTAL.inc(outcome="swapped")
+        CATALOG_VERSION.set(self.version)
+        logger.info(f"Swapped in {self.name} version {self.version} in {time.perf_counter() - started:.2f}s")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "interval_seconds": self.interval,
+            "reloaded_at": self.reloaded_at,
+            "last_error": self.last_error,
+            "watched_paths": self.watched_paths,
+        }
@@ -0,0 +1,105 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Optional
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Default latency budget per endpoint in seconds, overridable with DEADLINE_<ENDPOINT>
+ENDPOINT_BUDGETS: Dict[str, float] = {
+    "workout_options": 8.0,
+    "weekly_plan": 12.0,
+    "workout_option": 5.0,
+    "food_suggestions": 8.0,
+    "tip": 5.0,
+    "recognize_food": 10.0,
+}
+
+# Time kept back from every stage to build the fallback and send the response
+DEADLINE_RESERVE = float(os.getenv("DEADLINE_RESERVE", "0.25"))
+
+DEADLINE_EXCEEDED_TOTAL = metrics.counter(
+    "deadline_exceeded_total", "Stages that ran out of their request's latency budget", ["stage"]
+)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage cannot finish within the request's remaining budget."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded in stage: {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    Absolute latency budget for one request.
+
+    Created once per endpoint call and passed down through every engine stage,
+    so each upstream call only gets whatever time the request has left.
+    """
+
+    def __init__(self, budget_seconds: float, reserve_seconds: Optional[float] = None):
+        self.budget_seconds = budget_seconds
+        self.reserve_seconds = DEADLINE_RESERVE if reserve_seconds is None else reserve_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    @classmethod
+    def for_endpoint(cls, endpoint: str) -> "Deadline":
+        """Deadline using the configured budget of an endpoint."""
+        default = ENDPOINT_BUDGETS.get(endpoint, 10.0)
+        return cls(float(os.getenv(f"DEADLINE_{endpoint.upper()}", str(default))))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Time a stage may take: what is left minus the reserve, optionally capped."""
+        available = max(0.0, self.remaining() - self.reserve_seconds)
+        return min(available, cap) if cap is not None else available
+
+    @property
+    def expired(self) -> bool:
+        return self.timeout() <= 0
+
+
+def record_exceeded(stage: str):
+    DEADLINE_EXCEEDED_TOTAL.inc(stage=stage)
+    logger.warning(f"Latency budget exhausted in stage: {stage}")
+
+
+def _log_background_failure(stage: str, task: asyncio.Future):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background work of stage {stage} failed: {task.exception()}")
+
+
+async def within_deadline(awaitable: Awaitable[Any], deadline: Optional[Deadline], stage: str,
+                          cap: Optional[float] = None) -> Any:
+    """
+    Await a stage with whatever budget the request has left.
+
+    The awaitable runs as its own task behind a shield, so neither running out
+    of time nor the caller being cancelled stops it: it finishes in the
+    background (e.g. filling a cache for the next caller, or letting the LLM
+    call that holds a scheduler slot complete). Raises DeadlineExceeded when
+    time runs out, including when no budget was left to begin with.
+    """
+    if deadline is None and cap is None:
+        return await awaitable
+
+    task = asyncio.ensure_future(awaitable)
+    timeout = deadline.timeout(cap) if deadline is not None else cap
+    try:
+        if timeout <= 0:
+            raise asyncio.TimeoutError()
+        return await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+    except asyncio.CancelledError:
+        task.add_done_callback(lambda done: _log_background_failure(stage, done))
+        raise
+    except asyncio.TimeoutError:
+        task.add_done_callback(lambda done: _log_background_failure(stage, done))
+        record_exceeded(stage)
+        raise DeadlineExceeded(stage)
@@ -0,0 +1,211 @@
+import os
+import re
+import logging
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional, Dict, List, Mapping, Tuple, Iterable
+
+import pandas as pd
+
+from app.utils.exercise_index import HOME_EQUIPMENT, infer_equipment
+from app.utils.exercise_resolver import ExerciseNameResolver, ExerciseMatch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV_PATH = 'data/exercises.csv'
+# Image directories the catalog's Image and Icon columns point into
+DEFAULT_IMAGE_DIRS: Mapping[str, str] = MappingProxyType({
+    "images": 'data/workout-images',
+    "icons": 'data/workout-images/icons',
+    "cardio": 'data/workout-images/cardio',
+})
+
+# Body parts that make up each workout category
+CATEGORY_BODY_PARTS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "Push": ("Chest", "Shoulders", "Triceps"),
+    "Pull": ("Back", "Biceps"),
+    "Legs": ("Legs",),
+    "Upper Body": ("Chest", "Back", "Shoulders", "Biceps", "Triceps"),
+    "Lower Body": ("Legs",),
+    "Full Body": ("Chest", "Back", "Shoulders", "Biceps", "Triceps", "Legs", "Abdominals"),
+    "Core": ("Abdominals",),
+    "Cardio": ("Cardio",),
+})
+
+# Finer primary muscle for body parts the CSV lumps together, first match wins
+PRIMARY_MUSCLE_KEYWORDS: Mapping[str, List[Tuple[str, Tuple[str, ...]]]] = MappingProxyType({
+    "Legs": [
+        ("Calves", ("calf",)),
+        ("Hamstrings", ("leg curl", "romanian", "good morning", "glute ham", "deadlift")),
+        ("Glutes", ("glute", "hip", "abduction", "clam", "kick", "frog pump", "fire hydrant", "bird dog")),
+        ("Quads", ("squat", "lunge", "leg press", "leg extension", "step up", "wall sit", "jump", "burpee")),
+    ],
+})
+
+ICON_PATH = "/workout-images/icons/{}"
+IMAGE_PATH = "/workout-images/{}"
+
+
+def infer_primary_muscle(title: str, body_part: str) -> str:
+    lowered = title.lower()
+    for muscle, keywords in PRIMARY_MUSCLE_KEYWORDS.get(body_part, []):
+        if any(keyword in lowered for keyword in keywords):
+            return muscle
+    return body_part
+
+
+def normalize_name(name: str) -> str:
+    """Lookup key for an exercise name: lowercase, single spaces, no punctuation."""
+    return " ".join(re.findall(r"[a-z0-9]+", name.lower()))
+
+
+class ExerciseCatalog:
+    """
+    Read-only view of the exercise CSV, parsed once and shared.
+
+    Everything requests need is precomputed here: records per body part and
+    per category as tuples, a normalized name -> record dict, the icon and
+    image paths per title and a fuzzy resolver for LLM names. Records are read-only mappings so no caller can
+    change the catalog for everyone else, and lookups never touch pandas.
+
+    Each record is tagged with its Equipment, HomeFriendly and PrimaryMuscle
+    (taken from CSV columns of that name when present, inferred from the
+    title otherwise). Tags and categories are also kept as bitsets over
+    record positions, so select() answers questions like "home-friendly
+    Push exercises not used yet" with a few integer operations.
+    """
+
+    def __init__(self, records: List[Dict[str, str]], source: str = ""):
+        self.source = source
+        self.records: Tuple[Mapping[str, str], ...] = tuple(
+            MappingProxyType(self._tagged(record)) for record in records if record.get("Title")
+        )
+        self._positions: Dict[str, int] = {record["Title"]: position for position, record in enumerate(self.records)}
+
+        by_body_part: Dict[str, List[Mapping[str, str]]] = {}
+        for record in self.records:
+            by_body_part.setdefault(record.get("BodyPart", ""), []).append(record)
+        self.by_body_part: Mapping[str, Tuple[Mapping[str, str], ...]] = MappingProxyType(
+            {body_part: tuple(records) for body_part, records in by_body_part.items()}
+        )
+        # strength categories only; cardio activities are not part of the CSV
+        self.by_category: Mapping[str, Tuple[Mapping[str, str], ...]] = MappingProxyType({
+            category: tuple(record for body_part in body_parts for record in self.by_body_part.get(body_part, ()))
+            for category, body_parts in CATEGORY_BODY_PARTS.items() if category != "Cardio"
+        })
+
+        # bitsets over record positions
+        self.category_bits: Mapping[str, int] = MappingProxyType(
+            {category: self._bits(record["Title"] for record in records) for category, records in self.by_category.items()}
+        )
+        self.equipment_bits: Mapping[str, int] = MappingProxyType(self._group_bits("Equipment"))
+        self.muscle_bits: Mapping[str, int] = MappingProxyType(self._group_bits("PrimaryMuscle"))
+        self.home_bits: int = self._bits(record["Title"] for record in self.records if record["HomeFriendly"] == "yes")
+
+        self.by_name: Mapping[str, Mapping[str, str]] = MappingProxyType(
+            {normalize_name(record["Title"]): record for record in reversed(self.records)}
+        )
+        self.icons: Mapping[str, str] = MappingProxyType(
+            {record["Title"]: ICON_PATH.format(record["Icon"]) for record in self.records if record.get("Icon")}
+        )
+        self.images: Mapping[str, str] = MappingProxyType(
+            {record["Title"]: IMAGE_PATH.format(record["Image"]) for record in self.records if record.get("Image")}
+        )
+        self.resolver = ExerciseNameResolver([record["Title"] for record in self.records])
+        logger.info(f"Exercise catalog ready: {len(self.records)} exercises, {len(self.by_category)} categories")
+
+    @staticmethod
+    def _tagged(record: Dict[str, str]) -> Dict[str, str]:
+        tagged = {str(key): str(value) for key, value in record.items() if not str(key).startswith("Unnamed")}
+        if not tagged.get("Equipment"):
+            tagged["Equipment"] = infer_equipment(tagged["Title"])
+        if tagged.get("HomeFriendly") not in ("yes", "no"):
+            tagged["HomeFriendly"] = "yes" if tagged["Equipment"] in HOME_EQUIPMENT else "no"
+        if not tagged.get("PrimaryMuscle"):
+            tagged["PrimaryMuscle"] = infer_primary_muscle(tagged["Title"], tagged.get("BodyPart", ""))
+        return tagged
+
+    def _bits(self, titles: Iterable[str]) -> int:
+        bits = 0
+        for title in titles:
+            if title in self._positions:
+                bits |= 1 << self._positions[title]
+        return bits
+
+    def _group_bits(self, tag: str) -> Dict[str, int]:
+        groups: Dict[str, int] = {}
+        for position, record in enumerate(self.records):
+            groups[record[tag]] = groups.get(record[tag], 0) | (1 << position)
+        return groups
+
+    @classmethod
+    def from_csv(cls, csv_path: str = DEFAULT_CSV_PATH) -> "ExerciseCatalog":
+        return cls(pd.read_csv(csv_path).fillna("").to_dict('records'), source=csv_path)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def category(self, category: str) -> Tuple[Mapping[str, str], ...]:
+        """Exercises of a strength category, empty for unknown categories and cardio."""
+        return self.by_category.get(category, ())
+
+    def get(self, name: str) -> Optional[Mapping[str, str]]:
+        """Record for an exercise name, ignoring case, spacing and punctuation."""
+        return self.by_name.get(normalize_name(name))
+
+    def mask(self, names: Iterable[str]) -> int:
+        """Bitset of the catalog exercises among names (matched like get())."""
+        return self._bits(record["Title"] for record in map(self.get, names) if record is not None)
+
+    def select(self, category: Optional[str] = None, equipment: Optional[Iterable[str]] = None,
+               home: Optional[bool] = None, muscle: Optional[str] = None,
+               exclude: Iterable[str] = ()) -> Tuple[Mapping[str, str], ...]:
+        """Exercises matching every given tag, minus excluded names, in catalog order."""
+        bits = self.category_bits.get(category, 0) if category is not None else (1 << len(self.records)) - 1
+        if equipment is not None:
+            bits &= self._bits_any(self.equipment_bits, equipment)
+        if home is not None:
+            bits = bits & self.home_bits if home else bits & ~self.home_bits
+        if muscle is not None:
+            bits &= self.muscle_bits.get(muscle, 0)
+        bits &= ~self.mask(exclude)
+        selected = []
+        while bits:
+            lowest = bits & -bits
+            selected.append(self.records[lowest.bit_length() - 1])
+            bits ^= lowest
+        return tuple(selected)
+
+    @staticmethod
+    def _bits_any(groups: Mapping[str, int], keys: Iterable[str]) -> int:
+        bits = 0
+        for key in keys:
+            bits |= groups.get(key, 0)
+        return bits
+
+    def resolve(self, name: str) -> Optional[ExerciseMatch]:
+        """Nearest catalog exercise for an LLM name, None when not confident."""
+        return self.resolver.resolve(name)
+
+    def title(self, name: str) -> Optional[str]:
+        """Catalog title for a name that is the same exercise once normalized ("DB Bench Presses"), else None."""
+        match = self.resolve(name)
+        return match.title if match is not None and match.exact else None
+
+    def icon(self, name: str) -> Optional[str]:
+        match = self.resolve(name)
+        return self.icons.get(match.title) if match is not None else None
+
+    def image(self, name: str) -> Optional[str]:
+        match = self.resolve(name)
+        return self.images.get(match.title) if match is not None else None
+
+
+@lru_cache(maxsize=None)
+def _load_catalog(csv_path: str) -> ExerciseCatalog:
+    return ExerciseCatalog.from_csv(csv_path)
+
+
+def load_catalog(csv_path: str = DEFAULT_CSV_PATH) -> ExerciseCatalog:
+    """The shared catalog for a CSV file; the file is only parsed the first time."""
+    return _load_catalog(os.path.abspath(csv_path))
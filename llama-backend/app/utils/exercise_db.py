@@ -1,77 +1,63 @@
-import pandas as pd
 import os
-from typing import Dict, List
+from functools import lru_cache
+from typing import Optional, Dict, List
+
+from app.utils.exercise_catalog import ExerciseCatalog, CATEGORY_BODY_PARTS, DEFAULT_CSV_PATH, load_catalog
+from app.utils.cardio_image_mapper import CardioImageMapper, DATABASE_CARDIO_NAMES
+
+IMAGE_MEMO_SIZE = 4096
 
 class ExerciseDatabase:
-    def __init__(self, csv_path: str = 'data/exercises.csv'):
-        self.df = pd.read_csv(csv_path)
-        self.exercise_dict = self.df.set_index('Title')['Icon'].to_dict()
+    def __init__(self, csv_path: str = DEFAULT_CSV_PATH, catalog: Optional[ExerciseCatalog] = None):
+        # the CSV is parsed once and shared with the workout engine
+        self.catalog = catalog or load_catalog(csv_path)
+        self.exercise_dict = {record["Title"]: record["Icon"] for record in self.catalog.records}
         
         # Add cardio exercises to the dictionary
-        self.cardio_exercises = {
-            "Treadmill Running": "cardio.webp",
-            "Outdoor Running": "cardio.webp",
-            "Walking": "cardio.webp",
-            "Cycling": "cardio.webp",
-            "Exercise Bike": "cardio.webp",
-            "Jump Rope": "cardio.webp",
-            "Swimming": "cardio.webp",
-            "Hiking": "cardio.webp",
-        }
+        self.cardio_exercises = {name: "cardio.webp" for name in DATABASE_CARDIO_NAMES}
         
         # Update the exercise dictionary with cardio exercises
         self.exercise_dict.update(self.cardio_exercises)
         
+        # Whole lookups are memoized: the LLM repeats a small set of names, and the
+        # catalog is immutable for the life of this object (a reload builds a new one)
+        self._icon = lru_cache(maxsize=IMAGE_MEMO_SIZE)(self._resolve_icon)
+        self._image = lru_cache(maxsize=IMAGE_MEMO_SIZE)(self._resolve_image)
+        
         # Define workout category mapping
-        self.workout_categories = {
-            'Legs': ['Legs'],
-            'Push': ['Chest', 'Shoulders', 'Triceps'],
-            'Pull': ['Back', 'Biceps'],
-            'Core': ['Abdominals'],
-            'Upper Body': ['Chest', 'Back', 'Shoulders', 'Biceps', 'Triceps'],
-            'Lower Body': ['Legs'],
-            'Full Body': ['Chest', 'Back', 'Shoulders', 'Biceps', 'Triceps', 'Legs', 'Abdominals'],
-            'Cardio': ['Cardio']
-        }
+        self.workout_categories = {category: list(body_parts) for category, body_parts in CATEGORY_BODY_PARTS.items()}
     
     def get_exercise_icon(self, exercise_name: str) -> str:
         """Get the icon path for a given exercise name."""
+        return self._icon(exercise_name)
+    
+    def _resolve_icon(self, exercise_name: str) -> str:
         if exercise_name in self.exercise_dict:
             # Use the correct path that matches your directory structure
             return f"/workout-images/icons/{self.exercise_dict[exercise_name]}"
-        # Check if it's a cardio exercise by partial match
-        for cardio_name in self.cardio_exercises:
-            if cardio_name.lower() in exercise_name.lower():
-                return f"/workout-images/icons/{self.cardio_exercises[cardio_name]}"
+        # LLM names often differ from the catalog title (abbreviations, plurals, typos)
+        icon = self.catalog.icon(exercise_name)
+        if icon:
+            return icon
+        # Not in the catalog: a name containing a cardio exercise gets the cardio icon
+        if CardioImageMapper.database_image(exercise_name):
+            return "/workout-images/icons/cardio.webp"
         return "/workout-images/icons/default-icon.png"
     
     def get_exercise_image(self, exercise_name: str) -> str:
         """Get the full image path for a given exercise name."""
-        # For cardio, return the appropriate image
-        for cardio_name in self.cardio_exercises:
-            if cardio_name.lower() in exercise_name.lower():
-                # Return the appropriate image filename based on cardio exercise name
-                if "treadmill" in exercise_name.lower():
-                    return "/workout-images/cardio/treadmill.webp"
-                elif "outdoor running" in exercise_name.lower() or "running" in exercise_name.lower():
-                    return "/workout-images/cardio/running.webp"
-                elif "walking" in exercise_name.lower():
-                    return "/workout-images/cardio/walking.webp"
-                elif "cycling" in exercise_name.lower() or "bike" in exercise_name.lower():
-                    if "exercise bike" in exercise_name.lower():
-                        return "/workout-images/cardio/exercise-bike.webp"
-                    else:
-                        return "/workout-images/cardio/bicycle.webp"
-                elif "jump rope" in exercise_name.lower():
-                    return "/workout-images/cardio/jumping-rope.webp"
-                elif "swimming" in exercise_name.lower():
-                    return "/workout-images/cardio/swimming.webp"
-                elif "hiking" in exercise_name.lower():
-                    return "/workout-images/cardio/hiking.webp"
-                # Default cardio image
-                return "/workout-images/cardio/cardio.webp"
+        return self._image(exercise_name)
+    
+    def _resolve_image(self, exercise_name: str) -> str:
+        # For cardio, return the appropriate image (one scan on the shared cardio automaton)
+        image = CardioImageMapper.database_image(exercise_name)
+        if image:
+            return image
         
-        # For strength training exercises, construct the image path from the exercise name
+        # For strength training exercises, use the catalog image or construct it from the exercise name
+        image = self.catalog.image(exercise_name)
+        if image:
+            return image
         formatted_name = exercise_name.replace(" ", "-")
         return f"/workout-images/{formatted_name}.webp"
     
@@ -81,5 +67,4 @@ class ExerciseDatabase:
             # Return cardio exercises with proper formatting
             return [{"Title": name, "Icon": icon} for name, icon in self.cardio_exercises.items()]
             
-        target_body_parts = self.workout_categories.get(category, [])
-        return self.df[self.df['BodyPart'].isin(target_body_parts)].to_dict('records')
\ No newline at end of file
+        return list(self.catalog.category(category))
\ No newline at end of file
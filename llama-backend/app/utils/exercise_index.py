@@ -0,0 +1,172 @@
+import os
+import re
+import math
+import logging
+from collections import Counter
+from typing import Optional, List, Dict, Any, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Exercises offered to the LLM per option
+SHORTLIST_SIZE = int(os.getenv("WORKOUT_SHORTLIST_SIZE", "10"))
+
+# Title keywords that identify the equipment an exercise needs, checked in order;
+# anything that matches none of them is a bodyweight exercise
+EQUIPMENT_KEYWORDS = [
+    ("bodyweight", ["bodyweight", "push-up", "push up", "pull-up", "pull up", "dip", "jump", "sit to reach"]),
+    ("machine", ["machine", "smith", "leg press", "leg extension", "leg curl", "peck deck", "pec deck",
+                 "hack squat", "glute-ham", "glute ham", "calf raise"]),
+    ("cable", ["cable", "pulley", "pulldown", "pushdown", "pressdown", "crossover", "rope"]),
+    ("kettlebell", ["kettlebell"]),
+    ("band", ["band", "banded"]),
+    ("medicine ball", ["medicine ball"]),
+    ("dumbbell", ["dumbbell", "hammer curl", "kickback", "concentration", "lateral raise"]),
+    ("barbell", ["barbell", "ez", "bar", "deadlift", "bench press", "shoulder press", "squat",
+                 "good morning", "french press", "upright row", "shrug", "triceps extension"]),
+]
+
+# Equipment that can be used for the home-friendly option
+HOME_EQUIPMENT = {"bodyweight", "dumbbell", "band", "kettlebell", "medicine ball"}
+
+# What each strength option asks for: a retrieval query and the equipment it may use
+OPTION_INTENTS: Dict[str, Dict[str, Any]] = {
+    "challenging": {
+        "query": "barbell compound press squat deadlift row pull bench",
+        "equipment": None
+    },
+    "moderate": {
+        "query": "dumbbell cable machine curl raise extension fly row press",
+        "equipment": None
+    },
+    "home": {
+        "query": "bodyweight dumbbell band push up squat lunge bridge plank",
+        "equipment": HOME_EQUIPMENT
+    },
+}
+
+# Relevance vs. novelty trade-off of the maximal marginal relevance selection
+MMR_LAMBDA = 0.7
+
+
+def infer_equipment(title: str) -> str:
+    """Equipment an exercise needs, inferred from its title."""
+    lowered = title.lower()
+    for equipment, keywords in EQUIPMENT_KEYWORDS:
+        if any(re.search(rf"\b{re.escape(keyword)}", lowered) for keyword in keywords):
+            return equipment
+    return "bodyweight"
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+class ExerciseIndex:
+    """
+    TF-IDF index over the exercise catalog, built once at startup.
+
+    Documents are an exercise's title, body part and inferred equipment.
+    shortlist() ranks a category's exercises against an option's intent
+    and picks a small, diverse set: body parts are covered round-robin and,
+    within that, maximal marginal relevance keeps near-duplicates apart.
+    Results only depend on the catalog, so they are memoized and stable
+    across requests (which also keeps the prompt prefix cacheable).
+    """
+
+    def __init__(self, exercises: List[Dict[str, Any]]):
+        self.exercises = [ex for ex in exercises if ex.get("Title") and ex.get("BodyPart") != "Cardio"]
+        self.titles = [ex["Title"] for ex in self.exercises]
+        self.body_parts = [ex.get("BodyPart", "") for ex in self.exercises]
+        # catalog records carry an Equipment tag; raw rows are inferred here
+        self.equipment = [ex.get("Equipment") or infer_equipment(ex["Title"]) for ex in self.exercises]
+        self._rows = {title: row for row, title in enumerate(self.titles)}
+        self._shortlists: Dict[Any, List[Dict[str, Any]]] = {}
+
+        documents = [
+            tokenize(f"{title} {body_part} {equipment}")
+            for title, body_part, equipment in zip(self.titles, self.body_parts, self.equipment)
+        ]
+        document_frequency = Counter(token for document in documents for token in set(document))
+        self.vocabulary = {token: column for column, token in enumerate(sorted(document_frequency))}
+        count = len(documents)
+        self.idf = np.array(
+            [math.log((1 + count) / (1 + document_frequency[token])) + 1 for token in sorted(document_frequency)],
+            dtype=np.float32
+        )
+        self.matrix = np.zeros((count, len(self.vocabulary)), dtype=np.float32)
+        for row, document in enumerate(documents):
+            for token, frequency in Counter(document).items():
+                self.matrix[row, self.vocabulary[token]] = frequency
+        self.matrix = self._normalize(self.matrix * self.idf)
+        logger.info(f"Exercise index built: {count} exercises, {len(self.vocabulary)} terms")
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def vectorize(self, text: str) -> np.ndarray:
+        """TF-IDF vector of a query; unknown terms are ignored."""
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for token, frequency in Counter(tokenize(text)).items():
+            column = self.vocabulary.get(token)
+            if column is not None:
+                vector[column] = frequency
+        return self._normalize(vector * self.idf)
+
+    def shortlist(self, candidates: List[Dict[str, Any]], intent: str, size: Optional[int] = None,
+                  key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        A short, diverse shortlist of candidates for one option intent.
+
+        candidates are the exercises allowed for the category; key (usually
+        the category) memoizes the result.
+        """
+        size = size or SHORTLIST_SIZE
+        memo_key = (key, intent, size) if key is not None else None
+        if memo_key is not None and memo_key in self._shortlists:
+            return self._shortlists[memo_key]
+
+        spec = OPTION_INTENTS[intent]
+        rows = [self._rows[ex["Title"]] for ex in candidates if ex.get("Title") in self._rows]
+        allowed: Optional[Set[str]] = spec["equipment"]
+        if allowed is not None:
+            # keep the equipment constraint unless it leaves too little to choose from
+            filtered = [row for row in rows if self.equipment[row] in allowed]
+            if len(filtered) >= min(size, 5):
+                rows = filtered
+
+        selected = self._select(rows, self.vectorize(spec["query"]), size)
+        result = [self.exercises[row] for row in selected]
+        if memo_key is not None:
+            self._shortlists[memo_key] = result
+        return result
+
+    def _select(self, rows: List[int], query: np.ndarray, size: int) -> List[int]:
+        if not rows:
+            return []
+        vectors = self.matrix[rows]
+        relevance = vectors @ query
+        similarity = vectors @ vectors.T
+
+        selected: List[int] = []
+        per_body_part: Counter = Counter()
+        max_similarity = np.zeros(len(rows), dtype=np.float32)
+        remaining = list(range(len(rows)))
+        while remaining and len(selected) < size:
+            # least covered body part first, then MMR score, then catalog order
+            best = min(
+                remaining,
+                key=lambda i: (
+                    per_body_part[self.body_parts[rows[i]]],
+                    -(MMR_LAMBDA * relevance[i] - (1 - MMR_LAMBDA) * max_similarity[i]),
+                    rows[i]
+                )
+            )
+            remaining.remove(best)
+            selected.append(best)
+            per_body_part[self.body_parts[rows[best]]] += 1
+            max_similarity = np.maximum(max_similarity, similarity[best])
+        return [rows[i] for i in selected]
@@ -0,0 +1,191 @@
+import os
+import re
+import logging
+from collections import Counter, OrderedDict
+from typing import Optional, Dict, List, Set, Sequence
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Matches below this confidence are not trusted and the LLM name is kept as is
+MATCH_THRESHOLD = float(os.getenv("EXERCISE_MATCH_THRESHOLD", "0.65"))
+# Best trigram/word candidates that get the (slower) edit-distance check
+CANDIDATES = 3
+# Resolved names kept in memory; LLM output repeats the same names a lot
+MEMO_SIZE = 4096
+
+RESOLUTIONS_TOTAL = metrics.counter(
+    "exercise_name_resolutions_total", "LLM exercise names resolved against the catalog", ["outcome"]
+)
+
+# Shorthand the LLM uses for equipment and common movements
+ABBREVIATIONS = {
+    "db": "dumbbell", "dbs": "dumbbell", "bb": "barbell", "kb": "kettlebell", "bw": "bodyweight",
+    "rdl": "romanian deadlift", "ohp": "overhead press", "ez": "ez", "dl": "deadlift",
+    "pushup": "push up", "pushups": "push up", "pullup": "pull up", "pullups": "pull up",
+    "tricep": "triceps", "bicep": "biceps", "flyes": "fly", "flys": "fly", "flies": "fly",
+}
+STOPWORDS = {"the", "a", "an", "with", "of", "on"}
+# Confidence factor when the last word (the movement: press, row, squat) differs
+MOVEMENT_MISMATCH = 0.85
+
+
+def _singular(token: str) -> str:
+    if len(token) <= 2 or token.endswith(("ss", "us")):
+        return token
+    if token.endswith(("ches", "shes", "sses", "xes")):
+        return token[:-2]
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def canonical_name(name: str) -> str:
+    """Comparison form of an exercise name: lowercase, abbreviations expanded, singular words."""
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", name.lower()):
+        expanded = ABBREVIATIONS.get(token, token)
+        tokens.extend(_singular(part) for part in expanded.split() if part not in STOPWORDS)
+    return " ".join(tokens)
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _pattern_masks(pattern: str) -> Dict[str, int]:
+    """Per-character bit masks of a pattern for the bit-parallel edit distance."""
+    masks: Dict[str, int] = {}
+    for position, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def _levenshtein(pattern: str, masks: Dict[str, int], text: str) -> int:
+    """Levenshtein distance with Myers' bit-parallel algorithm, one step per text character."""
+    if not pattern:
+        return len(text)
+    mask = (1 << len(pattern)) - 1
+    high_bit = 1 << (len(pattern) - 1)
+    positive, negative, distance = mask, 0, len(pattern)
+    for char in text:
+        equal = masks.get(char, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        positive_h = negative | ~(horizontal | positive)
+        negative_h = positive & horizontal
+        if positive_h & high_bit:
+            distance += 1
+        elif negative_h & high_bit:
+            distance -= 1
+        positive_h = (positive_h << 1) | 1
+        negative_h = negative_h << 1
+        positive = (negative_h | ~(vertical | positive_h)) & mask
+        negative = positive_h & vertical
+    return distance
+
+
+def _edit_similarity(pattern: str, masks: Dict[str, int], text: str) -> float:
+    """1 - Levenshtein distance / longer length."""
+    if pattern == text:
+        return 1.0
+    return 1 - _levenshtein(pattern, masks, text) / max(len(pattern), len(text), 1)
+
+
+class ExerciseMatch:
+    """Catalog title an LLM name resolved to, with how sure the resolver is."""
+
+    def __init__(self, title: str, confidence: float, exact: bool):
+        self.title = title
+        self.confidence = confidence
+        self.exact = exact
+
+    def __repr__(self) -> str:
+        return f"ExerciseMatch({self.title!r}, confidence={self.confidence:.2f}, exact={self.exact})"
+
+
+class ExerciseNameResolver:
+    """
+    Maps LLM exercise names to the nearest catalog title.
+
+    Titles are normalized once (abbreviations, plurals, punctuation) and put
+    in a trigram inverted index. A name is first looked up by its normalized
+    form; otherwise titles sharing trigrams are ranked by trigram and word
+    overlap and the best few are re-scored with a bit-parallel edit distance
+    on sorted words (so reordered names still match). Confidence is the mean
+    of the three, lowered when the movement word differs. Results are
+    memoized, so repeated names cost a dict lookup.
+    """
+
+    def __init__(self, titles: Sequence[str]):
+        self.titles: List[str] = list(dict.fromkeys(titles))
+        self._canonical: List[str] = [canonical_name(title) for title in self.titles]
+        self._exact: Dict[str, int] = {}
+        for index, canonical in enumerate(self._canonical):
+            self._exact.setdefault(canonical, index)
+        self._title_trigrams: List[Set[str]] = [_trigrams(canonical) for canonical in self._canonical]
+        self._title_words: List[Set[str]] = [set(canonical.split()) for canonical in self._canonical]
+        self._sorted: List[str] = [" ".join(sorted(canonical.split())) for canonical in self._canonical]
+        self._masks: List[Dict[str, int]] = [_pattern_masks(sorted_title) for sorted_title in self._sorted]
+        self._postings: Dict[str, List[int]] = {}
+        for index, trigrams in enumerate(self._title_trigrams):
+            for trigram in trigrams:
+                self._postings.setdefault(trigram, []).append(index)
+        self._memo: "OrderedDict[str, Optional[ExerciseMatch]]" = OrderedDict()
+        logger.info(f"Exercise name resolver ready: {len(self.titles)} titles, {len(self._postings)} trigrams")
+
+    def resolve(self, name: str, threshold: Optional[float] = None) -> Optional[ExerciseMatch]:
+        """Nearest catalog title for a name, or None if nothing reaches the threshold."""
+        match = self.nearest(name)
+        if match is None or match.confidence < (MATCH_THRESHOLD if threshold is None else threshold):
+            RESOLUTIONS_TOTAL.inc(outcome="unresolved")
+            return None
+        RESOLUTIONS_TOTAL.inc(outcome="exact" if match.exact else "fuzzy")
+        return match
+
+    def nearest(self, name: str) -> Optional[ExerciseMatch]:
+        """Best catalog match for a name regardless of confidence."""
+        if name in self._memo:
+            self._memo.move_to_end(name)
+            return self._memo[name]
+        match = self._nearest(name)
+        self._memo[name] = match
+        if len(self._memo) > MEMO_SIZE:
+            self._memo.popitem(last=False)
+        return match
+
+    def _nearest(self, name: str) -> Optional[ExerciseMatch]:
+        canonical = canonical_name(name)
+        if not canonical:
+            return None
+        if canonical in self._exact:
+            return ExerciseMatch(self.titles[self._exact[canonical]], 1.0, True)
+
+        trigrams = _trigrams(canonical)
+        shared = Counter(index for trigram in trigrams for index in self._postings.get(trigram, ()))
+        if not shared:
+            return None
+        words = set(canonical.split())
+        #cheap set overlaps first: trigram dice and word f1
+        scored = []
+        for index, overlap in shared.items():
+            dice = 2 * overlap / (len(trigrams) + len(self._title_trigrams[index]))
+            word_f1 = 2 * len(words & self._title_words[index]) / (len(words) + len(self._title_words[index]))
+            scored.append((dice + word_f1, dice, word_f1, index))
+        scored.sort(key=lambda item: (-item[0], item[3]))
+
+        sorted_name = " ".join(sorted(words))
+        movement = canonical.rsplit(" ", 1)[-1]
+        best_index, best_confidence = -1, 0.0
+        for _, dice, word_f1, index in scored[:CANDIDATES]:
+            edit = _edit_similarity(self._sorted[index], self._masks[index], sorted_name)
+            confidence = (dice + word_f1 + edit) / 3
+            if self._canonical[index].rsplit(" ", 1)[-1] != movement:
+                confidence *= MOVEMENT_MISMATCH
+            if confidence > best_confidence:
+                best_index, best_confidence = index, confidence
+        return ExerciseMatch(self.titles[best_index], best_confidence, False)
@@ -0,0 +1,86 @@
+import json
+import logging
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalArrayParser:
+    """
+    Pulls complete JSON arrays out of a token stream as soon as they close.
+
+    Tracks string/escape state and the bracket nesting of everything fed so
+    far, and decodes each array that opens at the given depth the moment its
+    closing bracket arrives. For {"options": [[...], [...]]} the option arrays
+    sit at depth 2 (inside the object and the outer list), so each option can
+    be handled before the model has finished writing the next one.
+    """
+
+    def __init__(self, depth: int = 2, repair: Optional[Callable[[str], str]] = None):
+        self.depth = depth
+        # Optional fixer applied to a fragment that is not valid JSON on its own
+        self.repair = repair
+        self.repaired = 0
+        self.failed = 0
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume the next piece of the stream and return the arrays it completed."""
+        completed = []
+        self._text += chunk
+
+        while self._pos < len(self._text):
+            char = self._text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if char == "[" and len(self._stack) == self.depth:
+                    self._start = self._pos
+                self._stack.append(char)
+            elif char in "]}":
+                if self._stack:
+                    self._stack.pop()
+                if char == "]" and len(self._stack) == self.depth and self._start is not None:
+                    value = self._decode(self._text[self._start:self._pos + 1])
+                    self._start = None
+                    if value is not None:
+                        completed.append(value)
+            self._pos += 1
+
+        # Nothing before an unfinished array is needed again
+        if self._start is None:
+            self._text = ""
+            self._pos = 0
+        elif self._start > 0:
+            self._text = self._text[self._start:]
+            self._pos -= self._start
+            self._start = 0
+
+        return completed
+
+    def _decode(self, fragment: str) -> Any:
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError as e:
+            if self.repair is not None:
+                try:
+                    value = json.loads(self.repair(fragment))
+                    self.repaired += 1
+                    return value
+                except json.JSONDecodeError:
+                    pass
+            self.failed += 1
+            logger.warning(f"Dropping undecodable streamed array ({e}): {fragment[:100]}")
+            return None
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Awaitable, Callable, Tuple
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+JOBS_TOTAL = metrics.counter(
+    "jobs_total", "Background jobs by kind and how they ended", ["kind", "outcome"]
+)
+JOB_SUBMISSIONS_TOTAL = metrics.counter(
+    "job_submissions_total", "Job submissions, new or attached to an existing job", ["kind", "result"]
+)
+JOB_SECONDS = metrics.histogram(
+    "job_seconds", "Time from job submission to its result", ["kind"]
+)
+JOBS_RUNNING = metrics.gauge(
+    "jobs_running", "Background jobs currently running", ["kind"]
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def idempotency_key(kind: str, payload: Any = None, client_key: Optional[str] = None) -> Optional[str]:
+    """
+    Hash identifying a retry of a submission, or None when the client sent no Idempotency-Key.
+
+    Identical bodies from different users are not deduplicated: only the client's
+    key makes two submissions the same job, and the payload is hashed in as well
+    so a key reused for a different request starts a new job.
+    """
+    if not client_key:
+        return None
+    if isinstance(payload, bytes):
+        body = payload
+    else:
+        body = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(f"{kind}|{client_key}|".encode("utf-8") + body).hexdigest()
+
+
+class Job:
+    """One background job: its status, and its result or error once finished."""
+
+    def __init__(self, kind: str, key: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.task: Optional[asyncio.Task] = None
+        self.done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        job = {
+            "jobId": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+        }
+        if self.status == SUCCEEDED:
+            job["result"] = self.result
+        elif self.status == FAILED:
+            job["error"] = self.error
+            job["statusCode"] = self.status_code
+        return job
+
+
+class JobStore:
+    """
+    Runs expensive requests in the background and keeps their results.
+
+    A submission returns a job at once; the work runs as an event loop task
+    that is not tied to the HTTP request, so a dropped connection does not
+    waste it. Submissions are keyed by an idempotency hash, and a retry with
+    the same key attaches to the job that is already running or finished
+    instead of starting the work again (failed jobs are retried); submissions
+    without a key always start a new job. Finished
+    jobs are kept for ttl_seconds; clients poll them, or long-poll with
+    wait() until the result is ready.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_jobs: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("JOB_RESULT_TTL", "600"))
+        self.max_jobs = max_jobs or int(os.getenv("JOB_MAX_ENTRIES", "1000"))
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # idempotency key -> job id
+        self._by_key: Dict[str, str] = {}
+
+    def submit(self, kind: str, key: Optional[str], factory: Callable[[], Awaitable[Any]]) -> Tuple[Job, bool]:
+        """Start factory() as a job unless one with the same key exists; returns the job and whether it is new."""
+        self._expire()
+        existing = self._jobs.get(self._by_key.get(key, "")) if key is not None else None
+        if existing is not None and existing.status != FAILED:
+            JOB_SUBMISSIONS_TOTAL.inc(kind=kind, result="attached")
+            logger.info(f"Attaching {kind} submission to existing job {existing.id} ({existing.status})")
+            return existing, False
+
+        job = Job(kind, key)
+        self._jobs[job.id] = job
+        if key is not None:
+            self._by_key[key] = job.id
+        job.task = asyncio.ensure_future(self._run(job, factory))
+        JOB_SUBMISSIONS_TOTAL.inc(kind=kind, result="new")
+        logger.info(f"Started {kind} job {job.id}")
+        return job, True
+
+    async def _run(self, job: Job, factory: Callable[[], Awaitable[Any]]):
+        job.status = RUNNING
+        JOBS_RUNNING.inc(kind=job.kind)
+        try:
+            job.result = await factory()
+            job.status = SUCCEEDED
+        except asyncio.CancelledError:
+            job.status_code = 503
+            job.error = "Job cancelled because the server is shutting down"
+            job.status = FAILED
+            raise
+        except Exception as e:
+            # HTTPException carries its own status code and detail
+            job.status_code = getattr(e, "status_code", 500)
+            job.error = str(getattr(e, "detail", "") or e)
+            job.status = FAILED
+            logger.error(f"{job.kind} job {job.id} failed: {job.error}")
+        finally:
+            job.finished_at = time.time()
+            JOBS_RUNNING.dec(kind=job.kind)
+            JOBS_TOTAL.inc(kind=job.kind, outcome=job.status)
+            JOB_SECONDS.observe(job.finished_at - job.created_at, kind=job.kind)
+            job.done.set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """The job once it finishes or after timeout seconds, whichever is first; None if unknown."""
+        job = self.get(job_id)
+        if job is None or job.finished or timeout <= 0:
+            return job
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    def _expire(self):
+        """Drop finished jobs past their TTL, then the oldest finished ones while over max_jobs."""
+        now = time.time()
+        expired = [job for job in self._jobs.values()
+                   if job.finished and now - job.finished_at > self.ttl_seconds]
+        overflow = len(self._jobs) - len(expired) - self.max_jobs
+        if overflow > 0:
+            expired += [job for job in self._jobs.values()
+                        if job.finished and now - job.finished_at <= self.ttl_seconds][:overflow]
+        for job in expired:
+            del self._jobs[job.id]
+            if job.key is not None and self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+
+    async def close(self):
+        """Cancel jobs that are still running (called on application shutdown)."""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(f"Cancelled {len(tasks)} running jobs")
+        # jobs cancelled before their task started never reached _run
+        for job in self._jobs.values():
+            if not job.finished:
+                job.status_code = 503
+                job.error = "Job cancelled because the server is shutting down"
+                job.status = FAILED
+                job.finished_at = time.time()
+                job.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {"jobs": len(self._jobs), "ttl_seconds": self.ttl_seconds, "max_jobs": self.max_jobs, **statuses}
+
+
+job_store = JobStore()
@@ -0,0 +1,164 @@
+from collections import deque
+from typing import Optional, Dict, List, Sequence, Set
+
+# Slots after the 256 byte transitions of a row: what ends at the node (None or 0 when
+# nothing does), and, in the automaton's own rows, the node number
+OUTPUT = 256
+NODE = 257
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed list of substrings.
+
+    Built once; a lookup walks the text a single time and reports every
+    pattern that occurs in it, however many patterns there are. It runs on
+    the UTF-8 bytes of the text (a substring's bytes are a substring of the
+    text's bytes), and fail links are folded into dense rows that hold the
+    next row for every byte, so each byte costs one list index. Patterns are
+    identified by their position in the list, so callers can encode
+    precedence in the order they pass them; precedence() compiles another
+    ranking into rows of its own, so several lookups with their own orders
+    share one automaton. With ignore_case, ASCII capitals move like their
+    lowercase letter, so lowercase patterns match without lowering the text.
+    """
+
+    def __init__(self, patterns: Sequence[str], ignore_case: bool = False):
+        self.patterns = list(patterns)
+        # trie: node -> byte -> node; node 0 is the root
+        goto: List[Dict[int, int]] = [{}]
+        output: List[Set[int]] = [set()]
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for byte in pattern.encode("utf-8"):
+                if byte not in goto[node]:
+                    goto.append({})
+                    output.append(set())
+                    goto[node][byte] = len(goto) - 1
+                node = goto[node][byte]
+            output[node].add(index)
+
+        # breadth-first, so a node's fail target is complete before the node itself
+        fail = [0] * len(goto)
+        delta: List[Dict[int, int]] = [dict(goto[0])] + [{} for _ in range(len(goto) - 1)]
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            # missing transitions behave like the fail target's
+            delta[node] = {**delta[fail[node]], **goto[node]}
+            output[node] |= output[fail[node]]
+            for byte, child in goto[node].items():
+                fail[child] = delta[fail[node]].get(byte, 0) if node else 0
+                queue.append(child)
+
+        # dense rows: 256 next rows, the node number where a pattern ends, the node number
+        rows: List[list] = [[None] * (NODE + 1) for _ in goto]
+        for node, row in enumerate(rows):
+            transitions = delta[node]
+            for byte in range(OUTPUT):
+                row[byte] = rows[transitions.get(byte, 0)]
+            if ignore_case:
+                row[ord("A"):ord("Z") + 1] = row[ord("a"):ord("z") + 1]
+            row[OUTPUT] = node if output[node] else None
+            row[NODE] = node
+        self._rows = rows
+        self._root = rows[0]
+
+        # pattern indices ending at each node, and the lowest of them
+        self._found: List[Set[int]] = output
+        self._output: List[Optional[frozenset]] = [frozenset(found) if found else None for found in output]
+        self._lowest: List[Optional[int]] = [min(found) if found else None for found in output]
+
+    def find_all(self, text: str) -> Set[int]:
+        """Indices of every pattern that occurs in text."""
+        found: Set[int] = set()
+        output = self._output
+        row = self._root
+        for byte in text.encode("utf-8"):
+            row = row[byte]
+            if row[OUTPUT] is not None:
+                found |= output[row[OUTPUT]]
+        return found
+
+    def first(self, text: str) -> Optional[int]:
+        """Lowest index of a pattern that occurs in text, or None."""
+        lowest = self._lowest
+        best = None
+        row = self._root
+        for byte in text.encode("utf-8"):
+            row = row[byte]
+            node = row[OUTPUT]
+            if node is not None and (best is None or lowest[node] < best):
+                best = lowest[node]
+        return best
+
+    def precedence(self, order: Sequence[int], required: Sequence[int] = ()) -> list:
+        """
+        Compile a ranking for first_ranked(): a pattern's rank is its position
+        in order (patterns left out are ignored), and with required patterns a
+        rank only counts if one of them occurs too. The rows carry the lowest
+        rank seen so far (and whether a required pattern has occurred) in the
+        state itself, so a lookup is one list index per byte and the answer is
+        in the row it ends on; equivalent states are merged, which keeps the
+        table near the size of the automaton. Returns the first row.
+        """
+        ranks = {index: rank for rank, index in reversed(list(enumerate(order)))}
+        required = set(required)
+        lowest = [min((ranks[index] for index in found if index in ranks), default=None) for found in self._found]
+        hits = [bool(found & required) for found in self._found]
+
+        # bytes that move every node to the same place are one class, so states are explored per class
+        classes: Dict[tuple, List[int]] = {}
+        for byte in range(OUTPUT):
+            classes.setdefault(tuple(row[byte][NODE] for row in self._rows), []).append(byte)
+        class_bytes = list(classes.values())
+
+        # states are (node, lowest rank so far, required seen), explored from the start
+        start = (0, None, not required)
+        states = [start]
+        index = {start: 0}
+        moves: List[List[int]] = []
+        for node, best, hit in states:
+            row = self._rows[node]
+            targets = []
+            for byte, *_ in class_bytes:
+                target = row[byte][NODE]
+                rank = lowest[target]
+                state = (target,
+                         rank if rank is not None and (best is None or rank < best) else best,
+                         hit or hits[target])
+                if state not in index:
+                    index[state] = len(states)
+                    states.append(state)
+                targets.append(index[state])
+            moves.append(targets)
+
+        # merge states with the same answer whose moves lead to merged states
+        answers = [best if hit else None for _, best, hit in states]
+        blocks = [hash(answer) for answer in answers]
+        while True:
+            signatures: Dict[tuple, int] = {}
+            refined = [signatures.setdefault((blocks[state], tuple(blocks[target] for target in targets)),
+                                             len(signatures))
+                       for state, targets in enumerate(moves)]
+            if len(signatures) == len(set(blocks)):
+                break
+            blocks = refined
+        blocks = refined
+
+        rows: List[list] = [[None] * (OUTPUT + 1) for _ in signatures]
+        for state, targets in enumerate(moves):
+            row = rows[blocks[state]]
+            row[OUTPUT] = answers[state]
+            for target, bytes_ in zip(targets, class_bytes):
+                for byte in bytes_:
+                    row[byte] = rows[blocks[target]]
+        return rows[blocks[0]]
+
+    @staticmethod
+    def first_ranked(text: str, ranking: list) -> Optional[int]:
+        """Lowest rank of a pattern that occurs in text under a precedence() ranking, or None."""
+        row = ranking
+        for byte in text.encode("utf-8"):
+            row = row[byte]
+        return row[OUTPUT]
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Optional, List, Dict, Any, AsyncIterator, Union
+
+from ollama import ResponseError
+
+from app.utils import llm_telemetry
+from app.utils.llm_scheduler import LLMScheduler, llm_scheduler
+from app.utils.model_router import ModelRouter, model_router
+from app.utils.ollama_pool import OllamaPool
+from app.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClient:
+    """
+    Shared non-blocking client for all LLaMA calls made by the engines.
+
+    Sends requests through an OllamaPool of pooled keep-alive async clients
+    instead of blocking the event loop with the synchronous module-level
+    ollama.chat, so the engines use every configured Ollama host without
+    knowing about them. Every call is admitted through the shared
+    LLMScheduler, and concurrent calls with an identical prompt share one
+    in-flight generation.
+    """
+
+    def __init__(self, host: Optional[str] = None, timeout: Optional[float] = None,
+                 max_connections: int = 20, keepalive_expiry: float = 300.0,
+                 scheduler: Optional[LLMScheduler] = None, pool: Optional[OllamaPool] = None,
+                 router: Optional[ModelRouter] = None):
+        self.scheduler = scheduler or llm_scheduler
+        self.router = router or model_router
+        self.timeout = timeout if timeout is not None else float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+        self.pool = pool or OllamaPool(
+            hosts=[host] if host else None,
+            timeout=self.timeout,
+            max_connections=max_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        # How long Ollama keeps the model resident after a request ("30m", "24h", -1 = forever)
+        self.keep_alive = self._parse_keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
+        self._inflight = SingleFlight("llm_chat")
+
+    @staticmethod
+    def _parse_keep_alive(value: str) -> Union[str, int]:
+        """Ollama takes a duration string or a number of seconds (negative keeps the model loaded)."""
+        value = value.strip()
+        if value.lstrip("-").isdigit():
+            return int(value)
+        return value
+
+    @staticmethod
+    def prompt_key(model: str, messages: List[Dict[str, str]],
+                   options: Optional[Dict[str, Any]] = None, **kwargs) -> str:
+        """Canonical key of a chat request, used to coalesce identical prompts."""
+        canonical = json.dumps(
+            {"model": model, "messages": messages, "options": options or {}, **kwargs},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def chat(self, model: str, messages: List[Dict[str, str]],
+                   options: Optional[Dict[str, Any]] = None,
+                   queue_timeout: Optional[float] = None, coalesce: bool = True,
+                   tags: Optional[Dict[str, str]] = None, **kwargs) -> Any:
+        """
+        Send a chat request to Ollama without blocking the event loop.
+
+        Identical concurrent requests await one shared generation unless
+        coalesce is False. Raises LLMUnavailableError if the scheduler cannot
+        admit the request. With tags (engine and label), the queue wait and
+        Ollama's timing fields are recorded once per generation.
+        """
+        kwargs.setdefault("keep_alive", self.keep_alive)
+
+        async def generate():
+            async with self.scheduler.slot(timeout=queue_timeout) as queue_wait:
+                response = await self.pool.call(
+                    lambda client: client.chat(model=model, messages=messages, options=options, **kwargs)
+                )
+            if tags:
+                llm_telemetry.record_queue_wait(queue_wait, model=model, **tags)
+                llm_telemetry.record_response(response, model=model, **tags)
+            return response
+
+        if not coalesce:
+            return await generate()
+        key = self.prompt_key(model, messages, options, **kwargs)
+        return await self._inflight.do(key, generate)
+
+    async def chat_stream(self, model: str, messages: List[Dict[str, str]],
+                          options: Optional[Dict[str, Any]] = None,
+                          queue_timeout: Optional[float] = None, tags: Optional[Dict[str, str]] = None,
+                          **kwargs) -> AsyncIterator[Any]:
+        """
+        Stream a chat response from Ollama chunk by chunk.
+
+        The scheduler slot is held until the stream is exhausted or closed, so
+        callers should close the generator when they stop reading early.
+        Streams are never coalesced. With tags, timing fields are recorded from
+        the final chunk, so a stream closed early only records its queue wait.
+        """
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        async with self.scheduler.slot(timeout=queue_timeout) as queue_wait:
+            if tags:
+                llm_telemetry.record_queue_wait(queue_wait, model=model, **tags)
+            async with self.pool.endpoint() as endpoint:
+                stream = await endpoint.client.chat(
+                    model=model, messages=messages, options=options, stream=True, **kwargs
+                )
+                try:
+                    async for chunk in stream:
+                        if tags and chunk.get("done"):
+                            llm_telemetry.record_response(chunk, model=model, **tags)
+                        yield chunk
+                finally:
+                    # release the HTTP response right away when the caller stops early
+                    await stream.aclose()
+
+    async def chat_for_task(self, task: str, messages: List[Dict[str, str]],
+                            options: Optional[Dict[str, Any]] = None, label: str = "", **kwargs) -> Any:
+        """
+        Chat with the model the router picks for an engine task.
+
+        The task profile supplies num_predict and temperature (explicit options
+        win), and the call's latency and token counts feed back into routing.
+        A model missing on Ollama is marked unavailable and the next one tried.
+        label (workout category, meal milestone, tip category) tags the call's
+        telemetry.
+        """
+        tried = set()
+        while True:
+            model, task_options = self.router.route(task, exclude=tried)
+            started = time.perf_counter()
+            try:
+                response = await self.chat(
+                    model=model, messages=messages, options={**task_options, **(options or {})},
+                    tags={"engine": task, "label": label}, **kwargs
+                )
+            except ResponseError as e:
+                if e.status_code != 404 or model in tried:
+                    raise
+                self.router.mark_unavailable(model)
+                tried.add(model)
+                continue
+            self.router.record(
+                task, model, time.perf_counter() - started,
+                response.get("prompt_eval_count") or 0, response.get("eval_count") or 0
+            )
+            return response
+
+    async def chat_stream_for_task(self, task: str, messages: List[Dict[str, str]],
+                                   options: Optional[Dict[str, Any]] = None, label: str = "",
+                                   **kwargs) -> AsyncIterator[Any]:
+        """Streaming counterpart of chat_for_task; the final chunk carries the token counts."""
+        model, task_options = self.router.route(task)
+        started = time.perf_counter()
+        stream = self.chat_stream(
+            model=model, messages=messages, options={**task_options, **(options or {})},
+            tags={"engine": task, "label": label}, **kwargs
+        )
+        try:
+            async for chunk in stream:
+                if chunk.get("done"):
+                    self.router.record(
+                        task, model, time.perf_counter() - started,
+                        chunk.get("prompt_eval_count") or 0, chunk.get("eval_count") or 0
+                    )
+                yield chunk
+        except ResponseError as e:
+            if e.status_code == 404:
+                self.router.mark_unavailable(model)
+            raise
+        finally:
+            await stream.aclose()
+
+    async def preload(self, model: str):
+        """Load a model into memory on every healthy Ollama host without generating anything."""
+        for endpoint in self.pool.healthy_endpoints():
+            await endpoint.client.generate(model=model, prompt="", keep_alive=self.keep_alive)
+
+    async def close(self):
+        """Close the pooled HTTP connections (called on application shutdown)."""
+        await self.pool.close()
+        logger.info("Closed Ollama client pool")
+
+
+# Single client instance shared by WorkoutEngine, TipEngine and EnhancedFoodEngine
+llm_client = LLMClient()
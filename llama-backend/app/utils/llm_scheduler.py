@@ -0,0 +1,127 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUE_WAIT_SECONDS = metrics.histogram(
+    "llm_queue_wait_seconds", "Time LLM requests spent waiting for a free Ollama slot"
+)
+ADMITTED_TOTAL = metrics.counter(
+    "llm_scheduler_admitted_total", "LLM requests admitted to an Ollama slot"
+)
+REJECTED_TOTAL = metrics.counter(
+    "llm_scheduler_rejected_total", "LLM requests rejected by the scheduler", ["reason"]
+)
+ACTIVE_GAUGE = metrics.gauge(
+    "llm_scheduler_active", "LLM requests currently running on Ollama"
+)
+WAITING_GAUGE = metrics.gauge(
+    "llm_scheduler_waiting", "LLM requests currently waiting in the queue"
+)
+
+
+class LLMUnavailableError(Exception):
+    """Raised when an LLM call cannot be served; engines answer with their fallback instead."""
+
+
+class LLMQueueFullError(LLMUnavailableError):
+    """The wait queue is full, so the request is rejected immediately."""
+
+
+class LLMQueueTimeoutError(LLMUnavailableError):
+    """The request waited longer than its queue timeout without getting a slot."""
+
+
+class LLMScheduler:
+    """
+    Bounded admission control in front of Ollama.
+
+    At most max_concurrency generations run at once (OLLAMA_NUM_PARALLEL per pool host),
+    at most max_queue requests wait for a slot, and each waiter gives up after its
+    queue timeout. Rejections raise LLMUnavailableError so engines fail fast into
+    their existing fallback paths instead of piling more work onto Ollama.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, max_queue: Optional[int] = None,
+                 queue_timeout: Optional[float] = None):
+        # defaults to OLLAMA_NUM_PARALLEL slots on every host of the Ollama pool
+        host_count = len([host for host in os.getenv("OLLAMA_HOSTS", "").split(",") if host.strip()]) or 1
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("LLM_MAX_CONCURRENCY", int(os.getenv("OLLAMA_NUM_PARALLEL", "4")) * host_count)
+        )
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("LLM_MAX_QUEUE", "16"))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(
+            os.getenv("LLM_QUEUE_TIMEOUT", "10")
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Create the semaphore lazily so it binds to the running event loop."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @property
+    def saturated(self) -> bool:
+        """True when every slot is busy and requests are already queueing."""
+        return self.active >= self.max_concurrency and self.waiting > 0
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None):
+        """Hold one Ollama slot for the duration of the block; yields the seconds spent queueing."""
+        semaphore = self._get_semaphore()
+
+        # waiting includes requests that have not acquired their slot yet
+        if self.active + self.waiting >= self.max_concurrency + self.max_queue:
+            REJECTED_TOTAL.inc(reason="queue_full")
+            logger.warning(f"LLM queue full ({self.waiting} waiting, {self.active} active), rejecting request")
+            raise LLMQueueFullError("LLM queue is full")
+
+        wait_timeout = self.queue_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        self.waiting += 1
+        WAITING_GAUGE.set(self.waiting)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=wait_timeout)
+        except asyncio.TimeoutError:
+            REJECTED_TOTAL.inc(reason="timeout")
+            logger.warning(f"LLM request timed out after waiting {wait_timeout:.1f}s for a slot")
+            raise LLMQueueTimeoutError(f"No LLM slot available within {wait_timeout:.1f}s")
+        finally:
+            self.waiting -= 1
+            WAITING_GAUGE.set(self.waiting)
+
+        waited = time.perf_counter() - started
+        QUEUE_WAIT_SECONDS.observe(waited)
+        ADMITTED_TOTAL.inc()
+        self.active += 1
+        ACTIVE_GAUGE.set(self.active)
+        try:
+            yield waited
+        finally:
+            self.active -= 1
+            ACTIVE_GAUGE.set(self.active)
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current scheduler state for the metrics endpoint."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": REJECTED_TOTAL.snapshot()
+        }
+
+
+# Single scheduler shared by every engine through the LLM client
+llm_scheduler = LLMScheduler()
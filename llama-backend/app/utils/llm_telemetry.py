@@ -0,0 +1,121 @@
+import os
+import logging
+from typing import Any, Dict, Optional
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Every call metric is tagged with the engine task, its category/milestone and the model
+CALL_LABELS = ["engine", "label", "model"]
+
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+TOKENS_PER_SECOND_BUCKETS = (1, 2.5, 5, 10, 20, 30, 50, 75, 100, 150, 250, 500, 1000)
+
+# A load_duration above this means Ollama had to (re)load the model for the call
+RELOAD_THRESHOLD_SECONDS = float(os.getenv("LLM_RELOAD_THRESHOLD", "0.5"))
+
+PROMPT_TOKENS = metrics.histogram(
+    "llm_call_prompt_tokens", "Prompt tokens evaluated per LLM call", CALL_LABELS, buckets=TOKEN_BUCKETS
+)
+COMPLETION_TOKENS = metrics.histogram(
+    "llm_call_completion_tokens", "Tokens generated per LLM call", CALL_LABELS, buckets=TOKEN_BUCKETS
+)
+LOAD_SECONDS = metrics.histogram(
+    "llm_call_load_seconds", "Time Ollama spent loading the model per call", CALL_LABELS
+)
+PROMPT_EVAL_SECONDS = metrics.histogram(
+    "llm_call_prompt_eval_seconds", "Time Ollama spent evaluating the prompt per call", CALL_LABELS
+)
+EVAL_SECONDS = metrics.histogram(
+    "llm_call_eval_seconds", "Time Ollama spent generating tokens per call", CALL_LABELS
+)
+PROMPT_TOKENS_PER_SECOND = metrics.histogram(
+    "llm_call_prompt_tokens_per_second", "Prompt evaluation throughput per call", CALL_LABELS,
+    buckets=TOKENS_PER_SECOND_BUCKETS
+)
+TOKENS_PER_SECOND = metrics.histogram(
+    "llm_call_tokens_per_second", "Generation throughput per call", CALL_LABELS,
+    buckets=TOKENS_PER_SECOND_BUCKETS
+)
+QUEUE_WAIT_SECONDS = metrics.histogram(
+    "llm_call_queue_wait_seconds", "Time each LLM call waited for a scheduler slot", CALL_LABELS
+)
+MODEL_RELOADS_TOTAL = metrics.counter(
+    "llm_call_model_reloads_total", "LLM calls that had to wait for the model to load", CALL_LABELS
+)
+PARSE_OUTCOMES_TOTAL = metrics.counter(
+    "llm_call_parse_outcomes_total", "Parse outcome of each LLM call's response", CALL_LABELS + ["outcome"]
+)
+
+
+def _seconds(nanoseconds: Optional[int]) -> float:
+    """Ollama reports durations in nanoseconds."""
+    return (nanoseconds or 0) / 1e9
+
+
+def record_queue_wait(seconds: float, engine: str, label: str = "", model: str = ""):
+    QUEUE_WAIT_SECONDS.observe(seconds, engine=engine, label=label, model=model)
+
+
+def record_response(response: Any, engine: str, label: str = "", model: str = ""):
+    """
+    Record the timing fields of a finished Ollama response (or final stream chunk).
+
+    Only the call that actually ran on Ollama should be recorded, so requests
+    coalesced onto it do not count its tokens twice.
+    """
+    labels = {"engine": engine, "label": label, "model": model}
+    prompt_tokens = response.get("prompt_eval_count") or 0
+    completion_tokens = response.get("eval_count") or 0
+    load_seconds = _seconds(response.get("load_duration"))
+    prompt_eval_seconds = _seconds(response.get("prompt_eval_duration"))
+    eval_seconds = _seconds(response.get("eval_duration"))
+
+    PROMPT_TOKENS.observe(prompt_tokens, **labels)
+    COMPLETION_TOKENS.observe(completion_tokens, **labels)
+    LOAD_SECONDS.observe(load_seconds, **labels)
+    PROMPT_EVAL_SECONDS.observe(prompt_eval_seconds, **labels)
+    EVAL_SECONDS.observe(eval_seconds, **labels)
+    if prompt_eval_seconds > 0:
+        PROMPT_TOKENS_PER_SECOND.observe(prompt_tokens / prompt_eval_seconds, **labels)
+    if eval_seconds > 0:
+        TOKENS_PER_SECOND.observe(completion_tokens / eval_seconds, **labels)
+    if load_seconds > RELOAD_THRESHOLD_SECONDS:
+        MODEL_RELOADS_TOTAL.inc(**labels)
+        logger.warning(f"{engine} call waited {load_seconds:.2f}s for {model} to load")
+
+
+def record_parse(outcome: str, engine: str, label: str = "", model: str = ""):
+    PARSE_OUTCOMES_TOTAL.inc(engine=engine, label=label, model=model, outcome=outcome)
+
+
+def call_stats() -> Dict[str, Dict[str, Any]]:
+    """Per engine/label/model averages for capacity planning, keyed "engine,label,model"."""
+    stats: Dict[str, Dict[str, Any]] = {}
+
+    def entry(key: str) -> Dict[str, Any]:
+        return stats.setdefault(key, {"calls": 0, "timed_calls": 0, "parse_outcomes": {}})
+
+    # every call records its queue wait; streams closed early have no timing fields
+    for key, summary in QUEUE_WAIT_SECONDS.snapshot().items():
+        entry(key)["calls"] = summary["count"]
+    for key, summary in COMPLETION_TOKENS.snapshot().items():
+        entry(key)["timed_calls"] = summary["count"]
+        entry(key)["avg_completion_tokens"] = summary["avg"]
+    for name, histogram in (
+        ("avg_prompt_tokens", PROMPT_TOKENS),
+        ("avg_tokens_per_second", TOKENS_PER_SECOND),
+        ("avg_prompt_tokens_per_second", PROMPT_TOKENS_PER_SECOND),
+        ("avg_queue_wait_seconds", QUEUE_WAIT_SECONDS),
+    ):
+        for key, summary in histogram.snapshot().items():
+            entry(key)[name] = summary["avg"]
+    for key, summary in LOAD_SECONDS.snapshot().items():
+        entry(key)["load_seconds_total"] = summary["sum"]
+    for key, count in MODEL_RELOADS_TOTAL.snapshot().items():
+        entry(key)["model_reloads"] = count
+    for key, count in PARSE_OUTCOMES_TOTAL.snapshot().items():
+        call_key, outcome = key.rsplit(",", 1)
+        entry(call_key)["parse_outcomes"][outcome] = count
+    return stats
@@ -0,0 +1,167 @@
+import os
+import time
+import logging
+from collections import deque
+from typing import Optional, List, Dict, Any, Deque, Set, Tuple
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TASK_LATENCY_SECONDS = metrics.histogram(
+    "llm_task_latency_seconds", "End-to-end LLM latency per task and model", ["task", "model"]
+)
+TASK_TOKENS_TOTAL = metrics.counter(
+    "llm_task_tokens_total", "Prompt and completion tokens per task and model", ["task", "model", "kind"]
+)
+TASK_ROUTES_TOTAL = metrics.counter(
+    "llm_task_routes_total", "Routing decisions per task and model", ["task", "model"]
+)
+
+
+class TaskProfile:
+    """
+    How one engine task should be served.
+
+    candidates are ordered cheapest first; num_predict caps the completion
+    length and slo_seconds is the latency the task should stay under.
+    """
+
+    def __init__(self, task: str, candidates: List[str], num_predict: int, temperature: float,
+                 slo_seconds: float):
+        self.task = task
+        # LLM_MODEL_<TASK>="small,large" overrides the candidate list
+        override = os.getenv(f"LLM_MODEL_{task.upper()}")
+        self.candidates = [model.strip() for model in override.split(",") if model.strip()] if override else candidates
+        self.num_predict = num_predict
+        self.temperature = temperature
+        self.slo_seconds = slo_seconds
+
+    def options(self) -> Dict[str, Any]:
+        return {"num_predict": self.num_predict, "temperature": self.temperature}
+
+
+TASK_PROFILES: Dict[str, TaskProfile] = {
+    profile.task: profile for profile in (
+        TaskProfile("workout_strength", ["llama3.2"], num_predict=1024, temperature=0.5, slo_seconds=8.0),
+        TaskProfile("workout_cardio", ["llama3.2"], num_predict=768, temperature=0.7, slo_seconds=8.0),
+        # one replacement option instead of three
+        TaskProfile("workout_option", ["llama3.2"], num_predict=320, temperature=0.7, slo_seconds=4.0),
+        TaskProfile("food_selection", ["llama3.2"], num_predict=512, temperature=0.7, slo_seconds=6.0),
+        TaskProfile("tip", ["llama3.2:1b", "llama3.2"], num_predict=96, temperature=0.8, slo_seconds=3.0),
+    )
+}
+
+
+class ModelRouter:
+    """
+    Picks the cheapest model per task that meets the task's latency SLO.
+
+    Latencies are kept over a sliding time window per (task, model). A model
+    without enough recent samples is assumed to meet the SLO, so cheaper
+    models get re-tried once their slow samples age out. Models that are not
+    installed on Ollama are skipped once marked unavailable.
+    """
+
+    MIN_SAMPLES = 5
+    SLO_PERCENTILE = 0.9
+
+    def __init__(self, profiles: Optional[Dict[str, TaskProfile]] = None, window_seconds: Optional[float] = None,
+                 max_samples: int = 100):
+        self.profiles = profiles or TASK_PROFILES
+        self.window_seconds = window_seconds if window_seconds is not None else float(
+            os.getenv("LLM_ROUTER_WINDOW", "300")
+        )
+        self.max_samples = max_samples
+        self.unavailable: Set[str] = set()
+        # (task, model) -> deque of (recorded_at, seconds, prompt_tokens, completion_tokens)
+        self._samples: Dict[Tuple[str, str], Deque[Tuple[float, float, int, int]]] = {}
+
+    def profile(self, task: str) -> TaskProfile:
+        if task not in self.profiles:
+            raise KeyError(f"Unknown LLM task: {task}")
+        return self.profiles[task]
+
+    def models(self) -> List[str]:
+        """Every model any task may be routed to."""
+        return list(dict.fromkeys(model for profile in self.profiles.values() for model in profile.candidates))
+
+    def mark_unavailable(self, model: str):
+        if model not in self.unavailable:
+            self.unavailable.add(model)
+            logger.warning(f"Model {model} is not available on Ollama, routing around it")
+
+    def mark_available(self, model: str):
+        self.unavailable.discard(model)
+
+    def _recent(self, task: str, model: str) -> Deque[Tuple[float, float, int, int]]:
+        samples = self._samples.setdefault((task, model), deque(maxlen=self.max_samples))
+        cutoff = time.monotonic() - self.window_seconds
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return samples
+
+    def latency_percentile(self, task: str, model: str, percentile: Optional[float] = None) -> Optional[float]:
+        """Recent latency percentile, or None without enough samples."""
+        samples = self._recent(task, model)
+        if len(samples) < self.MIN_SAMPLES:
+            return None
+        latencies = sorted(sample[1] for sample in samples)
+        index = min(len(latencies) - 1, int(len(latencies) * (percentile or self.SLO_PERCENTILE)))
+        return latencies[index]
+
+    def route(self, task: str, exclude: Optional[Set[str]] = None) -> Tuple[str, Dict[str, Any]]:
+        """Model and generation options for a task."""
+        profile = self.profile(task)
+        candidates = [model for model in profile.candidates
+                      if model not in self.unavailable and (not exclude or model not in exclude)]
+        if not candidates:
+            # nothing known to work, so try the largest model anyway
+            candidates = profile.candidates[-1:]
+
+        chosen = None
+        for model in candidates:
+            latency = self.latency_percentile(task, model)
+            if latency is None or latency <= profile.slo_seconds:
+                chosen = model
+                break
+        if chosen is None:
+            # every model misses the SLO, so use whichever is fastest
+            chosen = min(candidates, key=lambda model: self.latency_percentile(task, model))
+
+        TASK_ROUTES_TOTAL.inc(task=task, model=chosen)
+        return chosen, profile.options()
+
+    def record(self, task: str, model: str, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Record one finished call so routing follows the measured latency."""
+        self._recent(task, model).append((time.monotonic(), seconds, prompt_tokens, completion_tokens))
+        TASK_LATENCY_SECONDS.observe(seconds, task=task, model=model)
+        TASK_TOKENS_TOTAL.inc(prompt_tokens, task=task, model=model, kind="prompt")
+        TASK_TOKENS_TOTAL.inc(completion_tokens, task=task, model=model, kind="completion")
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing table with recent per-model latency and token counts."""
+        tasks = {}
+        for task, profile in self.profiles.items():
+            models = {}
+            for model in profile.candidates:
+                samples = self._recent(task, model)
+                models[model] = {
+                    "available": model not in self.unavailable,
+                    "samples": len(samples),
+                    "p50_seconds": self.latency_percentile(task, model, 0.5),
+                    "p90_seconds": self.latency_percentile(task, model),
+                    "avg_prompt_tokens": sum(s[2] for s in samples) / len(samples) if samples else None,
+                    "avg_completion_tokens": sum(s[3] for s in samples) / len(samples) if samples else None
+                }
+            tasks[task] = {
+                "slo_seconds": profile.slo_seconds,
+                "num_predict": profile.num_predict,
+                "temperature": profile.temperature,
+                "models": models
+            }
+        return {"window_seconds": self.window_seconds, "tasks": tasks}
+
+
+# Single routing table shared by every engine through the LLM client
+model_router = ModelRouter()
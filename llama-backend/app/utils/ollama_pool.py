@@ -0,0 +1,253 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, Awaitable, Callable, Set
+
+import httpx
+from ollama import AsyncClient, ResponseError
+
+from app.utils.llm_scheduler import LLMUnavailableError
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "http://127.0.0.1:11434"
+
+ENDPOINT_REQUESTS_TOTAL = metrics.counter(
+    "ollama_endpoint_requests_total", "Requests routed to each Ollama endpoint", ["host", "result"]
+)
+ENDPOINT_OUTSTANDING = metrics.gauge(
+    "ollama_endpoint_outstanding", "Requests currently running on each Ollama endpoint", ["host"]
+)
+ENDPOINT_HEALTHY = metrics.gauge(
+    "ollama_endpoint_healthy", "1 if the Ollama endpoint is in rotation", ["host"]
+)
+ENDPOINT_EJECTIONS_TOTAL = metrics.counter(
+    "ollama_endpoint_ejections_total", "Times an Ollama endpoint was taken out of rotation", ["host"]
+)
+
+
+class NoHealthyEndpointError(LLMUnavailableError):
+    """Every Ollama endpoint in the pool is currently ejected."""
+
+
+def configured_hosts() -> List[str]:
+    """Ollama hosts from OLLAMA_HOSTS (comma separated), else OLLAMA_HOST, else the local default."""
+    hosts = [host.strip() for host in os.getenv("OLLAMA_HOSTS", "").split(",") if host.strip()]
+    return hosts or [os.getenv("OLLAMA_HOST") or DEFAULT_HOST]
+
+
+class OllamaEndpoint:
+    """One Ollama server with its own pooled keep-alive client."""
+
+    def __init__(self, host: str, timeout: float, limits: httpx.Limits):
+        self.host = host
+        self.timeout = timeout
+        self.limits = limits
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self._client: Optional[AsyncClient] = None
+        ENDPOINT_HEALTHY.set(1, host=host)
+
+    @property
+    def client(self) -> AsyncClient:
+        """Create the client lazily so it binds to the running event loop."""
+        if self._client is None:
+            self._client = AsyncClient(host=self.host, timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > time.monotonic()
+
+    async def close(self):
+        if self._client is None:
+            return
+        if hasattr(self._client, "close"):
+            await self._client.close()
+        else:
+            # older ollama releases only expose the underlying httpx client
+            await self._client._client.aclose()
+        self._client = None
+
+
+class OllamaPool:
+    """
+    Routes LLM requests across several Ollama servers.
+
+    Each request goes to the endpoint with the fewest requests in flight.
+    An endpoint is ejected after failure_threshold consecutive connection
+    failures or a failed health check, and is re-admitted when a periodic
+    health check succeeds (or, without health checks, once its ejection
+    period has passed).
+    """
+
+    def __init__(self, hosts: Optional[List[str]] = None, timeout: float = 120.0,
+                 max_connections: int = 20, keepalive_expiry: float = 300.0,
+                 health_interval: Optional[float] = None, failure_threshold: Optional[int] = None,
+                 eject_seconds: Optional[float] = None):
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.endpoints = [OllamaEndpoint(host, timeout, limits) for host in (hosts or configured_hosts())]
+        self.health_interval = health_interval if health_interval is not None else float(
+            os.getenv("OLLAMA_HEALTH_INTERVAL", "10")
+        )
+        self.failure_threshold = failure_threshold or int(os.getenv("OLLAMA_EJECT_FAILURES", "3"))
+        self.eject_seconds = eject_seconds if eject_seconds is not None else float(
+            os.getenv("OLLAMA_EJECT_SECONDS", "30")
+        )
+        self._rotation = 0
+        self._health_task: Optional[asyncio.Task] = None
+        logger.info(f"Ollama pool with {len(self.endpoints)} endpoints: {', '.join(self.hosts)}")
+
+    @property
+    def hosts(self) -> List[str]:
+        return [endpoint.host for endpoint in self.endpoints]
+
+    def healthy_endpoints(self) -> List[OllamaEndpoint]:
+        for endpoint in self.endpoints:
+            # the ejection period passed without a health check re-admitting it: start
+            # over, so a single failure does not eject it again straight away
+            if endpoint.ejected_until and not endpoint.ejected:
+                self._readmit(endpoint)
+        return [endpoint for endpoint in self.endpoints if not endpoint.ejected]
+
+    def _pick(self, exclude: Optional[Set[str]] = None) -> OllamaEndpoint:
+        """Least outstanding requests; ties rotate so idle endpoints share the load."""
+        candidates = [endpoint for endpoint in self.healthy_endpoints()
+                      if not exclude or endpoint.host not in exclude]
+        if not candidates:
+            raise NoHealthyEndpointError("No healthy Ollama endpoint available")
+        self._rotation = (self._rotation + 1) % len(self.endpoints)
+        count = len(self.endpoints)
+        return min(
+            candidates,
+            key=lambda endpoint: (endpoint.outstanding, (self.endpoints.index(endpoint) - self._rotation) % count)
+        )
+
+    @asynccontextmanager
+    async def endpoint(self, exclude: Optional[Set[str]] = None):
+        """Hold an endpoint for one request, recording its outcome for ejection."""
+        endpoint = self._pick(exclude)
+        endpoint.outstanding += 1
+        ENDPOINT_OUTSTANDING.set(endpoint.outstanding, host=endpoint.host)
+        try:
+            yield endpoint
+        except Exception as e:
+            if self._is_endpoint_failure(e):
+                ENDPOINT_REQUESTS_TOTAL.inc(host=endpoint.host, result="failure")
+                self._record_failure(endpoint, str(e))
+            raise
+        else:
+            ENDPOINT_REQUESTS_TOTAL.inc(host=endpoint.host, result="success")
+            endpoint.consecutive_failures = 0
+        finally:
+            endpoint.outstanding -= 1
+            ENDPOINT_OUTSTANDING.set(endpoint.outstanding, host=endpoint.host)
+
+    async def call(self, request: Callable[[AsyncClient], Awaitable[Any]]) -> Any:
+        """
+        Run one request on the least loaded endpoint.
+
+        If the endpoint cannot be reached, nothing was generated yet, so the
+        request is retried once on each other healthy endpoint.
+        """
+        tried: Set[str] = set()
+        while True:
+            try:
+                async with self.endpoint(exclude=tried) as endpoint:
+                    tried.add(endpoint.host)
+                    return await request(endpoint.client)
+            except (httpx.ConnectError, ConnectionError) as e:
+                if not [endpoint for endpoint in self.healthy_endpoints() if endpoint.host not in tried]:
+                    raise
+                logger.warning(f"Could not reach Ollama endpoint, retrying on another one: {str(e)}")
+
+    @staticmethod
+    def _is_endpoint_failure(error: Exception) -> bool:
+        """Connection problems and server errors count against the endpoint, bad requests don't."""
+        if isinstance(error, (httpx.TransportError, ConnectionError)):
+            return True
+        return isinstance(error, ResponseError) and error.status_code >= 500
+
+    def _record_failure(self, endpoint: OllamaEndpoint, reason: str):
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.failure_threshold and not endpoint.ejected:
+            self._eject(endpoint, reason)
+
+    def _eject(self, endpoint: OllamaEndpoint, reason: str):
+        endpoint.ejected_until = time.monotonic() + self.eject_seconds
+        ENDPOINT_HEALTHY.set(0, host=endpoint.host)
+        ENDPOINT_EJECTIONS_TOTAL.inc(host=endpoint.host)
+        logger.warning(f"Ejected Ollama endpoint {endpoint.host} for {self.eject_seconds:.0f}s: {reason}")
+
+    def _readmit(self, endpoint: OllamaEndpoint):
+        if endpoint.ejected_until:
+            logger.info(f"Re-admitted Ollama endpoint {endpoint.host}")
+        endpoint.ejected_until = 0.0
+        endpoint.consecutive_failures = 0
+        ENDPOINT_HEALTHY.set(1, host=endpoint.host)
+
+    async def check_health(self):
+        """Probe every endpoint once, ejecting dead ones and re-admitting recovered ones."""
+        async def probe(endpoint: OllamaEndpoint):
+            try:
+                await asyncio.wait_for(endpoint.client.ps(), timeout=max(1.0, self.health_interval / 2))
+            except Exception as e:
+                if not endpoint.ejected:
+                    self._eject(endpoint, f"health check failed ({str(e) or type(e).__name__})")
+                else:
+                    # keep it out until a check succeeds
+                    endpoint.ejected_until = time.monotonic() + self.eject_seconds
+                return
+            self._readmit(endpoint)
+
+        await asyncio.gather(*(probe(endpoint) for endpoint in self.endpoints))
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"Ollama health check loop error: {str(e)}")
+
+    def start(self):
+        """Start periodic health checks (called on application startup)."""
+        if self.health_interval > 0 and self._health_task is None:
+            self._health_task = asyncio.ensure_future(self._health_loop())
+
+    async def close(self):
+        """Stop health checks and close every endpoint's connections."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for endpoint in self.endpoints:
+            await endpoint.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-endpoint routing state for the metrics endpoint."""
+        return {
+            "health_interval": self.health_interval,
+            "failure_threshold": self.failure_threshold,
+            "eject_seconds": self.eject_seconds,
+            "endpoints": [
+                {
+                    "host": endpoint.host,
+                    "healthy": not endpoint.ejected,
+                    "outstanding": endpoint.outstanding,
+                    "consecutive_failures": endpoint.consecutive_failures
+                }
+                for endpoint in self.endpoints
+            ]
+        }
@@ -0,0 +1,56 @@
+import copy
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+FLIGHT_REQUESTS_TOTAL = metrics.counter(
+    "single_flight_requests_total", "Calls through a single-flight group", ["group", "role"]
+)
+FLIGHT_INFLIGHT = metrics.gauge(
+    "single_flight_inflight", "Distinct generations currently in flight", ["group"]
+)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one in-flight execution.
+
+    The first caller for a key (the leader) starts the work; callers arriving
+    while it is still running (followers) await the same task instead of
+    starting their own. The task is shielded, so a disconnecting caller does
+    not cancel the generation the others are waiting on.
+    """
+
+    def __init__(self, name: str, copy_result: bool = False):
+        self.name = name
+        # Followers get a deep copy when the result may be mutated by callers
+        self.copy_result = copy_result
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            FLIGHT_INFLIGHT.set(len(self._inflight), group=self.name)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() once per key at a time and share its result."""
+        task = self._inflight.get(key)
+        if task is not None:
+            FLIGHT_REQUESTS_TOTAL.inc(group=self.name, role="follower")
+            logger.info(f"Coalescing {self.name} request onto in-flight generation")
+            result = await asyncio.shield(task)
+            return copy.deepcopy(result) if self.copy_result else result
+
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        FLIGHT_INFLIGHT.set(len(self._inflight), group=self.name)
+        FLIGHT_REQUESTS_TOTAL.inc(group=self.name, role="leader")
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
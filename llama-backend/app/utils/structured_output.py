@@ -0,0 +1,85 @@
+import os
+import logging
+from typing import Optional, Dict, Any, Type, Union
+
+from pydantic import BaseModel
+
+from app.utils import llm_telemetry
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# "schema" constrains output to the pydantic JSON schema (Ollama >= 0.5),
+# "json" only forces valid JSON, "off" leaves the output unconstrained
+JSON_MODE = os.getenv("LLM_JSON_MODE", "schema").lower()
+
+PARSE_OUTCOMES_TOTAL = metrics.counter(
+    "llm_parse_outcomes_total",
+    "Parse outcome of LLM JSON responses (structured, repaired or failed)",
+    ["engine", "outcome"]
+)
+
+
+def json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """JSON schema of a pydantic model (pydantic v1 and v2)."""
+    if hasattr(model, "model_json_schema"):
+        return model.model_json_schema()
+    return model.schema()
+
+
+def response_format(model: Type[BaseModel]) -> Optional[Union[str, Dict[str, Any]]]:
+    """The Ollama `format` argument for the configured JSON mode."""
+    if JSON_MODE == "schema":
+        return json_schema(model)
+    if JSON_MODE == "json":
+        return "json"
+    return None
+
+
+def format_kwargs(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Keyword arguments that request structured output from LLMClient.chat."""
+    output_format = response_format(model)
+    return {"format": output_format} if output_format is not None else {}
+
+
+def parse_structured(content: str, model: Type[BaseModel], engine: str,
+                     tags: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Validate an LLM response directly into a pydantic schema.
+
+    Returns the validated data as a dict, or None if the content does not
+    match the schema (the caller then falls back to its repair path).
+    tags (label and model) are passed on to the per-call telemetry.
+    """
+    try:
+        if hasattr(model, "model_validate_json"):
+            parsed = model.model_validate_json(content)
+            data = parsed.model_dump()
+        else:
+            parsed = model.parse_raw(content)
+            data = parsed.dict()
+    except ValueError as e:
+        logger.warning(f"{engine} response did not match {model.__name__}: {str(e)[:200]}")
+        return None
+
+    record_outcome(engine, "structured", tags)
+    return data
+
+
+def record_outcome(engine: str, outcome: str, tags: Optional[Dict[str, str]] = None):
+    """Record whether a response parsed directly, needed repair, or failed."""
+    PARSE_OUTCOMES_TOTAL.inc(engine=engine, outcome=outcome)
+    llm_telemetry.record_parse(outcome, engine, **(tags or {}))
+
+
+def parse_stats() -> Dict[str, Dict[str, float]]:
+    """Parse-failure and repair rates per engine for the metrics endpoint."""
+    stats: Dict[str, Dict[str, float]] = {}
+    for key, count in PARSE_OUTCOMES_TOTAL.snapshot().items():
+        engine, outcome = key.split(",", 1)
+        stats.setdefault(engine, {"structured": 0.0, "repaired": 0.0, "failed": 0.0})[outcome] = count
+    for engine, counts in stats.items():
+        total = sum(counts[outcome] for outcome in ("structured", "repaired", "failed"))
+        counts["repair_rate"] = counts["repaired"] / total if total else 0.0
+        counts["failure_rate"] = counts["failed"] / total if total else 0.0
+    return stats
@@ -0,0 +1,124 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Optional, List, Dict, Any, Tuple
+
+from ollama import ResponseError
+
+from app.utils.llm_client import LLMClient, llm_client
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+WARMUP_SECONDS = metrics.histogram(
+    "llm_warmup_seconds", "Duration of each model warm-up step", ["engine", "step"]
+)
+WARMUP_READY = metrics.gauge(
+    "llm_warmup_ready", "1 once every engine model is loaded and warmed up"
+)
+
+
+class ModelWarmup:
+    """
+    Loads and warms the engine models at startup so the first user request
+    does not pay Ollama's model-load cost.
+
+    Each target is (task, system_prompt). Every model the router may pick is
+    preloaded once (models Ollama does not have are marked unavailable so the
+    router skips them), then every task runs a one-token generation on its
+    routed model so the system prompt is also processed before real traffic.
+    Failed attempts are retried until they succeed; ready stays False until
+    then so the readiness endpoint keeps the instance out of the load balancer.
+    """
+
+    def __init__(self, targets: List[Tuple[str, str]], client: Optional[LLMClient] = None,
+                 enabled: Optional[bool] = None, retry_interval: Optional[float] = None):
+        self.targets = targets
+        self.client = client or llm_client
+        self.enabled = enabled if enabled is not None else os.getenv("LLM_WARMUP", "true").lower() != "false"
+        self.retry_interval = retry_interval if retry_interval is not None else float(
+            os.getenv("LLM_WARMUP_RETRY_INTERVAL", "5")
+        )
+        self.ready = not self.enabled
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.warmed: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+        WARMUP_READY.set(1 if self.ready else 0)
+
+    def start(self):
+        """Run the warm-up in the background (called on application startup)."""
+        if self.ready or self._task is not None:
+            return
+        self._task = asyncio.ensure_future(self._run_until_ready())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run_until_ready(self):
+        while not self.ready:
+            self.attempts += 1
+            try:
+                await self.warm_up()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Model warm-up attempt {self.attempts} failed ({str(e)}), "
+                               f"retrying in {self.retry_interval}s")
+                await asyncio.sleep(self.retry_interval)
+
+    async def warm_up(self):
+        """Preload every model and prime every engine's system prompt."""
+        for model in self.client.router.models():
+            started = time.perf_counter()
+            try:
+                await self.client.preload(model)
+            except ResponseError as e:
+                if e.status_code != 404:
+                    raise
+                self.client.router.mark_unavailable(model)
+                continue
+            self.client.router.mark_available(model)
+            WARMUP_SECONDS.observe(time.perf_counter() - started, engine="all", step="load")
+            logger.info(f"Preloaded {model} in {time.perf_counter() - started:.2f}s")
+
+        for engine, system_prompt in self.targets:
+            if engine in self.warmed:
+                continue
+            model, _ = self.client.router.route(engine)
+            started = time.perf_counter()
+            await self.client.chat(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": "Hi"}
+                ],
+                options={"num_predict": 1},
+                coalesce=False
+            )
+            WARMUP_SECONDS.observe(time.perf_counter() - started, engine=engine, step="prompt")
+            self.warmed.append(engine)
+            logger.info(f"Warmed up {engine} on {model} in {time.perf_counter() - started:.2f}s")
+
+        self.ready = True
+        self.last_error = None
+        WARMUP_READY.set(1)
+        logger.info(f"Model warm-up finished for {len(self.targets)} engines, keep_alive={self.client.keep_alive}")
+
+    def status(self) -> Dict[str, Any]:
+        """Warm-up progress for the readiness endpoint."""
+        return {
+            "ready": self.ready,
+            "enabled": self.enabled,
+            "attempts": self.attempts,
+            "warmed": self.warmed,
+            "pending": [engine for engine, _ in self.targets if engine not in self.warmed],
+            "last_error": self.last_error,
+            "keep_alive": self.client.keep_alive
+        }
@@ -0,0 +1,212 @@
+import os
+import copy
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, List
+
+from app.models.schemas import WorkoutRequest
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS_TOTAL = metrics.counter(
+    "workout_cache_requests_total", "Workout options cache lookups", ["result"]
+)
+CACHE_EVICTIONS_TOTAL = metrics.counter(
+    "workout_cache_evictions_total", "Workout options cache entries evicted", ["reason"]
+)
+
+
+class WorkoutOptionsCache:
+    """
+    LRU + TTL cache of generated workout options keyed on a coarse profile bucket.
+
+    The options only depend on category, goal, fitness level, gender and rough
+    bands of age, height and weight, so look-alike users share a bucket. Each
+    bucket keeps up to variants_per_key different generations; once it is full,
+    lookups rotate through the variants so users still see some variety.
+    """
+
+    # Band widths used to canonicalize the numeric profile fields
+    AGE_BANDS = (18, 30, 40, 50, 60)
+    HEIGHT_BAND_CM = 10
+    WEIGHT_BAND_KG = 10
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 variants_per_key: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("WORKOUT_CACHE_MAX_ENTRIES", "1024"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("WORKOUT_CACHE_TTL", str(6 * 60 * 60))
+        )
+        self.variants_per_key = variants_per_key or int(os.getenv("WORKOUT_CACHE_VARIANTS", "3"))
+        # key -> {"variants": [(stored_at, result), ...], "next": rotation index}
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def _age_band(cls, age: int) -> str:
+        lower = 0
+        for bound in cls.AGE_BANDS:
+            if age < bound:
+                return f"{lower}-{bound - 1}"
+            lower = bound
+        return f"{lower}+"
+
+    @classmethod
+    def make_key(cls, data: WorkoutRequest, category: str, catalog_version: int = 0) -> Tuple:
+        """Canonicalize a request into its profile bucket; options built from an older catalog never match."""
+        return (
+            catalog_version,
+            category,
+            (data.goal or "").strip().lower(),
+            (data.fitnessLevel or "").strip().lower(),
+            (data.gender or "").strip().lower(),
+            cls._age_band(int(data.age)),
+            int(data.height // cls.HEIGHT_BAND_CM) * cls.HEIGHT_BAND_CM,
+            int(data.weight // cls.WEIGHT_BAND_KG) * cls.WEIGHT_BAND_KG,
+        )
+
+    def _live_variants(self, key: Tuple) -> List[Tuple[float, Dict[str, Any]]]:
+        """Drop expired variants for a key and return the ones still valid."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return []
+        now = time.monotonic()
+        variants = [(stored_at, result) for stored_at, result in entry["variants"]
+                    if now - stored_at < self.ttl_seconds]
+        expired = len(entry["variants"]) - len(variants)
+        if expired:
+            CACHE_EVICTIONS_TOTAL.inc(expired, reason="ttl")
+        if not variants:
+            del self._entries[key]
+            return []
+        entry["variants"] = variants
+        return variants
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """
+        Return the next cached variant for a bucket, or None on a miss.
+
+        A bucket that has not collected variants_per_key generations yet counts
+        as a miss so the caller generates (and stores) another variant.
+        """
+        variants = self._live_variants(key)
+        if len(variants) < self.variants_per_key:
+            self.misses += 1
+            CACHE_REQUESTS_TOTAL.inc(result="miss")
+            return None
+
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        index = entry["next"] % len(variants)
+        entry["next"] = index + 1
+        self.hits += 1
+        CACHE_REQUESTS_TOTAL.inc(result="hit")
+        return copy.deepcopy(variants[index][1])
+
+    def put(self, key: Tuple, result: Dict[str, Any]):
+        """Store a freshly generated variant for a bucket."""
+        variants = self._live_variants(key)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {"variants": variants, "next": 0}
+            self._entries[key] = entry
+        entry["variants"].append((time.monotonic(), copy.deepcopy(result)))
+        if len(entry["variants"]) > self.variants_per_key:
+            entry["variants"].pop(0)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            evicted_key, _ = self._entries.popitem(last=False)
+            CACHE_EVICTIONS_TOTAL.inc(reason="lru")
+            logger.info(f"Evicted least recently used workout cache bucket: {evicted_key}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size for the metrics endpoint."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "buckets": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "variants_per_key": self.variants_per_key
+        }
+
+
+class WeeklyPlanCache:
+    """
+    LRU + TTL cache of whole weekly plans keyed on the exact user profile.
+
+    Unlike the options cache, a plan belongs to one profile and is served
+    as is, so the daily screen shows the options the weekly plan promised.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("WEEKLY_PLAN_CACHE_MAX_ENTRIES", "4096"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("WEEKLY_PLAN_CACHE_TTL", str(7 * 24 * 60 * 60))
+        )
+        # key -> (stored_at, plan)
+        self._plans: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(data: WorkoutRequest, catalog_version: int = 0) -> Tuple:
+        """The exact profile; plans built from an older catalog never match."""
+        return (
+            catalog_version,
+            (data.goal or "").strip().lower(),
+            (data.fitnessLevel or "").strip().lower(),
+            (data.gender or "").strip().lower(),
+            int(data.age),
+            float(data.height),
+            float(data.weight),
+            int(data.workoutDays),
+        )
+
+    def get_day(self, data: WorkoutRequest, category: str, catalog_version: int = 0) -> Optional[Dict[str, Any]]:
+        """Options of a profile's cached plan for a category, or None."""
+        key = self.make_key(data, catalog_version)
+        entry = self._plans.get(key)
+        if entry is not None and time.monotonic() - entry[0] >= self.ttl_seconds:
+            del self._plans[key]
+            CACHE_EVICTIONS_TOTAL.inc(reason="plan_ttl")
+            entry = None
+        day = None
+        if entry is not None:
+            day = next((day for day in entry[1]["days"] if day["category"] == category), None)
+        if day is None:
+            self.misses += 1
+            CACHE_REQUESTS_TOTAL.inc(result="plan_miss")
+            return None
+        self._plans.move_to_end(key)
+        self.hits += 1
+        CACHE_REQUESTS_TOTAL.inc(result="plan_hit")
+        return {"options": copy.deepcopy(day["options"]), "category": category}
+
+    def put(self, data: WorkoutRequest, plan: Dict[str, Any], catalog_version: int = 0):
+        key = self.make_key(data, catalog_version)
+        self._plans[key] = (time.monotonic(), copy.deepcopy(plan))
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.max_entries:
+            self._plans.popitem(last=False)
+            CACHE_EVICTIONS_TOTAL.inc(reason="plan_lru")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "plans": len(self._plans),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
@@ -0,0 +1,151 @@
+"""
+Cardio image matching micro-benchmark.
+
+Generates a large corpus of cardio names the way the LLM writes them
+(activity keywords with prefixes and suffixes, plus strength exercises
+and unknown activities) and resolves every name with:
+
+- the previous keyword loops of CardioImageMapper.get_image_path and
+  ExerciseDatabase.get_exercise_image, kept here as the reference
+- the compiled automaton, uncached
+- the memoized lookups the app calls
+
+All three database variants run the full lookup, cardio keywords first and
+the catalog (exercise name resolver) for everything else, so they compare
+like with like; only the cardio matching differs between the first two.
+Every name must resolve to the same image as the reference, so the run
+doubles as a precedence check.
+
+Usage (from llama-backend/):
+    python benchmarks/cardio_image_matching.py --names 100000 --repeat 5
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.utils.cardio_image_mapper import CardioImageMapper  # noqa: E402
+from app.utils.exercise_db import ExerciseDatabase  # noqa: E402
+
+PREFIXES = ["", "Outdoor ", "Indoor ", "Easy ", "Brisk ", "HIIT ", "Interval ", "Steady-State ", "Low-Impact ",
+            "Beach ", "Recreational ", "Uphill "]
+ACTIVITIES = ["Running", "Treadmill Running", "Jogging", "Sprints", "Walking", "Power Walk", "Hiking", "Trail Trek",
+              "Stair Climbing", "Stairmaster", "Step Ups", "Cycling", "Exercise Bike", "Spinning", "Bike Ride",
+              "Jump Rope", "Skipping", "Jumping Jacks", "Rowing Machine", "Ergometer", "Swimming", "Pool Laps",
+              "Aqua Jogging", "Tennis", "Basketball", "Hoops", "Football", "Soccer", "Squash", "Volleyball", "Yoga",
+              "Stretch Flow", "Dance Cardio", "Boxing", "Elliptical", "Burpees", "Kickboxing", "Zumba"]
+SUFFIXES = ["", " Intervals", " Session", " Workout", " (30 min)", " Pyramid", " Tempo", " Drills", " Circuit"]
+OTHER_NAMES = ["Barbell Bench Press", "Dumbbell Row", "Squat", "Plank", "Cable Crossover", "Lunge"]
+
+
+def legacy_mapper_image(exercise_name: str) -> str:
+    """CardioImageMapper.get_image_path before it was compiled."""
+    cls = CardioImageMapper
+    if not exercise_name:
+        return f"/workout-images/cardio/{cls.DEFAULT_IMAGE}"
+    exercise_lower = exercise_name.lower()
+    for image_key in cls.CARDIO_IMAGES.keys():
+        if image_key in exercise_lower:
+            return f"/workout-images/cardio/{cls.CARDIO_IMAGES[image_key]}"
+    for keywords, image_key in cls.KEYWORD_MAPPINGS:
+        if any(keyword in exercise_lower for keyword in keywords):
+            return f"/workout-images/cardio/{cls.CARDIO_IMAGES[image_key]}"
+    return f"/workout-images/cardio/{cls.DEFAULT_IMAGE}"
+
+
+def legacy_database_image(database: ExerciseDatabase, exercise_name: str) -> str:
+    """ExerciseDatabase.get_exercise_image with the cardio keyword loops it had before it was compiled."""
+    for cardio_name in database.cardio_exercises:
+        if cardio_name.lower() in exercise_name.lower():
+            if "treadmill" in exercise_name.lower():
+                return "/workout-images/cardio/treadmill.webp"
+            elif "outdoor running" in exercise_name.lower() or "running" in exercise_name.lower():
+                return "/workout-images/cardio/running.webp"
+            elif "walking" in exercise_name.lower():
+                return "/workout-images/cardio/walking.webp"
+            elif "cycling" in exercise_name.lower() or "bike" in exercise_name.lower():
+                if "exercise bike" in exercise_name.lower():
+                    return "/workout-images/cardio/exercise-bike.webp"
+                return "/workout-images/cardio/bicycle.webp"
+            elif "jump rope" in exercise_name.lower():
+                return "/workout-images/cardio/jumping-rope.webp"
+            elif "swimming" in exercise_name.lower():
+                return "/workout-images/cardio/swimming.webp"
+            elif "hiking" in exercise_name.lower():
+                return "/workout-images/cardio/hiking.webp"
+            return "/workout-images/cardio/cardio.webp"
+    # strength branch, the same as ExerciseDatabase._resolve_image
+    image = database.catalog.image(exercise_name)
+    if image:
+        return image
+    formatted_name = exercise_name.replace(" ", "-")
+    return f"/workout-images/{formatted_name}.webp"
+
+
+def generate_names(count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    names = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            names.append(rng.choice(OTHER_NAMES))
+        else:
+            names.append(rng.choice(PREFIXES) + rng.choice(ACTIVITIES) + rng.choice(SUFFIXES))
+    return names
+
+
+def time_per_name(resolve: Callable[[str], str], names: List[str]) -> float:
+    started = time.perf_counter()
+    for name in names:
+        resolve(name)
+    return (time.perf_counter() - started) / len(names) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=100000, help="generated names to resolve")
+    parser.add_argument("--repeat", type=int, default=5, help="passes per row; the fastest is reported")
+    args = parser.parse_args()
+
+    names = generate_names(args.names)
+    print(f"{len(names)} names, {len(set(names))} distinct")
+
+    # precedence check against the previous implementations
+    database = ExerciseDatabase()
+    distinct = sorted(set(names))
+    mapper_mismatches = [name for name in distinct if CardioImageMapper.get_image_path(name) != legacy_mapper_image(name)]
+    database_mismatches = [name for name in distinct
+                           if database.get_exercise_image(name) != legacy_database_image(database, name)]
+    print(f"mismatches: mapper {len(mapper_mismatches)}, database {len(database_mismatches)}")
+    for name in (mapper_mismatches + database_mismatches)[:10]:
+        print(f"  {name!r}")
+
+    uncached_mapper = CardioImageMapper.get_image_path.__wrapped__
+    # a fresh database; its memo is warm after the first pass, as it is in the running app
+    database = ExerciseDatabase()
+    rows = [
+        ("mapper legacy", legacy_mapper_image),
+        ("mapper automaton", lambda name: uncached_mapper(CardioImageMapper, name)),
+        ("mapper memoized", CardioImageMapper.get_image_path),
+        ("database legacy", lambda name: legacy_database_image(database, name)),
+        ("database automaton", database._resolve_image),
+        ("database memoized", database.get_exercise_image),
+    ]
+    # every pass times all rows in turn and the fastest pass per row is kept, so
+    # machine noise and drift do not decide the comparison
+    best = {label: float("inf") for label, _ in rows}
+    for _ in range(args.repeat):
+        for label, resolve in rows:
+            best[label] = min(best[label], time_per_name(resolve, names))
+    for label, _ in rows:
+        print(f"{label:>20}: {best[label]:7.2f} us per name")
+
+    if mapper_mismatches or database_mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Stand-in Ollama servers for exercising the endpoint pool without GPUs.
+
+Each server is its own process speaking the parts of the Ollama HTTP API the
+app uses (/api/chat streamed or not, /api/generate, /api/ps, /api/tags). A
+reply is a fixed JSON document sent in a few chunks, one every --delay
+seconds, so requests overlap the way slow generations do. Killing a server
+and starting it again on the same port simulates a host going down and
+coming back.
+
+Usage (from llama-backend/):
+    python benchmarks/ollama_stub.py --ports 11501 11502 11503            # serve until Ctrl+C
+    python benchmarks/ollama_stub.py --ports 11501 11502 --requests 60    # also route load through OllamaPool
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import multiprocessing
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+REPLY_CHUNKS = ['{"options": [', '[{"workout": "Walking", "duration": "30 min"}]', ']}']
+
+
+def make_handler(delay: float):
+    class OllamaStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, body: dict):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/api/ps":
+                self._send_json({"models": []})
+            elif self.path == "/api/tags":
+                self._send_json({"models": [{"name": "stub", "model": "stub"}]})
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            if self.path not in ("/api/chat", "/api/generate"):
+                self.send_error(404)
+                return
+            model = request.get("model", "stub")
+            chat = self.path == "/api/chat"
+
+            def chunk(text: str, done: bool) -> dict:
+                body = {"model": model, "created_at": "", "done": done}
+                if chat:
+                    body["message"] = {"role": "assistant", "content": text}
+                else:
+                    body["response"] = text
+                if done:
+                    body.update(prompt_eval_count=10, eval_count=len(REPLY_CHUNKS))
+                return body
+
+            if request.get("stream", True):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for index, text in enumerate(REPLY_CHUNKS + [""]):
+                    if text:
+                        time.sleep(delay)
+                    line = (json.dumps(chunk(text, index == len(REPLY_CHUNKS))) + "\n").encode("utf-8")
+                    self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                time.sleep(delay * len(REPLY_CHUNKS))
+                self._send_json(chunk("".join(REPLY_CHUNKS), True))
+
+    return OllamaStubHandler
+
+
+def serve(port: int, delay: float):
+    """Run one stub server in this process until it is killed."""
+    ThreadingHTTPServer(("127.0.0.1", port), make_handler(delay)).serve_forever()
+
+
+def wait_until_listening(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.02)
+    raise TimeoutError(f"Ollama stub on port {port} did not start")
+
+
+def start_stub(port: int, delay: float = 0.05) -> multiprocessing.Process:
+    """Start a stub server in its own process and wait until it accepts connections."""
+    process = multiprocessing.Process(target=serve, args=(port, delay), daemon=True)
+    process.start()
+    wait_until_listening(port)
+    return process
+
+
+def stop_stub(process: multiprocessing.Process):
+    process.terminate()
+    process.join(5)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def route_load(hosts: List[str], requests: int, concurrency: int):
+    """Send chat requests through OllamaPool and report how they were spread over the hosts."""
+    from app.utils.ollama_pool import OllamaPool
+
+    pool = OllamaPool(hosts, health_interval=0)
+    served: Counter = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            async with pool.endpoint() as endpoint:
+                await endpoint.client.chat(model="stub", messages=[{"role": "user", "content": "hi"}])
+                served[endpoint.host] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    await pool.close()
+    print(f"{requests} requests, concurrency {concurrency}: {elapsed:.2f}s")
+    for host in hosts:
+        print(f"  {host}: {served[host]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ports", type=int, nargs="+", default=[11501, 11502, 11503], help="one server per port")
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds between reply chunks")
+    parser.add_argument("--requests", type=int, default=0, help="route this many requests through OllamaPool, then exit")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight while routing")
+    args = parser.parse_args()
+
+    processes = [start_stub(port, args.delay) for port in args.ports]
+    hosts = [f"http://127.0.0.1:{port}" for port in args.ports]
+    print(f"Ollama stubs listening on {', '.join(hosts)}")
+    try:
+        if args.requests:
+            asyncio.run(route_load(hosts, args.requests, args.concurrency))
+        else:
+            for process in processes:
+                process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            stop_stub(process)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Prompt prefix-cache benchmark for the workout prompts.
+
+Compares the old user-first layout (user profile before the instructions)
+with the static-first layout the engines now use. For each layout it sends
+the same sequence of differently profiled users to Ollama, one after the
+other, and reports how many prompt tokens Ollama had to evaluate and how
+long that took. With the static-first layout Ollama reuses the cached
+instruction prefix, so only the short profile tail is evaluated.
+
+Usage (from llama-backend/):
+    python benchmarks/prompt_prefix_cache.py --users 8 --model llama3.2
+    python benchmarks/prompt_prefix_cache.py --offline   # prefix overlap only, no Ollama needed
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.engine.workout import (  # noqa: E402
+    WorkoutEngine, CARDIO_PROMPT_PREFIX, CARDIO_SYSTEM_PROMPT, STRENGTH_SYSTEM_PROMPT, user_profile_block
+)
+from app.models.schemas import WorkoutRequest  # noqa: E402
+
+GENDERS = ["Male", "Female"]
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+GOALS = ["Weight Loss", "Gain Muscle", "Improve Fitness"]
+
+
+def sample_users(count: int) -> List[WorkoutRequest]:
+    """Deterministic, varied user profiles."""
+    return [
+        WorkoutRequest(
+            age=20 + (i * 7) % 45,
+            gender=GENDERS[i % len(GENDERS)],
+            height=155 + (i * 5) % 40,
+            weight=55 + (i * 9) % 50,
+            fitnessLevel=LEVELS[i % len(LEVELS)],
+            goal=GOALS[i % len(GOALS)],
+            workoutDays=3
+        )
+        for i in range(count)
+    ]
+
+
+def build_layouts(engine: WorkoutEngine) -> Dict[str, Dict[str, Callable[[WorkoutRequest], str]]]:
+    """Prompt builders per workout type, for both layouts."""
+    strength_prefix = engine._strength_prompt_prefix("Push", engine._get_strength_exercises("Push"))
+    return {
+        "cardio": {
+            "user_first": lambda user: user_profile_block(user).lstrip() + "\n\n" + CARDIO_PROMPT_PREFIX,
+            "static_first": lambda user: CARDIO_PROMPT_PREFIX + user_profile_block(user),
+        },
+        "strength": {
+            "user_first": lambda user: user_profile_block(user).lstrip() + "\n\n" + strength_prefix,
+            "static_first": lambda user: strength_prefix + user_profile_block(user),
+        },
+    }
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def prefix_overlap(prompts: List[str]) -> float:
+    """Average share of each prompt that repeats the previous prompt's prefix."""
+    shares = [common_prefix_length(prev, cur) / len(cur) for prev, cur in zip(prompts, prompts[1:])]
+    return statistics.mean(shares) if shares else 0.0
+
+
+def run_ollama(client, model: str, system_prompt: str, prompts: List[str]) -> Dict[str, float]:
+    """Send the prompts in order and collect Ollama's prompt evaluation fields."""
+    eval_counts, eval_seconds = [], []
+    for prompt in prompts:
+        response = client.chat(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            options={"num_predict": 1, "temperature": 0}
+        )
+        eval_counts.append(response.get("prompt_eval_count") or 0)
+        eval_seconds.append((response.get("prompt_eval_duration") or 0) / 1e9)
+    # the first request of either layout is always cold, so only the rest are compared
+    warm_counts, warm_seconds = eval_counts[1:] or eval_counts, eval_seconds[1:] or eval_seconds
+    return {
+        "avg_prompt_eval_tokens": statistics.mean(warm_counts),
+        "avg_prompt_eval_ms": statistics.mean(warm_seconds) * 1000,
+        "total_prompt_eval_ms": sum(eval_seconds) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=8, help="distinct user profiles per layout")
+    parser.add_argument("--model", default=os.getenv("LLM_MODEL_WORKOUT_STRENGTH", "llama3.2"))
+    parser.add_argument("--host", default=os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434"))
+    parser.add_argument("--offline", action="store_true", help="only report prefix overlap")
+    args = parser.parse_args()
+
+    engine = WorkoutEngine()
+    users = sample_users(args.users)
+    system_prompts = {"cardio": CARDIO_SYSTEM_PROMPT, "strength": STRENGTH_SYSTEM_PROMPT}
+
+    client = None
+    if not args.offline:
+        from ollama import Client
+        client = Client(host=args.host)
+
+    for workout_type, layouts in build_layouts(engine).items():
+        print(f"\n== {workout_type} ({args.users} users)")
+        results = {}
+        for layout, build in layouts.items():
+            prompts = [build(user) for user in users]
+            line = f"{layout:>12}: {len(prompts[0]):5d} chars, shared prefix {prefix_overlap(prompts):6.1%}"
+            if client is not None:
+                started = time.perf_counter()
+                results[layout] = run_ollama(client, args.model, system_prompts[workout_type], prompts)
+                line += (f", prompt eval {results[layout]['avg_prompt_eval_tokens']:7.1f} tokens"
+                         f" / {results[layout]['avg_prompt_eval_ms']:8.1f} ms per warm request"
+                         f" ({time.perf_counter() - started:.1f}s wall)")
+            print(line)
+        if len(results) == 2 and results["user_first"]["avg_prompt_eval_ms"] > 0:
+            saved = 1 - results["static_first"]["avg_prompt_eval_ms"] / results["user_first"]["avg_prompt_eval_ms"]
+            print(f"{'saved':>12}: {saved:.1%} of prompt evaluation time per warm request")
+
+
+if __name__ == "__main__":
+    main()
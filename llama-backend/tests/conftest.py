@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The app imports from, and reads its data files relative to, the llama-backend directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
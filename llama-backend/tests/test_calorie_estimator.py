@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.models.schemas import CalorieEstimateRequest, MAX_BODY_WEIGHT_KG
+from app.utils.calorie_estimator import CalorieEstimator, DEFAULT_MINUTES, parse_minutes
+
+
+@pytest.mark.parametrize("weight", [0, -70, MAX_BODY_WEIGHT_KG + 1])
+def test_implausible_body_weights_are_rejected(weight):
+    with pytest.raises(ValidationError):
+        CalorieEstimateRequest(weight=weight, sessions=[])
+    with pytest.raises(ValidationError):
+        CalorieEstimateRequest(weight=70, sessions=[{"workout": "Running", "weight": weight}])
+    assert CalorieEstimateRequest(weight=70, sessions=[{"workout": "Running"}]).sessions[0].weight is None
+
+
+@pytest.mark.parametrize("duration,minutes", [
+    ("30 min", 30.0),
+    ("20-25 minutes", 22.5),
+    ("1.5 hours", 90.0),
+    ("90 sec", 1.5),
+    ("20 min, 40 sec work/20 sec rest", 20.0),
+    (45, 45.0),
+    ("a while", DEFAULT_MINUTES),
+    (None, DEFAULT_MINUTES),
+    (0, DEFAULT_MINUTES),
+])
+def test_durations(duration, minutes):
+    assert parse_minutes(duration) == minutes
+
+
+@pytest.mark.parametrize("workout,intensity,image,activity,met", [
+    ("Outdoor Running", "Moderate", None, "running", 9.8),
+    ("Treadmill Intervals", "Moderate-High", None, "treadmill", 11.0),
+    ("Easy Walk", "light", None, "walking", 3.0),
+    ("Spinning Class", None, None, "exercise-bike", 6.8),
+    # a generic name takes the activity of its image
+    ("Morning Session", "High", "/workout-images/cardio/rowing.jpg", "rowing", 8.5),
+    ("Quidditch", "Moderate", None, "cardio", 7.3),
+])
+def test_met_lookup(workout, intensity, image, activity, met):
+    estimator = CalorieEstimator()
+    assert estimator.activity(workout, image) == activity
+    assert estimator.met(workout, intensity, image) == met
+
+
+def test_batch_matches_single_estimates_and_totals_add_up():
+    estimator = CalorieEstimator()
+    sessions = [
+        {"workout": "Outdoor Running", "duration": "30 min", "intensity": "Moderate"},
+        {"workout": "Swimming", "duration": "1 hour", "intensity": "Low", "weight": 90},
+        {"workout": "Jump Rope", "duration": "15-25 min", "intensity": "HIIT"},
+    ]
+    batch = estimator.estimate(sessions, weight=70)
+    assert batch == [estimator.estimate([session], weight=70)[0] for session in sessions]
+
+    # 9.8 MET x 70 kg x 0.5 h = 343 kcal, +-10% rounded down to tens
+    running = batch[0]
+    assert (running["activity"], running["met"], running["minutes"]) == ("running", 9.8, 30.0)
+    assert (running["caloriesLow"], running["caloriesHigh"], running["calories"]) == (300, 370, "300-370")
+    # the session's own weight wins: 6.0 x 90 x 1 = 540 kcal
+    assert (batch[1]["caloriesLow"], batch[1]["caloriesHigh"]) == (480, 590)
+
+    for estimate in batch:
+        kcal = estimate["met"] * (90 if estimate["workout"] == "Swimming" else 70) * estimate["minutes"] / 60
+        assert estimate["caloriesLow"] <= kcal <= estimate["caloriesHigh"]
+    assert sum(estimate["caloriesLow"] for estimate in batch) == 300 + 480 + batch[2]["caloriesLow"]
+    assert estimator.estimate([], weight=70) == []
+
+
+def test_ranges_stay_apart_for_short_sessions():
+    low, high = CalorieEstimator.calorie_ranges(np.array([2.5]), np.array([50.0]), np.array([5.0]))
+    assert (low.tolist(), high.tolist()) == ([0], [10])
+
+
+def test_annotate_sets_calories_on_cardio_exercises_only():
+    options = [[{"workout": "Cycling", "duration": "40 min", "intensity": "Moderate", "is_cardio": True}],
+               [{"workout": "Bench Press", "sets": "3", "reps": "8"}]]
+    CalorieEstimator().annotate(options, 80)
+    # 8.0 x 80 x 40/60 = 426.7 kcal
+    assert options[0][0]["calories"] == "380-460"
+    assert "calories" not in options[1][0]
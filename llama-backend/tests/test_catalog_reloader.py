@@ -0,0 +1,77 @@
+import os
+import asyncio
+
+from app.utils.catalog_reloader import CatalogReloader
+
+
+def make_reloader(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text("Push Ups\n")
+
+    def build(version):
+        lines = path.read_text().splitlines()
+        if "broken" in lines:
+            raise ValueError("broken catalog")
+        return {"version": version, "titles": lines}
+
+    return path, CatalogReloader("test_catalog", build, [str(path)], interval=0)
+
+
+def touch(path, text):
+    path.write_text(text)
+    # make the change visible even on filesystems with coarse mtimes
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_swap_on_change_and_keep_on_failure(tmp_path):
+    path, reloader = make_reloader(tmp_path)
+
+    async def run():
+        assert not await reloader.reload_if_changed()
+        touch(path, "Push Ups\nDips\n")
+        assert await reloader.reload_if_changed()
+        assert reloader.version == 2
+        assert reloader.current == {"version": 2, "titles": ["Push Ups", "Dips"]}
+
+        touch(path, "broken\n")
+        assert not await reloader.reload_if_changed()
+        assert reloader.current["version"] == 2 and reloader.last_error == "broken catalog"
+        # the broken file is not rebuilt on every check
+        assert not await reloader.reload_if_changed()
+
+    asyncio.run(run())
+
+
+def test_pin_holds_the_snapshot_until_the_block_ends(tmp_path):
+    path, reloader = make_reloader(tmp_path)
+
+    async def run():
+        with reloader.pin() as pinned:
+            touch(path, "Push Ups\nDips\n")
+            await reloader.reload_if_changed()
+            assert reloader.current is pinned and pinned["version"] == 1
+            # tasks started inside the block inherit the pin
+            async def read():
+                return reloader.current
+            assert await asyncio.ensure_future(read()) is pinned
+        assert reloader.current["version"] == 2
+
+    asyncio.run(run())
+
+
+def test_abandoned_pinned_stream_does_not_leak(tmp_path):
+    _, reloader = make_reloader(tmp_path)
+
+    async def stream():
+        with reloader.pin() as pinned:
+            yield pinned
+            yield pinned
+
+    async def run():
+        events = stream()
+        await events.__anext__()
+        await events.aclose()
+        assert reloader._pinned.get() is None
+
+    asyncio.run(run())
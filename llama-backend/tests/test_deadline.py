@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app.utils.deadline import Deadline, DeadlineExceeded, within_deadline
+
+
+def test_stage_finishing_in_time_returns_its_result():
+    async def run():
+        async def work():
+            await asyncio.sleep(0.01)
+            return "result"
+
+        assert await within_deadline(work(), Deadline(1.0, reserve_seconds=0), "stage") == "result"
+        assert await within_deadline(work(), None, "stage") == "result"
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("budget", [0.0, 0.05])
+def test_work_keeps_running_after_the_deadline(budget):
+    """Both a spent budget and a timeout raise, and the work still finishes in the background."""
+    async def run():
+        finished = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.1)
+            finished.set()
+
+        with pytest.raises(DeadlineExceeded) as raised:
+            await within_deadline(work(), Deadline(budget, reserve_seconds=0), "stage")
+        assert raised.value.stage == "stage"
+        await asyncio.wait_for(finished.wait(), 1.0)
+
+    asyncio.run(run())
+
+
+def test_cap_limits_the_stage():
+    async def run():
+        with pytest.raises(DeadlineExceeded):
+            await within_deadline(asyncio.sleep(1.0), Deadline(10.0), "stage", cap=0.01)
+
+    asyncio.run(run())
+
+
+def test_timeout_keeps_the_reserve():
+    deadline = Deadline(1.0, reserve_seconds=0.25)
+    assert 0.7 < deadline.timeout() <= 0.75
+    assert deadline.timeout(cap=0.1) == 0.1
+    assert Deadline(0.1, reserve_seconds=0.25).expired
@@ -0,0 +1,91 @@
+import pytest
+
+from app.engine.workout import WorkoutEngine
+from app.utils.exercise_catalog import load_catalog
+from app.utils.exercise_resolver import ExerciseNameResolver, MATCH_THRESHOLD, canonical_name
+
+TITLES = ["Dumbbell Bench Press", "Barbell Back Squat", "Romanian Deadlift", "Push Ups", "Seated Cable Row",
+          "Hack Squat"]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return WorkoutEngine()
+
+
+# LLM names that are close to a catalog title but a different exercise
+DIFFERENT_EXERCISES = [
+    ("Back Squat", "Hack Squat"),
+    ("Calf Raises", "Seated Calf Raise"),
+    ("Bench Press", "Barbell Bench Press"),
+    ("Sumo Deadlift", "Barbell Sumo Deadlift"),
+]
+
+
+@pytest.mark.parametrize("name,nearest", DIFFERENT_EXERCISES)
+def test_near_titles_are_not_renamed(engine, name, nearest):
+    assert load_catalog().resolver.nearest(name).title == nearest
+    assert load_catalog().title(name) is None
+
+    option = [{"workout": name, "sets": "3", "reps": "8-10"}]
+    exercise = engine._process_strength_option(option, 0, [], category="Legs")[0]
+    assert exercise["workout"] == name
+    # the nearest title still provides the icon
+    assert exercise["image"] == engine.exercise_db.get_exercise_icon(nearest)
+
+
+def test_normalized_names_are_renamed_and_deduplicated(engine):
+    option = [
+        {"workout": "DB Bench Press", "sets": "3", "reps": "10"},
+        {"workout": "Dumbbell bench presses", "sets": "3", "reps": "10"},
+    ]
+    processed = engine._process_strength_option(option, 0, [], category="Chest")
+    names = [exercise["workout"] for exercise in processed]
+    assert names[0] == "Dumbbell Bench Press"
+    assert names.count("Dumbbell Bench Press") == 1
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    return ExerciseNameResolver(TITLES)
+
+
+def test_canonical_name():
+    assert canonical_name("DB Bench Presses") == "dumbbell bench press"
+    assert canonical_name("Pull-ups with the Bar") == "pull up bar"
+
+
+@pytest.mark.parametrize("name,title", [
+    ("DB bench presses", "Dumbbell Bench Press"),
+    ("RDL", "Romanian Deadlift"),
+    ("pushups", "Push Ups"),
+    ("Seated Cable Rows", "Seated Cable Row"),
+])
+def test_normalized_names_match_exactly(resolver, name, title):
+    match = resolver.resolve(name)
+    assert (match.title, match.confidence, match.exact) == (title, 1.0, True)
+
+
+def test_reordered_words_resolve_fuzzily(resolver):
+    match = resolver.resolve("Squat Barbell Back")
+    assert match.title == "Barbell Back Squat" and not match.exact
+    assert MATCH_THRESHOLD <= match.confidence < 1.0
+
+
+def test_threshold(resolver):
+    # a different movement word is penalized below the threshold
+    nearest = resolver.nearest("Seated Cable Press")
+    assert nearest.title == "Seated Cable Row" and nearest.confidence < MATCH_THRESHOLD
+    assert resolver.resolve("Seated Cable Press") is None
+    assert resolver.resolve("Zumba") is None
+    # the threshold can be raised per call
+    back_squat = resolver.nearest("Back Squat")
+    assert resolver.resolve("Back Squat") is not None
+    assert resolver.resolve("Back Squat", threshold=back_squat.confidence + 0.01) is None
+
+
+def test_icons_resolve_through_the_catalog_before_cardio_names(engine):
+    database = engine.exercise_db
+    assert database.get_exercise_icon("DB Bench Press") == load_catalog().icon("Dumbbell Bench Press")
+    assert database.get_exercise_icon("Easy Walking") == "/workout-images/icons/cardio.webp"
+    assert database.get_exercise_icon("Quidditch") == "/workout-images/icons/default-icon.png"
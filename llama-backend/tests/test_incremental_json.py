@@ -0,0 +1,35 @@
+import json
+
+from app.utils.incremental_json import IncrementalArrayParser
+
+DOCUMENT = json.dumps({"options": [
+    [{"workout": "Push Ups", "reps": "10-12"}, {"workout": "Dips", "instruction": "Elbows in [not out]"}],
+    [{"workout": "Plank \"hold\"", "duration": "30 s"}],
+    [],
+]})
+
+
+def test_arrays_are_emitted_as_soon_as_they_close():
+    parser = IncrementalArrayParser(depth=2)
+    emitted = []
+    for index in range(len(DOCUMENT)):
+        for array in parser.feed(DOCUMENT[index]):
+            emitted.append((array, index))
+
+    assert [array for array, _ in emitted] == json.loads(DOCUMENT)["options"]
+    # each option comes out on the chunk holding its closing bracket
+    first_end = DOCUMENT.index("}], [") + 1
+    assert emitted[0][1] == first_end
+    assert parser.failed == 0
+
+
+def test_brackets_inside_strings_are_ignored():
+    parser = IncrementalArrayParser(depth=2)
+    assert parser.feed('{"options": [["a]", "b[') == []
+    assert parser.feed('"], ["\\"]"]') == [["a]", "b["], ['"]']]
+
+
+def test_broken_arrays_are_repaired_or_dropped():
+    parser = IncrementalArrayParser(depth=2, repair=lambda fragment: fragment.replace(",]", "]"))
+    assert parser.feed('{"options": [[1, 2,], [3 4]]}') == [[1, 2]]
+    assert (parser.repaired, parser.failed) == (1, 1)
@@ -0,0 +1,82 @@
+import asyncio
+
+from app.utils.job_store import JobStore, idempotency_key, FAILED, SUCCEEDED
+
+
+def test_idempotency_key():
+    profile = {"goal": "Lose Weight", "age": 30}
+    # bodies alone never make two submissions the same job
+    assert idempotency_key("workout", profile) is None
+    key = idempotency_key("workout", profile, "client-1")
+    assert key == idempotency_key("workout", {"age": 30, "goal": "Lose Weight"}, "client-1")
+    assert key != idempotency_key("workout", profile, "client-2")
+    assert key != idempotency_key("workout", {**profile, "age": 31}, "client-1")
+    assert key != idempotency_key("food", profile, "client-1")
+
+
+def test_retries_attach_and_failures_rerun():
+    async def run():
+        store = JobStore(ttl_seconds=60)
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return {"ok": True}
+
+        key = idempotency_key("workout", {"age": 30}, "client-1")
+        first, created = store.submit("workout", key, work)
+        retry, retry_created = store.submit("workout", key, work)
+        assert created and not retry_created and retry is first
+        await store.wait(first.id, 1.0)
+        assert first.status == FAILED and first.to_dict()["statusCode"] == 500
+
+        # a failed job is run again for the same key
+        second, created = store.submit("workout", key, work)
+        assert created and second.id != first.id
+        finished = await store.wait(second.id, 1.0)
+        assert finished.status == SUCCEEDED and finished.result == {"ok": True}
+
+        # without a key every submission is its own job
+        a, _ = store.submit("workout", None, work)
+        b, _ = store.submit("workout", None, work)
+        assert a.id != b.id
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_finished_jobs_expire():
+    async def run():
+        store = JobStore(ttl_seconds=0.05, max_jobs=2)
+
+        async def work():
+            return "done"
+
+        jobs = [store.submit("tip", idempotency_key("tip", index, "client"), work)[0] for index in range(3)]
+        await asyncio.gather(*(job.task for job in jobs))
+        # over max_jobs: the oldest finished job goes first
+        assert store.get(jobs[0].id) is None
+        assert store.get(jobs[2].id) is not None
+        await asyncio.sleep(0.1)
+        assert store.get(jobs[2].id) is None
+        # an expired key starts a new job
+        _, created = store.submit("tip", jobs[2].key, work)
+        assert created
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_close_cancels_running_jobs():
+    async def run():
+        store = JobStore()
+        job, _ = store.submit("workout", None, lambda: asyncio.sleep(10))
+        await asyncio.sleep(0)
+        await store.close()
+        assert job.status == FAILED and job.status_code == 503
+        assert (await store.wait(job.id, 1.0)) is job
+
+    asyncio.run(run())
@@ -0,0 +1,48 @@
+import pytest
+
+from app.utils.cardio_image_mapper import CardioImageMapper
+from app.utils.exercise_db import ExerciseDatabase
+from app.utils.keyword_automaton import KeywordAutomaton
+
+
+def test_overlapping_patterns_are_all_found():
+    automaton = KeywordAutomaton(["he", "she", "his", "hers"])
+    assert automaton.find_all("ushers") == {0, 1, 3}
+    assert automaton.find_all("xyz") == set()
+
+
+def test_lowest_index_wins_regardless_of_position():
+    # list order is the precedence, not where in the text a pattern occurs
+    automaton = KeywordAutomaton(["exercise bike", "bike", "running"])
+    assert automaton.first("running on the exercise bike") == 0
+    assert automaton.first("bike then running") == 1
+    assert automaton.first("stationary exercise bike") == 0
+    assert automaton.first("rowing") is None
+
+
+def test_ranking_is_gated_on_required_patterns():
+    automaton = KeywordAutomaton(["bike", "exercise bike", "cycling", "exercise bike"], ignore_case=True)
+    # rank by a different order than the list, counted only when "exercise bike" (index 3) occurs
+    ranking = automaton.precedence([1, 0], required=[3])
+    assert automaton.first_ranked("Exercise Bike Sprints", ranking) == 0
+    assert automaton.first_ranked("BIKE", ranking) is None
+    assert automaton.first_ranked("cycling", ranking) is None
+    ungated = automaton.precedence([2, 0])
+    assert automaton.first_ranked("Bike or Cycling", ungated) == 0
+    assert automaton.first_ranked("bike", ungated) == 1
+
+
+@pytest.mark.parametrize("name,image", [
+    ("Treadmill Running Intervals", "treadmill.webp"),
+    ("Outdoor Running", "running.webp"),
+    ("Exercise Bike Session", "exercise-bike.webp"),
+    ("Cycling Tempo", "bicycle.webp"),
+    ("Easy Walking", "walking.webp"),
+])
+def test_database_cardio_precedence(name, image):
+    assert ExerciseDatabase().get_exercise_image(name) == f"/workout-images/cardio/{image}"
+
+
+def test_mapper_falls_back_to_the_default_image():
+    assert CardioImageMapper.get_image_path("") == f"/workout-images/cardio/{CardioImageMapper.DEFAULT_IMAGE}"
+    assert CardioImageMapper.get_image_path("Quidditch") == f"/workout-images/cardio/{CardioImageMapper.DEFAULT_IMAGE}"
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from app.utils.llm_scheduler import LLMScheduler, LLMQueueFullError, LLMQueueTimeoutError
+
+
+def test_bounded_queue():
+    async def run():
+        scheduler = LLMScheduler(max_concurrency=2, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+        admitted = []
+
+        async def request(name):
+            async with scheduler.slot():
+                admitted.append(name)
+                await release.wait()
+
+        tasks = [asyncio.ensure_future(request(name)) for name in ("a", "b", "c")]
+        await asyncio.sleep(0.01)
+        # two running, one queued: the queue is full and the scheduler is saturated
+        assert (scheduler.active, scheduler.waiting) == (2, 1)
+        assert scheduler.saturated
+        with pytest.raises(LLMQueueFullError):
+            async with scheduler.slot():
+                pass
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert admitted == ["a", "b", "c"]
+        assert (scheduler.active, scheduler.waiting) == (0, 0)
+
+    asyncio.run(run())
+
+
+def test_queue_timeout_frees_the_waiter():
+    async def run():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=1, queue_timeout=5)
+        async with scheduler.slot():
+            with pytest.raises(LLMQueueTimeoutError):
+                async with scheduler.slot(timeout=0.05):
+                    pass
+            assert scheduler.waiting == 0
+        # the slot is free again once the holder leaves
+        async with scheduler.slot(timeout=0.05) as waited:
+            assert waited < 0.05
+
+    asyncio.run(run())
@@ -0,0 +1,95 @@
+import time
+import asyncio
+
+import pytest
+
+from app.utils.ollama_pool import OllamaPool, NoHealthyEndpointError
+from benchmarks.ollama_stub import free_port, start_stub, stop_stub
+
+
+@pytest.fixture
+def stubs():
+    """Two stand-in Ollama servers; tests may stop and restart them through the returned dict."""
+    ports = [free_port(), free_port()]
+    processes = {port: start_stub(port, delay=0.05) for port in ports}
+    yield ports, processes
+    for process in processes.values():
+        stop_stub(process)
+
+
+def host(port: int) -> str:
+    return f"http://127.0.0.1:{port}"
+
+
+async def chat(pool: OllamaPool) -> str:
+    async with pool.endpoint() as endpoint:
+        await endpoint.client.chat(model="stub", messages=[{"role": "user", "content": "hi"}])
+        return endpoint.host
+
+
+def test_least_outstanding_routing(stubs):
+    ports, _ = stubs
+
+    async def run():
+        pool = OllamaPool([host(port) for port in ports], health_interval=0)
+        try:
+            # one endpoint busy: the next request goes to the idle one
+            async with pool.endpoint() as busy:
+                assert await chat(pool) != busy.host
+            # concurrent requests spread evenly
+            hosts = await asyncio.gather(*(chat(pool) for _ in range(8)))
+            assert sorted(hosts.count(host(port)) for port in ports) == [4, 4]
+            assert all(endpoint.outstanding == 0 for endpoint in pool.endpoints)
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_eject_and_readmit(stubs):
+    ports, processes = stubs
+    down, up = ports
+
+    async def run():
+        pool = OllamaPool([host(port) for port in ports], health_interval=0, failure_threshold=2, eject_seconds=60)
+        try:
+            stop_stub(processes[down])
+            # connection failures are retried on the other endpoint until the dead one is ejected
+            for _ in range(4):
+                await pool.call(lambda client: client.ps())
+            assert [endpoint.host for endpoint in pool.healthy_endpoints()] == [host(up)]
+            assert {await chat(pool) for _ in range(3)} == {host(up)}
+
+            # a health check keeps it out while it is down and re-admits it once it answers
+            await pool.check_health()
+            assert [endpoint.host for endpoint in pool.healthy_endpoints()] == [host(up)]
+            processes[down] = start_stub(down, delay=0.05)
+            await pool.check_health()
+            assert len(pool.healthy_endpoints()) == 2
+            hosts = await asyncio.gather(*(chat(pool) for _ in range(4)))
+            assert hosts.count(host(down)) == 2
+
+            stop_stub(processes[up])
+            stop_stub(processes[down])
+            await pool.check_health()
+            with pytest.raises(NoHealthyEndpointError):
+                await chat(pool)
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_readmission_after_the_ejection_period_resets_failures():
+    pool = OllamaPool([host(free_port())], health_interval=0, failure_threshold=2, eject_seconds=0.05)
+    endpoint = pool.endpoints[0]
+    for _ in range(2):
+        pool._record_failure(endpoint, "connection refused")
+    assert pool.healthy_endpoints() == []
+
+    time.sleep(0.1)
+    assert pool.healthy_endpoints() == [endpoint]
+    assert endpoint.consecutive_failures == 0
+    # a single failure after re-admission is not enough to eject it again
+    pool._record_failure(endpoint, "connection refused")
+    assert pool.healthy_endpoints() == [endpoint]
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.engine.workout import WorkoutEngine
+from app.models.schemas import WorkoutRequest
+
+PROFILE = dict(age=30, gender="female", height=170, weight=65, goal="Muscle Gain", workoutDays=4,
+               fitnessLevel="Intermediate", mode="rules")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return WorkoutEngine()
+
+
+def previous_options(engine, category):
+    return engine.rule_generator.generate(WorkoutRequest(**PROFILE), category)["options"]
+
+
+@pytest.mark.parametrize("category", ["Push", "Cardio"])
+def test_only_the_selected_option_is_replaced(engine, category):
+    options = previous_options(engine, category)
+    result = asyncio.run(engine.regenerate_option(WorkoutRequest(**PROFILE), category, options, 1))
+    assert result["options"][0] == options[0] and result["options"][2] == options[2]
+    assert all(result["options"])
+    kept = {exercise["workout"] for index in (0, 2) for exercise in options[index]}
+    assert not kept & {exercise["workout"] for exercise in result["options"][1]}
+
+
+@pytest.mark.parametrize("category,options,index", [
+    ("Cardio", "none", 0),
+    ("Push", "short", 0),
+    ("Push", "long", 0),
+    ("Push", "empty", 2),
+    ("Arms Day", "valid", 0),
+    ("Push", "valid", 3),
+])
+def test_invalid_requests_are_rejected(engine, category, options, index):
+    valid = previous_options(engine, "Push")
+    options = {"none": [], "short": valid[:2], "long": valid + valid[:1], "empty": valid[:2] + [[]],
+               "valid": valid}[options]
+    with pytest.raises(ValueError):
+        asyncio.run(engine.regenerate_option(WorkoutRequest(**PROFILE), category, options, index))
+
+
+def test_endpoint_answers_400_for_invalid_requests(engine):
+    main = pytest.importorskip("app.main")
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    valid = previous_options(engine, "Push")
+    for body in (dict(category="Cardio", options=[], optionIndex=0),
+                 dict(category="Push", options=valid[:2], optionIndex=0),
+                 dict(category="Push", options=valid + valid[:1], optionIndex=0),
+                 dict(category="Arms Day", options=valid, optionIndex=0)):
+        response = client.post("/regenerate_workout_option/", json={**PROFILE, **body})
+        assert response.status_code == 400, body
+
+    response = client.post("/regenerate_workout_option/", json={**PROFILE, "category": "Push",
+                                                               "options": valid, "optionIndex": 1})
+    assert response.status_code == 200
+    assert all(response.json()["options"])
@@ -0,0 +1,74 @@
+import asyncio
+
+from app.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def run():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"options": [1, 2, 3]}
+
+        results = await asyncio.gather(*(flight.do("key", generate) for _ in range(5)))
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert not flight.in_flight("key")
+        # a later call runs again
+        await flight.do("key", generate)
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_followers_get_copies_when_asked():
+    async def run():
+        flight = SingleFlight("test", copy_result=True)
+
+        async def generate():
+            await asyncio.sleep(0.01)
+            return {"options": [1]}
+
+        leader, follower = await asyncio.gather(flight.do("key", generate), flight.do("key", generate))
+        assert leader == follower and leader is not follower
+
+    asyncio.run(run())
+
+
+def test_cancelled_caller_does_not_cancel_the_work():
+    async def run():
+        flight = SingleFlight("test")
+        finished = asyncio.Event()
+
+        async def generate():
+            await asyncio.sleep(0.05)
+            finished.set()
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("key", generate))
+        follower = asyncio.ensure_future(flight.do("key", generate))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == "done"
+        assert finished.is_set()
+
+    asyncio.run(run())
+
+
+def test_errors_reach_every_caller():
+    async def run():
+        flight = SingleFlight("test")
+
+        async def generate():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(flight.do("key", generate), flight.do("key", generate),
+                                       return_exceptions=True)
+        assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+        assert not flight.in_flight("key")
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.engine import tip
+from app.engine.tip import TipEngine, TipStreamProcessor
+from app.utils.deadline import Deadline
+
+USER = {"goal": "Weight Loss", "workoutDays": 3, "gender": "female", "fitnessLevel": "Beginner"}
+
+LONG_FIRST = "Your legs did the heavy lifting on Monday, so give them a gentle spin today and let the quads recover"
+LONG_SECOND = "Pair it with a protein-packed lunch like a chicken and quinoa bowl to rebuild what you broke down"
+# (raw LLM output, tip the client must end up with)
+TIPS = [
+    ('"Hydrate before you caffeinate!"', "Hydrate before you caffeinate!"),
+    ("\n 'Swap one soda for sparkling water. Your waistline will thank you.'\n\nAlso sleep more.",
+     "Swap one soda for sparkling water. Your waistline will thank you."),
+    (f"{LONG_FIRST}. {LONG_SECOND}. Then stretch for ten minutes before bed.", f"{LONG_FIRST}. {LONG_SECOND}."),
+    ("Walk after dinner. Ten minutes is enough. Your blood sugar will stay steady.",
+     "Walk after dinner. Ten minutes is enough. Your blood sugar will stay steady."),
+]
+
+
+def stream(chunks):
+    processor = TipStreamProcessor()
+    sent = ""
+    for chunk in chunks:
+        sent += processor.feed(chunk)
+        if processor.done:
+            break
+    sent += processor.finish()
+    assert sent == processor.text
+    return sent
+
+
+@pytest.mark.parametrize("raw,expected", TIPS)
+def test_every_two_chunk_split_gives_the_same_tip(raw, expected):
+    # covers splits inside leading quotes, the paragraph break and the ". " ending a sentence
+    for split in range(len(raw) + 1):
+        assert stream([raw[:split], raw[split:]]) == expected, split
+
+
+@pytest.mark.parametrize("raw,expected", TIPS)
+def test_character_tokens_give_the_same_tip(raw, expected):
+    assert stream(list(raw)) == expected
+
+
+def test_nothing_sent_is_taken_back():
+    processor = TipStreamProcessor()
+    # the closing quote and the text after the second sentence are held back
+    assert processor.feed('"Lift. Rest') == "Lift. Rest"
+    assert processor.feed('. Repeat"') == "."
+    assert processor.feed(" daily.") == ""
+    # short enough to keep whole once the stream ends
+    assert processor.finish() == ' Repeat" daily.'
+
+
+def test_stream_ends_with_the_deadline(monkeypatch):
+    closed = asyncio.Event()
+
+    async def stalled_stream(*args, **kwargs):
+        try:
+            yield {"model": "stub", "message": {"content": "Swap one soda "}}
+            await asyncio.sleep(10)
+            yield {"model": "stub", "message": {"content": "for sparkling water."}}
+        finally:
+            closed.set()
+
+    monkeypatch.setattr(tip.llm_client, "chat_stream_for_task", stalled_stream)
+
+    async def run():
+        events = [event async for event in TipEngine().stream_personalized_tip(
+            USER, deadline=Deadline(0.2, reserve_seconds=0)
+        )]
+        assert closed.is_set()
+        return events
+
+    events = asyncio.run(asyncio.wait_for(run(), 2.0))
+    assert [event["event"] for event in events][0] == "meta" and events[-1]["event"] == "done"
+    # what was streamed before the deadline is the tip
+    assert events[-1]["tip"] == "".join(event["text"] for event in events if event["event"] == "token")
+    assert events[-1]["tip"].startswith("Swap one soda")
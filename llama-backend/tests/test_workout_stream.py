@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+from app.engine import workout
+from app.engine.workout import WorkoutEngine
+from app.models.schemas import WorkoutRequest
+from app.utils.deadline import Deadline
+from app.utils.workout_cache import WorkoutOptionsCache
+
+PROFILE = dict(age=30, gender="male", height=180, weight=80, goal="Muscle Gain", workoutDays=4,
+               fitnessLevel="Intermediate", lastWorkoutCategory="Cardio", mode="llm")
+
+
+def test_generation_outlives_the_deadline_and_fills_the_cache(monkeypatch):
+    engine = WorkoutEngine()
+    # one generation is enough for a hit
+    engine.options_cache = WorkoutOptionsCache(variants_per_key=1)
+    data = WorkoutRequest(**PROFILE)
+    category = "Push"
+    titles = [exercise["Title"] for exercise in engine._get_strength_exercises(category)]
+    generated = [[{"workout": title, "sets": "3", "reps": "10", "instruction": ""}] for title in titles[:3]]
+    body = json.dumps({"options": generated})
+    first_option_end = body.index("]", body.index(titles[0])) + 1
+    finished = asyncio.Event()
+
+    async def slow_stream(*args, **kwargs):
+        try:
+            # the first option in time, the rest after the request's deadline
+            yield {"model": "stub", "message": {"content": body[:first_option_end]}}
+            await asyncio.sleep(0.3)
+            yield {"model": "stub", "message": {"content": body[first_option_end:]}}
+        finally:
+            finished.set()
+
+    monkeypatch.setattr(workout.llm_client, "chat_stream_for_task", slow_stream)
+
+    async def run():
+        events = [event async for event in engine.stream_workout_options(data, deadline=Deadline(0.1, reserve_seconds=0))]
+        options = [event["exercises"] for event in events if event["event"] == "option"]
+        assert len(options) == 3 and options[0][0]["workout"] == titles[0]
+        assert not finished.is_set()
+        key = engine.options_cache.make_key(data, category, engine.snapshots.current.version)
+        for _ in range(100):
+            if engine.options_cache.get(key) is not None:
+                break
+            await asyncio.sleep(0.02)
+        assert finished.is_set()
+        return engine.options_cache.get(key)
+
+    cached = asyncio.run(run())
+    assert [option[0]["workout"] for option in cached["options"]] == titles[:3]